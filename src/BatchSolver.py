@@ -0,0 +1,99 @@
+from functools import partial
+from multiprocessing import get_context
+from time import perf_counter
+import argparse
+import json
+import os
+import sys
+from SolverBackends import BACKENDS, get_backend, warm_up
+from CubeValidator import validate
+
+# Description: This script solves many cube states at once by fanning them out over a pool of worker processes.
+#              ...Each worker sets up its solver backend once and then solves every state it is handed.
+
+
+_worker_solve = None
+
+
+def init_worker(backend, max_length=None):
+    """Pool initializer. Selects the backend for this worker and loads its tables.
+    Args: max_length= longest solution accepted (See SolverBackends.py). Defaults to the backend's own limit"""
+
+    global _worker_solve
+    solve = get_backend(backend)
+    warm_up(backend)    # Table loading happens before the first real state
+    _worker_solve = solve if max_length is None else partial(solve, max_length=max_length)
+
+
+def solve_one(item):
+    """Solves one (index, state) pair in a worker. Errors are returned with the item, not raised. States that
+    cannot be solved are rejected by the validator before reaching the solver.
+    Returns: dict"""
+
+    index, state = item
+    result = {'index': index, 'state': state, 'solution': None, 'error': None}
+    try:
+        validate(state).raise_if_invalid()
+        result['solution'] = _worker_solve(state)
+    except Exception as error:
+        result['error'] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def solve_many(states, workers=None, chunksize=8, backend='kociemba', ordered=True, max_length=None):
+    """Solves every state in 'states' (54 length kociemba strings) over a process pool.
+    Args: states= iterable of states
+          workers= number of worker processes. Defaults to the number of CPUs. 1 solves in this process
+          chunksize= number of states handed to a worker at a time
+          backend= name of the solver backend (See SolverBackends.py)
+          ordered= yield results in input order (True) or as they complete (False)
+          max_length= longest solution accepted. Defaults to the backend's own limit
+    Returns: generator of dicts with keys index, state, solution and error (None unless the state could not be solved)"""
+
+    workers = workers or os.cpu_count()
+    items = enumerate(state.strip() for state in states)
+
+    if workers == 1:
+        init_worker(backend, max_length)
+        yield from map(solve_one, items)
+        return
+
+    # Workers are spawned, not forked: callers run the pool next to other threads (Main's BotRunner, RigScheduler's
+    # rigs), and a forked child only gets a copy of the calling thread with whatever locks the others held
+    with get_context('spawn').Pool(workers, initializer=init_worker, initargs=(backend, max_length)) as pool:
+        results = pool.imap(solve_one, items, chunksize) if ordered else pool.imap_unordered(solve_one, items, chunksize)
+        yield from results
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Solve a file of cube states (one 54 length kociemba string per line) on all cores")
+    parser.add_argument('input', nargs='?', default='-', help="File of states. Defaults to stdin")
+    parser.add_argument('--output', default='-', help="File to write JSON line results to. Defaults to stdout")
+    parser.add_argument('--workers', type=int, default=None, help="Number of worker processes. Defaults to the CPU count")
+    parser.add_argument('--chunksize', type=int, default=8, help="States handed to a worker at a time")
+    parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend")
+    parser.add_argument('--unordered', action='store_true', help="Write results as they complete instead of in input order")
+    args = parser.parse_args()
+
+    in_file = sys.stdin if args.input == '-' else open(args.input)
+    out_file = sys.stdout if args.output == '-' else open(args.output, 'w')
+
+    start = perf_counter()
+    count = 0
+    errors = 0
+    try:
+        states = (line for line in in_file if line.strip())
+        for result in solve_many(states, args.workers, args.chunksize, args.solver, not args.unordered):
+            out_file.write(json.dumps(result) + "\n")
+            count += 1
+            errors += result['error'] is not None
+    finally:
+        # Close the files even on an error, so the results written so far are flushed
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+    elapsed = perf_counter() - start
+
+    print(f"Solved {count - errors}/{count} states in {elapsed:.2f} s ({count / elapsed:.1f} states/s)", file=sys.stderr)
@@ -0,0 +1,245 @@
+from time import perf_counter
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+from FastRubiksSolver import FastRubiksSolver
+from RubiksSolver import RubiksSolver
+from Scrambler import scrambles
+from SolverBackends import BACKENDS, get_backend
+from LatencyStats import percentile
+
+# Description: This script is the benchmark suite. Every run uses seeded scramble corpora, so two runs measure the same work.
+#              ...It times cube state updates, kociemba string encoding and decoding, solve latency (cold and warm) and the
+#              ...seconds a simulated bot takes per solve, and writes the results as JSON. Compare mode flags the metrics
+#              ...that got worse between two result files.
+
+
+def scramble_corpus(seed, count, length=None):
+    """Returns 'count' scrambled states (54 length kociemba strings), the same ones for the same seed.
+    Args: length= number of random moves per state. Defaults to uniformly random states (See Scrambler.py)
+    Returns: List"""
+
+    return list(scrambles(count, seed, length))
+
+
+def best_rate(count, fn, rounds=3):
+    """Calls 'fn' (which does 'count' operations) 'rounds' times and returns the best operations per second.
+    The best round is the one least disturbed by the rest of the machine.
+    Returns: float"""
+
+    best = 0.0
+    for _ in range(rounds):
+        start = perf_counter()
+        fn()
+        best = max(best, count / (perf_counter() - start))
+    return best
+
+
+def metric(value, unit, better):
+    """Returns one result entry. 'better' is the direction an improvement moves the value (higher or lower).
+    Returns: dict"""
+
+    return {'value': round(value, 6), 'unit': unit, 'better': better}
+
+
+""" Benchmarks """
+
+def bench_update_cube_state(seed, count=20000):
+    """Moves per second of update_cube_state, for both state backends.
+    Returns: dict of metrics"""
+
+    random.seed(seed)
+    faces = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+    moves = [(random.choice(faces), random.choice(['cw', 'ccw'])) for _ in range(count)]
+
+    def make_moves(solver):
+        for side, direction in moves:
+            solver.current_side_being_moved = side
+            solver.current_direction_of_rotation = direction
+            solver.update_cube_state()
+
+    metrics = {}
+    for name, solver in [('RubiksSolver', RubiksSolver(None)), ('FastRubiksSolver', FastRubiksSolver(None))]:
+        metrics[f'update_cube_state.{name}'] = metric(best_rate(count, lambda: make_moves(solver)), 'moves/s', 'higher')
+    return metrics
+
+
+def bench_encode_decode(corpus, solutions, repeat=20):
+    """Calls per second of encode_before_kociemba and decode_after_kociemba over the corpus and its solutions.
+    Returns: dict of metrics"""
+
+    solver = RubiksSolver(None)
+    fast = FastRubiksSolver(None)
+    states = []
+    for state in corpus:
+        fast.set_state_from_kociemba(state)
+        states.append(fast.cube_state)
+
+    def encode():
+        for _ in range(repeat):
+            for state in states:
+                solver.cube_state = state
+                solver.encode_before_kociemba()
+
+    def decode():
+        for _ in range(repeat):
+            for solution in solutions:
+                solver.decode_after_kociemba(solution, half_turns=True)
+
+    return {
+        'encode_before_kociemba': metric(best_rate(repeat * len(states), encode), 'calls/s', 'higher'),
+        'decode_after_kociemba': metric(best_rate(repeat * len(solutions), decode), 'calls/s', 'higher'),
+    }
+
+
+def cold_solve_seconds(backend, state, runs=3):
+    """Median seconds from a fresh interpreter importing the backend to its first solution (Includes any table loading).
+    Returns: float"""
+
+    code = ("from time import perf_counter; start = perf_counter(); "
+            "from SolverBackends import get_backend; "
+            f"get_backend({backend!r})({state!r}); print(perf_counter() - start)")
+    times = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        times.append(float(output.strip().splitlines()[-1]))
+    return sorted(times)[len(times) // 2]
+
+
+def bench_solve(backend, corpus, rounds=3):
+    """Cold start and warm latency percentiles (ms) of a solver backend over the corpus. Each state's warm latency
+    is its fastest of 'rounds' solves.
+    Returns: (dict of metrics, list of solutions)"""
+
+    solve = get_backend(backend)
+    metrics = {f'solve.{backend}.cold_ms': metric(1000 * cold_solve_seconds(backend, corpus[0]), 'ms', 'lower')}
+
+    solve(corpus[0])    # Warm up in this process
+    latencies = []
+    solutions = []
+    for state in corpus:
+        best = None
+        for _ in range(rounds):
+            start = perf_counter()
+            solution = solve(state)
+            elapsed = perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        solutions.append(solution)
+        latencies.append(best)
+    latencies.sort()
+    for q in [50, 95, 99]:
+        metrics[f'solve.{backend}.p{q}_ms'] = metric(1000 * percentile(latencies, q), 'ms', 'lower')
+    metrics[f'solve.{backend}.mean_moves'] = metric(sum(len(s.split()) for s in solutions) / len(solutions), 'moves', 'lower')
+    return metrics, solutions
+
+
+def bench_simulated_bot(solutions, overlap=False):
+    """Mean seconds the simulated bot takes to execute each solution (Optimized and regrip planned, as Main does).
+    Returns: dict of metrics"""
+
+    from MoveOptimizer import optimize
+    from RegripPlanner import RegripPlanner, execute_plan
+    from SimulatedBot import SimulatedRubiksBot
+
+    decoder = RubiksSolver(None)
+    total = 0.0
+    for solution in solutions:
+        bot = SimulatedRubiksBot(overlap=overlap)
+        moves = optimize(decoder.decode_after_kociemba(solution, half_turns=True))
+        execute_plan(bot, RegripPlanner(bot).plan(moves))
+        total += bot.elapsed()
+        bot.close()
+    name = 'simulated_bot.overlap' if overlap else 'simulated_bot'
+    return {f'{name}.seconds_per_solve': metric(total / len(solutions), 's', 'lower')}
+
+
+def run(seed=0, count=50, backends=('kociemba',), bot_count=10):
+    """Runs every benchmark.
+    Args: seed= seed of the scramble corpus and the random moves
+          count= number of scrambled states in the corpus
+          backends= solver backends to time
+          bot_count= number of solutions executed on the simulated bot
+    Returns: dict with keys meta and metrics"""
+
+    corpus = scramble_corpus(seed, count)
+    metrics = {}
+    metrics.update(bench_update_cube_state(seed))
+
+    solutions = None
+    for backend in backends:
+        backend_metrics, backend_solutions = bench_solve(backend, corpus)
+        metrics.update(backend_metrics)
+        solutions = solutions or backend_solutions
+
+    metrics.update(bench_encode_decode(corpus, solutions))
+    metrics.update(bench_simulated_bot(solutions[:bot_count]))
+    metrics.update(bench_simulated_bot(solutions[:bot_count], overlap=True))
+
+    meta = {'seed': seed, 'count': count, 'backends': list(backends), 'python': platform.python_version(),
+            'machine': platform.machine(), 'cpus': os.cpu_count()}
+    return {'meta': meta, 'metrics': metrics}
+
+
+def compare(old, new, threshold=0.25):
+    """Compares two results. A metric regresses when it moved the wrong way by more than 'threshold' (fraction), or
+    when the new run no longer reports it.
+    Returns: List of (name, old value, new value, relative change, regressed). New value and change are None for a
+             missing metric"""
+
+    rows = []
+    for name, entry in old['metrics'].items():
+        if name not in new['metrics']:
+            rows.append((name, entry['value'], None, None, True))
+    for name, entry in new['metrics'].items():
+        if name not in old['metrics']:
+            continue
+        before = old['metrics'][name]['value']
+        after = entry['value']
+        change = (after - before) / before if before else 0.0
+        worse = -change if entry['better'] == 'higher' else change
+        rows.append((name, before, after, change, worse > threshold))
+    return rows
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help="Run the benchmarks and write the results as JSON")
+    run_parser.add_argument('--output', default='-', help="File to write the results to. Defaults to stdout")
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--count', type=int, default=50, help="Scrambled states in the corpus")
+    run_parser.add_argument('--solvers', nargs='+', choices=list(BACKENDS), default=['kociemba'], help="Solver backends to time")
+    run_parser.add_argument('--bot-count', type=int, default=10, help="Solutions executed on the simulated bot")
+
+    compare_parser = subparsers.add_parser('compare', help="Flag regressions between two result files")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.25, help="Relative change counted as a regression")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run(args.seed, args.count, args.solvers, args.bot_count)
+        text = json.dumps(results, indent=2)
+        if args.output == '-':
+            print(text)
+        else:
+            with open(args.output, 'w') as file:
+                file.write(text + "\n")
+    else:
+        with open(args.old) as old_file, open(args.new) as new_file:
+            rows = compare(json.load(old_file), json.load(new_file), args.threshold)
+        for name, before, after, change, regressed in rows:
+            if after is None:
+                print(f"{name:<42} {before:>14.3f} {'missing':>14} {'':>8}  REGRESSION")
+            else:
+                print(f"{name:<42} {before:>14.3f} {after:>14.3f} {change:>+8.1%}  {'REGRESSION' if regressed else ''}")
+        regressions = sum(row[4] for row in rows)
+        print(f"{regressions} regression(s) over {len(rows)} metrics")
+        sys.exit(1 if regressions else 0)
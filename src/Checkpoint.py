@@ -0,0 +1,87 @@
+import json
+import os
+from MoveCompiler import COMPILER
+
+# Description: This script saves the progress of a solve while the bot executes it, so an interrupted solve (A jam, a power
+#              ...cut) can be resumed without entering the cube again or solving it again. After every step the cube
+#              ...state, the bot's orientation, servo_x's angle and the steps left are written to a JSON file, replaced
+#              ...atomically so a crash never leaves half a checkpoint behind.
+
+
+class Checkpoint:
+    """Progress of one solve, saved to a file after every executed step."""
+
+    def __init__(self, path) -> None:
+        """Constructor method for class.
+        Args: path= JSON file the checkpoint is kept in"""
+
+        self.path = path
+        self.steps = []
+        self.solver = None
+        self.bot = None
+
+
+    def begin(self, steps, solver, bot):
+        """Starts checkpointing the execution of 'steps' and saves the starting point.
+        Args: steps= the whole plan (See RegripPlanner.plan)
+              solver= solver whose virtual cube follows the execution
+              bot= bot executing the plan"""
+
+        self.steps = list(steps)
+        self.solver = solver
+        self.bot = bot
+        self.save(0)
+
+
+    def step_done(self, index, step=None):
+        """Saves the checkpoint after step 'index' of the plan has been executed (Used as execute_plan's on_step)."""
+
+        self.save(index + 1)
+
+
+    def save(self, done):
+        """Writes the checkpoint with the first 'done' steps executed."""
+
+        data = {
+            'cube_state': self.solver.encode_before_kociemba(),
+            'bot_state': list(self.bot.bot_state),
+            'curr_angle': self.bot.curr_angle,
+            'steps_done': done,
+            'remaining_steps': self.steps[done:],
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, 'w') as file:
+            json.dump(data, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+
+    def clear(self):
+        """Deletes the checkpoint once the solve has finished."""
+
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def load_checkpoint(path):
+    """Reads a checkpoint and checks that its remaining turns solve its cube state. Raises ValueError if they do not.
+    Returns: dict with keys cube_state, bot_state, curr_angle, steps_done, remaining_steps and remaining_moves"""
+
+    with open(path) as file:
+        data = json.load(file)
+    data['remaining_moves'] = [[side, direction] for _, side, direction in
+                               (step for step in data['remaining_steps'] if step[0] == 'turn')]
+    if not COMPILER.solves(data['cube_state'], data['remaining_moves']):
+        raise ValueError(f"Checkpoint {path} is inconsistent: its remaining moves do not solve its cube state")
+    return data
+
+
+def restore_bot(bot, data):
+    """Sets a freshly connected bot's orientation from a checkpoint. Connecting drives servo_x back to its start
+    angle with the hood up, which revolves the cube with it, so the saved orientation is revolved to match."""
+
+    bot.bot_state = list(data['bot_state'])
+    for _ in range(data['curr_angle'] // 90):
+        bot.update_bot_state(['ccw', 'x', 'bot'])
+    bot.curr_angle = 0
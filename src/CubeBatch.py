@@ -0,0 +1,138 @@
+from time import perf_counter
+import numpy as np
+from FastRubiksSolver import get_move_tables, facelets_from_kociemba
+from MoveCompiler import COMPILER, move_names
+
+# Description: This script manages the CubeBatch class, a vectorized simulator that holds many cube states at once
+#              ...as an (N, 54) uint8 array and applies moves to every row with a single numpy gather.
+
+
+# Order of the moves in MOVE_PERMS. Quarter turns first, so randomize can draw from the first 12 entries
+MOVE_NAMES = ["U", "U'", "R", "R'", "F", "F'", "D", "D'", "L", "L'", "B", "B'",
+              "U2", "R2", "F2", "D2", "L2", "B2"]
+MOVE_INDEX = {name: i for i, name in enumerate(MOVE_NAMES)}
+QUARTER_TURNS = 12
+
+LETTERS = np.frombuffer(b"URFDLB", dtype=np.uint8)
+
+
+def build_move_perms():
+    """Stacks the gather permutation of every move in MOVE_NAMES into an (18, 54) array.
+    Returns: numpy.ndarray"""
+
+    tables = get_move_tables()
+    return np.array([tables[name] for name in MOVE_NAMES], dtype=np.intp)
+
+
+MOVE_PERMS = build_move_perms()
+
+
+def compile_moves(moves):
+    """Composes a move sequence into a single 54 entry gather permutation (See MoveCompiler.compile for the accepted
+    forms, and the ValueError raised for unknown moves).
+    Returns: numpy.ndarray"""
+
+    return np.array(COMPILER.compile(moves).perm, dtype=np.intp)
+
+
+class CubeBatch:
+    """Holds N cube states as an (N, 54) uint8 array of color codes, in the same facelet order
+    and color coding as FastRubiksSolver. Every operation works on all rows at once."""
+
+    def __init__(self, facelets) -> None:
+        """Constructor method for class.
+        Args: facelets= (N, 54) array of color codes"""
+
+        self.facelets = np.ascontiguousarray(facelets, dtype=np.uint8)
+        if self.facelets.ndim != 2 or self.facelets.shape[1] != 54:
+            raise ValueError(f"Expected an (N, 54) array, got shape {self.facelets.shape}")
+
+
+    @classmethod
+    def solved(cls, count):
+        """Returns a batch of 'count' solved cubes.
+        Returns: CubeBatch"""
+
+        row = np.repeat(np.arange(6, dtype=np.uint8), 9)
+        return cls(np.tile(row, (count, 1)))
+
+
+    @classmethod
+    def from_kociemba(cls, state_strs):
+        """Returns a batch built from a list of 54 length kociemba strings.
+        Returns: CubeBatch"""
+
+        rows = [facelets_from_kociemba(state_str) for state_str in state_strs]
+        return cls(np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), 54))
+
+
+    def __len__(self):
+        return self.facelets.shape[0]
+
+
+    def apply_move(self, name):
+        """Applies a single move in kociemba notation (Ex. R, R', R2) to every cube."""
+
+        self.facelets = self.facelets.take(MOVE_PERMS[MOVE_INDEX[move_names([name])[0]]], axis=1)
+
+
+    def apply_sequence(self, moves):
+        """Applies a whole move sequence to every cube. The sequence is composed into one
+        permutation first, so this is a single gather regardless of its length."""
+
+        self.facelets = self.facelets.take(compile_moves(moves), axis=1)
+
+
+    def apply_row_moves(self, move_ids):
+        """Applies a different move to each cube.
+        Args: move_ids= length N array of indices into MOVE_NAMES"""
+
+        perms = MOVE_PERMS[np.asarray(move_ids)]
+        self.facelets = np.take_along_axis(self.facelets, perms, axis=1)
+
+
+    def randomize(self, count=10, rng=None):
+        """Makes count number of random quarter turns on every cube, chosen independently per cube.
+        Args: count= number of random rotations. Defaults to 10
+              rng= numpy Generator or seed. Defaults to a fresh unseeded generator"""
+
+        rng = np.random.default_rng(rng)
+        for move_ids in rng.integers(0, QUARTER_TURNS, size=(count, len(self))):
+            self.apply_row_moves(move_ids)
+
+
+    def is_solved(self):
+        """Checks which cubes have been solved.
+        Returns: numpy.ndarray of bool"""
+
+        sides = self.facelets.reshape(-1, 6, 9)
+        return (sides == sides[:, :, 4:5]).all(axis=(1, 2))
+
+
+    def encode_before_kociemba(self):
+        """Converts every cube to its 54 length kociemba string.
+        Returns: List"""
+
+        data = LETTERS[self.facelets].tobytes().decode()
+        return [data[i:i+54] for i in range(0, len(data), 54)]
+
+
+
+if __name__ =='__main__':
+    # Measure facelet-moves per second of a single move and of a compiled sequence on a large batch
+    batch = CubeBatch.solved(1_000_000)
+    batch.randomize(count=2, rng=0)
+
+    start = perf_counter()
+    for name in MOVE_NAMES:
+        batch.apply_move(name)
+    elapsed = perf_counter() - start
+    rate = len(batch) * 54 * len(MOVE_NAMES) / elapsed
+    print(f"apply_move     : {rate:>16,.0f} facelet-moves/s")
+
+    sequence = "R U R' U' " * 10
+    start = perf_counter()
+    batch.apply_sequence(sequence)
+    elapsed = perf_counter() - start
+    rate = len(batch) * 54 * len(sequence.split()) / elapsed
+    print(f"apply_sequence : {rate:>16,.0f} facelet-moves/s")
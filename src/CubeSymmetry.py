@@ -0,0 +1,154 @@
+from itertools import permutations, product
+from operator import itemgetter
+
+# Description: This script holds the 48 symmetries of the cube (24 whole cube rotations, each with and without a mirror)
+#              ...acting on 54 length kociemba strings and on solution strings. A symmetry moves every facelet and
+#              ...relabels the colors so the centers stay in place, which turns any state into an equally hard state
+#              ...whose solutions map one to one onto the original's.
+
+
+FACES = "URFDLB"
+
+# Outward normal of each side, in FACES order (x= towards RIGHT, y= towards TOP, z= towards FACE)
+FACE_NORMALS = [(0, 1, 0), (1, 0, 0), (0, 0, 1), (0, -1, 0), (-1, 0, 0), (0, 0, -1)]
+
+
+def facelet_geometry():
+    """Returns the (position, normal) of each of the 54 facelets in kociemba order. Each side is
+    read row by row the way kociemba (and encode_before_kociemba) lays it out.
+    Returns: List"""
+
+    geometry = []
+    for face in FACES:
+        for r in range(3):
+            for c in range(3):
+                if face == 'U':
+                    position = (c - 1, 1, r - 1)
+                elif face == 'R':
+                    position = (1, 1 - r, 1 - c)
+                elif face == 'F':
+                    position = (c - 1, 1 - r, 1)
+                elif face == 'D':
+                    position = (c - 1, -1, 1 - r)
+                elif face == 'L':
+                    position = (-1, 1 - r, c - 1)
+                else:
+                    position = (1 - c, 1 - r, -1)
+                geometry.append((position, FACE_NORMALS[FACES.index(face)]))
+    return geometry
+
+
+FACELET_GEOMETRY = facelet_geometry()
+FACELET_INDEX = {facelet: i for i, facelet in enumerate(FACELET_GEOMETRY)}
+
+
+def apply_matrix(matrix, vector):
+    """Multiplies a 3x3 matrix (tuple of rows) by a vector.
+    Returns: tuple"""
+
+    return tuple(sum(row[k] * vector[k] for k in range(3)) for row in matrix)
+
+
+def determinant(matrix):
+    """Determinant of a 3x3 matrix.
+    Returns: int"""
+
+    (a, b, c), (d, e, f), (g, h, i) = matrix
+    return a*(e*i - f*h) - b*(d*i - f*g) + c*(d*h - e*g)
+
+
+class Symmetry:
+    """One of the 48 cube symmetries, given by a signed permutation matrix. Holds the facelet gather and the
+    side relabeling it induces, and whether it is a mirror (which reverses the direction of every turn)."""
+
+    def __init__(self, matrix) -> None:
+        """Constructor method for class.
+        Args: matrix= 3x3 signed permutation matrix (tuple of rows)"""
+
+        self.matrix = matrix
+        self.mirrored = determinant(matrix) < 0
+
+        # Side relabeling: side f is carried onto side face_map[f]
+        self.face_map = [FACE_NORMALS.index(apply_matrix(matrix, normal)) for normal in FACE_NORMALS]
+        self.letter_map = {FACES[f]: FACES[self.face_map[f]] for f in range(6)}
+        self.color_table = str.maketrans(self.letter_map)
+
+        # Facelet gather: new_state[i] = relabeled old_state[gather[i]]
+        gather = [0] * 54
+        for i, (position, normal) in enumerate(FACELET_GEOMETRY):
+            gather[FACELET_INDEX[(apply_matrix(matrix, position), apply_matrix(matrix, normal))]] = i
+        self.gather = tuple(gather)
+        self.getter = itemgetter(*gather)
+
+
+    def transform_state(self, state_str):
+        """Returns the 54 length kociemba string of the state carried by this symmetry.
+        Returns: str"""
+
+        return "".join(self.getter(state_str)).translate(self.color_table)
+
+
+    def transform_move(self, move):
+        """Returns the move (kociemba notation) that plays the role of 'move' in the transformed state.
+        Returns: str"""
+
+        suffix = move[1:]
+        if self.mirrored and suffix != "2":
+            suffix = "" if suffix == "'" else "'"
+        return self.letter_map[move[0]] + suffix
+
+
+    def transform_solution(self, solution):
+        """Transforms every move of a kociemba solution string.
+        Returns: str"""
+
+        return " ".join(self.transform_move(move) for move in solution.split())
+
+
+def build_symmetries():
+    """Builds all 48 symmetries. Index 0 is the identity and indices 0-23 are the rotations (no mirror).
+    Returns: List"""
+
+    matrices = []
+    for axes in permutations(range(3)):
+        for signs in product([1, -1], repeat=3):
+            matrix = tuple(tuple(signs[r] if axes[r] == k else 0 for k in range(3)) for r in range(3))
+            matrices.append(matrix)
+    symmetries = [Symmetry(matrix) for matrix in matrices]
+    symmetries.sort(key=lambda sym: (sym.mirrored, sym.matrix != ((1, 0, 0), (0, 1, 0), (0, 0, 1))))
+    return symmetries
+
+
+SYMMETRIES = build_symmetries()
+ROTATIONS = SYMMETRIES[:24]
+
+
+def build_inverses():
+    """Index of the inverse of each symmetry.
+    Returns: List"""
+
+    inverses = []
+    for sym in SYMMETRIES:
+        for j, other in enumerate(SYMMETRIES):
+            if all(sym.gather[other.gather[i]] == i for i in range(54)):
+                inverses.append(j)
+                break
+    return inverses
+
+
+INVERSES = build_inverses()
+
+
+def canonical_form(state_str):
+    """Returns the smallest string among the 48 symmetric versions of the state, and the index
+    of a symmetry that produces it.
+    Returns: tuple (str, int)"""
+
+    best = state_str
+    best_index = 0
+    for index in range(1, 48):
+        candidate = SYMMETRIES[index].transform_state(state_str)
+        if candidate < best:
+            best = candidate
+            best_index = index
+    return best, best_index
@@ -0,0 +1,177 @@
+from CubieCube import CubieCube, CORNERS, EDGES, CORNER_FACELET, EDGE_FACELET, CORNER_COLOR, EDGE_COLOR, perm_parity
+from FastRubiksSolver import SIDES, COLORS, COLOR_TO_CODE
+
+# Description: This script checks that a cube state can be solved before it is handed to a solver. The state is converted to
+#              ...corner and edge permutations and orientations with table lookups, and every problem found (bad colors,
+#              ...wrong centers, pieces that do not exist or appear twice, twist, flip and parity errors) is reported along
+#              ...with the squares or pieces involved.
+
+
+# Every way a corner or edge cubie can sit in a position: colors read in position facelet order -> (cubie, orientation)
+CORNER_LOOKUP = {tuple(CORNER_COLOR[j][(m - ori) % 3] for m in range(3)): (j, ori) for j in range(8) for ori in range(3)}
+EDGE_LOOKUP = {tuple(EDGE_COLOR[j][(m - ori) % 2] for m in range(2)): (j, ori) for j in range(12) for ori in range(2)}
+
+
+def square_name(index):
+    """Returns the RubiksSolver name of a facelet index in kociemba order. Ex: 22 -> FACE[4]
+    Returns: str"""
+
+    return f"{SIDES[index // 9]}[{index % 9}]"
+
+
+def piece_colors(facelets, indices):
+    """Returns the color names of the facelets of a piece. Ex: Green/White/Red
+    Returns: str"""
+
+    return "/".join(COLORS[facelets[i]] for i in indices)
+
+
+class ValidationReport:
+    """Result of validating a state. Each problem is a dict with keys check (which check failed), message and
+    where (the squares or pieces involved)."""
+
+    def __init__(self) -> None:
+        """Constructor method for class."""
+
+        self.problems = []
+        self.cube = None    # CubieCube of the state, when every piece could be identified
+
+
+    @property
+    def valid(self):
+        """True if no problem was found."""
+
+        return not self.problems
+
+
+    def add(self, check, message, where):
+        """Records a problem."""
+
+        self.problems.append({'check': check, 'message': message, 'where': where})
+
+
+    def __str__(self):
+        if self.valid:
+            return "Valid cube state"
+        return "\n".join(f"{problem['check']}: {problem['message']} ({', '.join(problem['where'])})" for problem in self.problems)
+
+
+    def raise_if_invalid(self):
+        """Raises ValueError listing every problem if the state is invalid."""
+
+        if not self.valid:
+            raise ValueError(f"Invalid cube state:\n{self}")
+
+
+def facelets_from_state(state):
+    """Converts a cube state to a flat list of 54 color codes (kociemba order), or returns None if the state is not
+    6 sides of 9 squares.
+    Args: state= cube_state dict (side -> 9 color names), 54 length kociemba string or flat list of color codes
+    Returns: List"""
+
+    if isinstance(state, dict):
+        facelets = []
+        for side in SIDES:
+            squares = state.get(side)
+            if squares is None or len(squares) != 9:
+                return None
+            facelets += [COLOR_TO_CODE.get(color, -1) for color in squares]
+        return facelets
+    if isinstance(state, str):
+        return ["URFDLB".find(letter) for letter in state] if len(state) == 54 else None
+    return list(state) if len(state) == 54 else None
+
+
+def validate(state):
+    """Checks that a cube state is solvable.
+    Args: state= cube_state dict (side -> 9 color names), 54 length kociemba string or flat list of color codes
+    Returns: ValidationReport"""
+
+    report = ValidationReport()
+    facelets = facelets_from_state(state)
+
+    # 1. Shape and colors
+    if facelets is None:
+        report.add('shape', "A state needs 6 sides (FACE, BACK, LEFT, RIGHT, TOP, BOTTOM) of 9 squares each", list(SIDES))
+        return report
+    unknown = [square_name(i) for i, code in enumerate(facelets) if not 0 <= code < 6]
+    if unknown:
+        report.add('colors', "Unknown colors", unknown)
+        return report
+
+    # 2. Centers (Each side's center fixes its color, so a wrong center means the cube was read in the wrong orientation)
+    wrong_centers = [square_name(side * 9 + 4) for side in range(6) if facelets[side * 9 + 4] != side]
+    if wrong_centers:
+        report.add('centers', "Centers do not match their sides. Read the cube with green facing you and white on top",
+                   wrong_centers)
+
+    # 3. Color counts
+    counts = [facelets.count(code) for code in range(6)]
+    bad_counts = [f"{COLORS[code]} x{count}" for code, count in enumerate(counts) if count != 9]
+    if bad_counts:
+        report.add('color_counts', "Every color must appear exactly 9 times", bad_counts)
+
+    # 4. Pieces
+    cp, co, ep, eo = [], [], [], []
+    for i in range(8):
+        colors = tuple(facelets[f] for f in CORNER_FACELET[i])
+        piece = CORNER_LOOKUP.get(colors)
+        if piece is None:
+            report.add('pieces', f"Corner {CORNERS[i]} is {piece_colors(facelets, CORNER_FACELET[i])}, which is not a corner piece",
+                       [square_name(f) for f in CORNER_FACELET[i]])
+        else:
+            cp.append(piece[0])
+            co.append(piece[1])
+    for i in range(12):
+        colors = tuple(facelets[f] for f in EDGE_FACELET[i])
+        piece = EDGE_LOOKUP.get(colors)
+        if piece is None:
+            report.add('pieces', f"Edge {EDGES[i]} is {piece_colors(facelets, EDGE_FACELET[i])}, which is not an edge piece",
+                       [square_name(f) for f in EDGE_FACELET[i]])
+        else:
+            ep.append(piece[0])
+            eo.append(piece[1])
+    if len(cp) < 8 or len(ep) < 12:
+        return report
+
+    for names, perm in [(CORNERS, cp), (EDGES, ep)]:
+        if len(set(perm)) != len(perm):
+            seen = {}
+            for position, piece in enumerate(perm):
+                seen.setdefault(piece, []).append(names[position])
+            twice = [f"{names[piece]} at {' and '.join(positions)}" for piece, positions in seen.items() if len(positions) > 1]
+            missing = [names[piece] for piece in range(len(names)) if piece not in seen]
+            report.add('pieces', f"Pieces appear twice, missing: {', '.join(missing)}", twice)
+    if not report.valid:
+        return report
+
+    # 5. Orientation and parity (Each is broken by a physically impossible move: one twisted corner, one flipped edge, two swapped pieces)
+    if sum(co) % 3:
+        report.add('twist', f"Corner twists add up to {sum(co) % 3} (mod 3), one corner is twisted in place",
+                   [CORNERS[i] for i in range(8) if co[i]])
+    if sum(eo) % 2:
+        report.add('flip', "Edge flips add up to 1 (mod 2), one edge is flipped in place",
+                   [EDGES[i] for i in range(12) if eo[i]])
+    if perm_parity(cp) != perm_parity(ep):
+        report.add('parity', "Corner and edge permutation parities differ, two pieces are swapped",
+                   [CORNERS[i] for i in range(8) if cp[i] != i] + [EDGES[i] for i in range(12) if ep[i] != i])
+
+    report.cube = CubieCube(cp, co, ep, eo)
+    return report
+
+
+
+if __name__ =='__main__':
+    from time import perf_counter
+
+    # A solved state with two edges swapped (UF <-> UR): every piece exists, but the parities differ
+    state = list("UUUUUUUUURRRRRRRRRFFFFFFFFFDDDDDDDDDLLLLLLLLLBBBBBBBBB")
+    state[7], state[19], state[5], state[10] = state[5], state[10], state[7], state[19]
+    state = "".join(state)
+    print(validate(state))
+
+    count = 10000
+    start = perf_counter()
+    for _ in range(count):
+        validate(state)
+    print(f"{1e6 * (perf_counter() - start) / count:.1f} us per validation")
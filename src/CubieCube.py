@@ -0,0 +1,312 @@
+from math import factorial
+
+# Description: This script manages the CubieCube class, which represents the cube on the cubie level: the permutation and
+#              ...orientation of the 8 corners and 12 edges. Also holds the coordinates used by the two-phase solver.
+
+
+# Corner and edge names, in position order
+CORNERS = ['URF', 'UFL', 'ULB', 'UBR', 'DFR', 'DLF', 'DBL', 'DRB']
+EDGES = ['UR', 'UF', 'UL', 'UB', 'DR', 'DF', 'DL', 'DB', 'FR', 'FL', 'BL', 'BR']
+
+# Facelet indices (kociemba order: U1..U9=0..8, R=9..17, F=18..26, D=27..35, L=36..44, B=45..53) of each corner and edge
+# position. The first facelet of a corner is its U/D facelet, the others follow clockwise
+CORNER_FACELET = [[8, 9, 20], [6, 18, 38], [0, 36, 47], [2, 45, 11], [29, 26, 15], [27, 44, 24], [33, 53, 42], [35, 17, 51]]
+EDGE_FACELET = [[5, 10], [7, 19], [3, 37], [1, 46], [32, 16], [28, 25], [30, 43], [34, 52],
+                [23, 12], [21, 41], [50, 39], [48, 14]]
+
+# Colors (side index in "URFDLB") of each corner and edge cubie, in the same facelet order as above
+CORNER_COLOR = [[0, 1, 2], [0, 2, 4], [0, 4, 5], [0, 5, 1], [3, 2, 1], [3, 4, 2], [3, 5, 4], [3, 1, 5]]
+EDGE_COLOR = [[0, 1], [0, 2], [0, 4], [0, 5], [3, 1], [3, 2], [3, 4], [3, 5], [2, 1], [2, 4], [5, 4], [5, 1]]
+
+# Basic face turns (clockwise quarter turns) on the cubie level: [cp, co, ep, eo]
+BASIC_MOVES = {
+    'U': [[3, 0, 1, 2, 4, 5, 6, 7], [0, 0, 0, 0, 0, 0, 0, 0],
+          [3, 0, 1, 2, 4, 5, 6, 7, 8, 9, 10, 11], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
+    'R': [[4, 1, 2, 0, 7, 5, 6, 3], [2, 0, 0, 1, 1, 0, 0, 2],
+          [8, 1, 2, 3, 11, 5, 6, 7, 4, 9, 10, 0], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
+    'F': [[1, 5, 2, 3, 0, 4, 6, 7], [1, 2, 0, 0, 2, 1, 0, 0],
+          [0, 9, 2, 3, 4, 8, 6, 7, 1, 5, 10, 11], [0, 1, 0, 0, 0, 1, 0, 0, 1, 1, 0, 0]],
+    'D': [[0, 1, 2, 3, 5, 6, 7, 4], [0, 0, 0, 0, 0, 0, 0, 0],
+          [0, 1, 2, 3, 5, 6, 7, 4, 8, 9, 10, 11], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
+    'L': [[0, 2, 6, 3, 4, 1, 5, 7], [0, 1, 2, 0, 0, 2, 1, 0],
+          [0, 1, 10, 3, 4, 5, 9, 7, 8, 2, 6, 11], [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]],
+    'B': [[0, 1, 3, 7, 4, 5, 2, 6], [0, 0, 1, 2, 0, 0, 2, 1],
+          [0, 1, 2, 11, 4, 5, 6, 10, 8, 9, 3, 7], [0, 0, 0, 1, 0, 0, 0, 1, 0, 0, 1, 1]],
+}
+
+# The 18 face moves, indexed face*3 + power (power 0= quarter turn, 1= half turn, 2= counter quarter turn)
+FACES = "URFDLB"
+MOVE_NAMES = [face + suffix for face in FACES for suffix in ["", "2", "'"]]
+MOVE_INDEX = {name: i for i, name in enumerate(MOVE_NAMES)}
+
+# Slice coordinate: 12 bit mask of the positions holding the 4 UD-slice edges (FR, FL, BL, BR) -> 0..494
+SLICE_MASKS = [mask for mask in range(4096) if bin(mask).count("1") == 4]
+MASK_TO_SLICE = {mask: i for i, mask in enumerate(SLICE_MASKS)}
+SOLVED_SLICE = MASK_TO_SLICE[0xF00]
+
+
+def perm_rank(perm):
+    """Returns the lexicographic rank of a permutation of 0..n-1.
+    Returns: int"""
+
+    n = len(perm)
+    rank = 0
+    for i in range(n - 1):
+        smaller = 0
+        for j in range(i + 1, n):
+            if perm[j] < perm[i]:
+                smaller += 1
+        rank += smaller * factorial(n - 1 - i)
+    return rank
+
+
+def perm_unrank(rank, n):
+    """Returns the permutation of 0..n-1 with the given lexicographic rank.
+    Returns: List"""
+
+    elements = list(range(n))
+    perm = []
+    for i in range(n - 1, -1, -1):
+        index, rank = divmod(rank, factorial(i))
+        perm.append(elements.pop(index))
+    return perm
+
+
+def perm_parity(perm):
+    """Returns the parity (0= even, 1= odd) of a permutation.
+    Returns: int"""
+
+    parity = 0
+    for i in range(len(perm)):
+        for j in range(i + 1, len(perm)):
+            if perm[j] < perm[i]:
+                parity ^= 1
+    return parity
+
+
+class CubieCube:
+    """Cube on the cubie level. cp[i] is the corner cubie at position i and co[i] its twist (0-2), ep[i] is the
+    edge cubie at position i and eo[i] its flip (0-1). Multiplying by a move cube applies that move."""
+
+    def __init__(self, cp=None, co=None, ep=None, eo=None) -> None:
+        """Constructor method for class. Defaults to the solved cube."""
+
+        self.cp = list(cp) if cp is not None else list(range(8))
+        self.co = list(co) if co is not None else [0] * 8
+        self.ep = list(ep) if ep is not None else list(range(12))
+        self.eo = list(eo) if eo is not None else [0] * 12
+
+
+    def __eq__(self, other):
+        return (isinstance(other, CubieCube) and self.cp == other.cp and self.co == other.co
+                and self.ep == other.ep and self.eo == other.eo)
+
+
+    def __repr__(self):
+        return f"CubieCube(cp={self.cp}, co={self.co}, ep={self.ep}, eo={self.eo})"
+
+
+    def copy(self):
+        """Returns an independent copy of the cube.
+        Returns: CubieCube"""
+
+        return CubieCube(self.cp, self.co, self.ep, self.eo)
+
+
+    @classmethod
+    def from_facelets(cls, facelets):
+        """Builds a cubie cube from a flat state of 54 color codes (side indices in "URFDLB"),
+        Ex. FastRubiksSolver.facelets. Raises ValueError if a piece does not exist.
+        Returns: CubieCube"""
+
+        cube = cls()
+        for i in range(8):
+            # Find the U/D colored facelet of the corner at position i, its index is the twist
+            for ori in range(3):
+                if facelets[CORNER_FACELET[i][ori]] in (0, 3):
+                    break
+            else:
+                raise ValueError(f"Corner {CORNERS[i]} has no U or D colored facelet")
+            col1 = facelets[CORNER_FACELET[i][(ori + 1) % 3]]
+            col2 = facelets[CORNER_FACELET[i][(ori + 2) % 3]]
+            for j in range(8):
+                if col1 == CORNER_COLOR[j][1] and col2 == CORNER_COLOR[j][2] and facelets[CORNER_FACELET[i][ori]] == CORNER_COLOR[j][0]:
+                    cube.cp[i] = j
+                    cube.co[i] = ori
+                    break
+            else:
+                raise ValueError(f"Corner {CORNERS[i]} has colors that do not match any corner cubie")
+
+        for i in range(12):
+            colors = (facelets[EDGE_FACELET[i][0]], facelets[EDGE_FACELET[i][1]])
+            for j in range(12):
+                if colors == (EDGE_COLOR[j][0], EDGE_COLOR[j][1]):
+                    cube.ep[i] = j
+                    cube.eo[i] = 0
+                    break
+                if colors == (EDGE_COLOR[j][1], EDGE_COLOR[j][0]):
+                    cube.ep[i] = j
+                    cube.eo[i] = 1
+                    break
+            else:
+                raise ValueError(f"Edge {EDGES[i]} has colors that do not match any edge cubie")
+
+        return cube
+
+
+    @classmethod
+    def from_kociemba(cls, state_str):
+        """Builds a cubie cube from a 54 length kociemba string.
+        Returns: CubieCube"""
+
+        if len(state_str) != 54 or any(letter not in FACES for letter in state_str):
+            raise ValueError(f"Invalid kociemba state string: {state_str}")
+        return cls.from_facelets([FACES.index(letter) for letter in state_str])
+
+
+    def to_facelets(self):
+        """Returns the flat state of 54 color codes for this cube.
+        Returns: bytearray"""
+
+        facelets = bytearray(54)
+        for side in range(6):
+            facelets[side*9 + 4] = side     # Centers
+        for i in range(8):
+            for k in range(3):
+                facelets[CORNER_FACELET[i][(k + self.co[i]) % 3]] = CORNER_COLOR[self.cp[i]][k]
+        for i in range(12):
+            for k in range(2):
+                facelets[EDGE_FACELET[i][(k + self.eo[i]) % 2]] = EDGE_COLOR[self.ep[i]][k]
+        return facelets
+
+
+    def to_kociemba(self):
+        """Returns the 54 length kociemba string for this cube.
+        Returns: str"""
+
+        return "".join(FACES[code] for code in self.to_facelets())
+
+
+    def multiply(self, other):
+        """Applies 'other' after this cube (self = self * other), in place."""
+
+        cp = [self.cp[other.cp[i]] for i in range(8)]
+        co = [(self.co[other.cp[i]] + other.co[i]) % 3 for i in range(8)]
+        ep = [self.ep[other.ep[i]] for i in range(12)]
+        eo = [(self.eo[other.ep[i]] + other.eo[i]) % 2 for i in range(12)]
+        self.cp, self.co, self.ep, self.eo = cp, co, ep, eo
+
+
+    def apply_move(self, name):
+        """Applies a single move in kociemba notation (Ex. R, R', R2)."""
+
+        self.multiply(MOVE_CUBES[MOVE_INDEX[name]])
+
+
+    def apply_moves(self, moves):
+        """Applies a kociemba solution string or a list of move names."""
+
+        for name in (moves.split() if isinstance(moves, str) else moves):
+            self.apply_move(name)
+
+
+    def corner_parity(self):
+        """Returns the parity (0= even, 1= odd) of the corner permutation.
+        Returns: int"""
+
+        return perm_parity(self.cp)
+
+
+    def edge_parity(self):
+        """Returns the parity (0= even, 1= odd) of the edge permutation.
+        Returns: int"""
+
+        return perm_parity(self.ep)
+
+
+    def verify(self):
+        """Checks that the cube is a legal, solvable state. Raises ValueError describing the first problem found."""
+
+        if sorted(self.cp) != list(range(8)):
+            raise ValueError("Some corners are missing or appear twice")
+        if sorted(self.ep) != list(range(12)):
+            raise ValueError("Some edges are missing or appear twice")
+        if sum(self.co) % 3 != 0:
+            raise ValueError("A corner is twisted")
+        if sum(self.eo) % 2 != 0:
+            raise ValueError("An edge is flipped")
+        if self.corner_parity() != self.edge_parity():
+            raise ValueError("Corner and edge permutation parities do not match (two pieces are swapped)")
+
+
+    """ Phase 1 coordinates """
+
+    def get_twist(self):
+        """Corner orientation coordinate, 0..2186.
+        Returns: int"""
+
+        twist = 0
+        for i in range(7):
+            twist = twist*3 + self.co[i]
+        return twist
+
+
+    def get_flip(self):
+        """Edge orientation coordinate, 0..2047.
+        Returns: int"""
+
+        flip = 0
+        for i in range(11):
+            flip = flip*2 + self.eo[i]
+        return flip
+
+
+    def get_slice(self):
+        """Positions of the four UD-slice edges (ignoring their order), 0..494.
+        Returns: int"""
+
+        mask = 0
+        for i in range(12):
+            if self.ep[i] >= 8:
+                mask |= 1 << i
+        return MASK_TO_SLICE[mask]
+
+
+    """ Phase 2 coordinates (Only meaningful once the cube is in the phase 2 subgroup) """
+
+    def get_corners(self):
+        """Corner permutation coordinate, 0..40319.
+        Returns: int"""
+
+        return perm_rank(self.cp)
+
+
+    def get_ud_edges(self):
+        """Permutation of the 8 U and D layer edges, 0..40319.
+        Returns: int"""
+
+        return perm_rank(self.ep[:8])
+
+
+    def get_slice_perm(self):
+        """Permutation of the 4 UD-slice edges within the slice, 0..23.
+        Returns: int"""
+
+        return perm_rank([e - 8 for e in self.ep[8:]])
+
+
+def build_move_cubes():
+    """Builds the cubie cube of each of the 18 moves, in MOVE_NAMES order.
+    Returns: List"""
+
+    cubes = []
+    for face in FACES:
+        basic = CubieCube(*BASIC_MOVES[face])
+        power = CubieCube()
+        for _ in range(3):
+            power.multiply(basic)
+            cubes.append(power.copy())
+    return cubes
+
+
+MOVE_CUBES = build_move_cubes()
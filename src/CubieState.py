@@ -0,0 +1,325 @@
+from array import array
+from itertools import permutations
+from math import gcd
+from time import perf_counter
+import numpy as np
+from CubieCube import CubieCube, MOVE_CUBES, MOVE_INDEX, perm_rank, perm_unrank
+from FastRubiksSolver import SIDES, COLORS, COLOR_TO_CODE, VIEW_ORDER, side_offset
+from TwoPhaseSolver import build_twist_move, build_flip_move, rank_perms
+
+# Description: This script manages the CubieState class, a compact cube state built from six cubie coordinates: corner twist,
+#              ...edge flip, corner permutation, and the positions of each of three groups of 4 edges. A move is one table
+#              ...lookup per coordinate, and a state packs into a single integer, which makes states cheap to hash and compare.
+#              ...States convert losslessly to and from cube_state dicts and kociemba strings, and support the cube group
+#              ...operations (compose, inverse, conjugate, order).
+
+
+N_TWIST = 2187
+N_FLIP = 2048
+N_CORNERS = 40320
+N_EDGE4 = 11880     # Ordered positions of 4 edges among 12 (12*11*10*9)
+N_MOVES = 18
+
+# Edge groups: edge cubies 0-3 (U layer), 4-7 (D layer) and 8-11 (UD slice). Each group's coordinate is the rank of
+# the positions its 4 edges sit at, in cubie order
+EDGE_GROUPS = [range(0, 4), range(4, 8), range(8, 12)]
+EDGE4_POSITIONS = list(permutations(range(12), 4))
+EDGE4_RANK = {positions: rank for rank, positions in enumerate(EDGE4_POSITIONS)}
+
+
+def build_corners_move():
+    """Move table of the corner permutation coordinate, for all 18 moves.
+    Returns: numpy.ndarray (N_CORNERS, 18)"""
+
+    perms = np.array(list(permutations(range(8))), dtype=np.int64)
+    table = np.zeros((N_CORNERS, N_MOVES), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBES):
+        table[:, m] = rank_perms(perms[:, move.cp])
+    return table
+
+
+def build_edge4_move():
+    """Move table of an edge group coordinate (The same for every group), for all 18 moves.
+    Returns: numpy.ndarray (N_EDGE4, 18)"""
+
+    positions = np.array(EDGE4_POSITIONS, dtype=np.int64)
+    encoded_rank = np.zeros(12 ** 4, dtype=np.uint16)
+    encoded_rank[positions @ (12 ** np.arange(3, -1, -1))] = np.arange(N_EDGE4)
+
+    table = np.zeros((N_EDGE4, N_MOVES), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBES):
+        destination = np.argsort(move.ep)   # The edge at position q moves to position destination[q]
+        table[:, m] = encoded_rank[destination[positions] @ (12 ** np.arange(3, -1, -1))]
+    return table
+
+
+_tables = None
+
+
+def get_tables():
+    """Returns the flat move tables (twist, flip, corners, edge4), indexed coordinate*18 + move. Built on first use.
+    Returns: tuple of array.array"""
+
+    global _tables
+    if _tables is None:
+        _tables = tuple(array('H', table.astype(np.uint16).tobytes())
+                        for table in [build_twist_move(), build_flip_move(), build_corners_move(), build_edge4_move()])
+    return _tables
+
+
+class CubieState:
+    """Immutable cube state of six cubie coordinates. apply_move returns a new state after six table lookups.
+
+    *States compare and hash by their packed key, so they can be used as dict keys and set members."""
+
+    __slots__ = ['twist', 'flip', 'corners', 'edges_u', 'edges_d', 'edges_slice']
+
+    def __init__(self, twist=0, flip=0, corners=0, edges_u=None, edges_d=None, edges_slice=None) -> None:
+        """Constructor method for class. Defaults to the solved cube."""
+
+        self.twist = twist
+        self.flip = flip
+        self.corners = corners
+        self.edges_u = SOLVED_EDGES[0] if edges_u is None else edges_u
+        self.edges_d = SOLVED_EDGES[1] if edges_d is None else edges_d
+        self.edges_slice = SOLVED_EDGES[2] if edges_slice is None else edges_slice
+
+
+    @property
+    def key(self):
+        """The state packed into one integer.
+        Returns: int"""
+
+        return (((((self.edges_slice * N_EDGE4 + self.edges_d) * N_EDGE4 + self.edges_u) * N_CORNERS + self.corners)
+                 * N_FLIP + self.flip) * N_TWIST + self.twist)
+
+
+    @classmethod
+    def from_key(cls, key):
+        """Unpacks a state from its key.
+        Returns: CubieState"""
+
+        key, twist = divmod(key, N_TWIST)
+        key, flip = divmod(key, N_FLIP)
+        key, corners = divmod(key, N_CORNERS)
+        edges_slice, key = divmod(key, N_EDGE4 * N_EDGE4)
+        edges_d, edges_u = divmod(key, N_EDGE4)
+        return cls(twist, flip, corners, edges_u, edges_d, edges_slice)
+
+
+    def __eq__(self, other):
+        return isinstance(other, CubieState) and self.key == other.key
+
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+    def __repr__(self):
+        return f"CubieState.from_kociemba({self.to_kociemba()!r})"
+
+
+    """ Conversions """
+
+    @classmethod
+    def from_cubie(cls, cube):
+        """Builds the state of a CubieCube.
+        Returns: CubieState"""
+
+        position = [0] * 12
+        for i, edge in enumerate(cube.ep):
+            position[edge] = i
+        edges = [EDGE4_RANK[tuple(position[edge] for edge in group)] for group in EDGE_GROUPS]
+        return cls(cube.get_twist(), cube.get_flip(), perm_rank(cube.cp), *edges)
+
+
+    def to_cubie(self):
+        """Returns the CubieCube of this state.
+        Returns: CubieCube"""
+
+        co = [0] * 8
+        twist = self.twist
+        for i in range(6, -1, -1):
+            twist, co[i] = divmod(twist, 3)
+        co[7] = -sum(co[:7]) % 3
+
+        eo = [0] * 12
+        flip = self.flip
+        for i in range(10, -1, -1):
+            flip, eo[i] = divmod(flip, 2)
+        eo[11] = sum(eo[:11]) % 2
+
+        ep = [0] * 12
+        for group, rank in zip(EDGE_GROUPS, [self.edges_u, self.edges_d, self.edges_slice]):
+            for edge, position in zip(group, EDGE4_POSITIONS[rank]):
+                ep[position] = edge
+        return CubieCube(perm_unrank(self.corners, 8), co, ep, eo)
+
+
+    @classmethod
+    def from_kociemba(cls, state_str):
+        """Builds the state of a 54 length kociemba string (Ex. output of encode_before_kociemba).
+        Raises ValueError if a piece does not exist.
+        Returns: CubieState"""
+
+        return cls.from_cubie(CubieCube.from_kociemba(state_str))
+
+
+    def to_kociemba(self):
+        """Returns the 54 length kociemba string of this state.
+        Returns: str"""
+
+        return self.to_cubie().to_kociemba()
+
+
+    @classmethod
+    def from_cube_state(cls, cube_state):
+        """Builds the state of a RubiksSolver cube_state dict (side -> list of 9 color names).
+        Returns: CubieState"""
+
+        facelets = [COLOR_TO_CODE[color] for side in SIDES for color in cube_state[side]]
+        return cls.from_cubie(CubieCube.from_facelets(facelets))
+
+
+    def to_cube_state(self):
+        """Returns this state as a RubiksSolver cube_state dict.
+        Returns: dict"""
+
+        facelets = self.to_cubie().to_facelets()
+        return {side: [COLORS[code] for code in facelets[side_offset(side):side_offset(side)+9]] for side in VIEW_ORDER}
+
+
+    """ Moves """
+
+    def apply_move(self, move):
+        """Returns the state after a move.
+        Args: move= move in kociemba notation (Ex. R, R', R2) or its index in CubieCube.MOVE_NAMES
+        Returns: CubieState"""
+
+        m = MOVE_INDEX[move] if isinstance(move, str) else move
+        twist_move, flip_move, corners_move, edge4_move = _tables or get_tables()
+        return CubieState(twist_move[self.twist * N_MOVES + m], flip_move[self.flip * N_MOVES + m],
+                          corners_move[self.corners * N_MOVES + m], edge4_move[self.edges_u * N_MOVES + m],
+                          edge4_move[self.edges_d * N_MOVES + m], edge4_move[self.edges_slice * N_MOVES + m])
+
+
+    def apply_moves(self, moves):
+        """Returns the state after a kociemba solution string or a list of moves.
+        Returns: CubieState"""
+
+        state = self
+        for move in (moves.split() if isinstance(moves, str) else moves):
+            state = state.apply_move(move)
+        return state
+
+
+    @classmethod
+    def from_moves(cls, moves):
+        """Returns the state a move sequence makes from the solved cube.
+        Returns: CubieState"""
+
+        return SOLVED.apply_moves(moves)
+
+
+    def is_solved(self):
+        """Returns True if this is the solved state.
+        Returns: Boolean"""
+
+        return self.key == SOLVED_KEY
+
+
+    """ Group operations """
+
+    def compose(self, other):
+        """Returns the state of doing this state's moves and then 'other's moves (self * other).
+        Returns: CubieState"""
+
+        cube = self.to_cubie()
+        cube.multiply(other.to_cubie())
+        return CubieState.from_cubie(cube)
+
+
+    def __mul__(self, other):
+        return self.compose(other)
+
+
+    def inverse(self):
+        """Returns the state that undoes this one (self * inverse is solved).
+        Returns: CubieState"""
+
+        cube = self.to_cubie()
+        cp = [0] * 8
+        co = [0] * 8
+        for i in range(8):
+            cp[cube.cp[i]] = i
+        for i in range(8):
+            co[i] = -cube.co[cp[i]] % 3
+        ep = [0] * 12
+        eo = [0] * 12
+        for i in range(12):
+            ep[cube.ep[i]] = i
+        for i in range(12):
+            eo[i] = cube.eo[ep[i]]
+        return CubieState.from_cubie(CubieCube(cp, co, ep, eo))
+
+
+    def conjugate(self, other):
+        """Returns this state conjugated by 'other' (other^-1 * self * other): the same change made from a different setup.
+        Returns: CubieState"""
+
+        return other.inverse().compose(self).compose(other)
+
+
+    def order(self):
+        """Returns the number of times this state must be repeated to get back to solved (Ex. order of R U is 105).
+        Returns: int"""
+
+        cube = self.to_cubie()
+        order = 1
+        for perm, ori, modulus in [(cube.cp, cube.co, 3), (cube.ep, cube.eo, 2)]:
+            seen = [False] * len(perm)
+            for start in range(len(perm)):
+                if seen[start]:
+                    continue
+                length = 0
+                total = 0
+                i = start
+                while not seen[i]:
+                    seen[i] = True
+                    total += ori[i]
+                    i = perm[i]
+                    length += 1
+                if total % modulus:
+                    length *= modulus     # A twisted or flipped cycle needs more laps to come back oriented
+                order = order * length // gcd(order, length)
+        return order
+
+
+SOLVED_EDGES = [EDGE4_RANK[tuple(group)] for group in EDGE_GROUPS]
+SOLVED = CubieState()
+SOLVED_KEY = SOLVED.key
+
+
+def sequence_order(moves):
+    """Returns the number of times a move sequence must be repeated to get back to the starting state.
+    Returns: int"""
+
+    return CubieState.from_moves(moves).order()
+
+
+
+if __name__ =='__main__':
+    start = perf_counter()
+    get_tables()
+    print(f"Move tables built in {perf_counter() - start:.2f} s")
+
+    for sequence in ["R", "R U", "R U R' U'", "R U2 D' B D'"]:
+        print(f"Order of {sequence:<14}: {sequence_order(sequence)}")
+
+    count = 100000
+    state = SOLVED
+    moves = [m % N_MOVES for m in range(count)]
+    start = perf_counter()
+    for m in moves:
+        state = state.apply_move(m)
+    print(f"{count / (perf_counter() - start):,.0f} moves/s")
@@ -0,0 +1,188 @@
+from time import perf_counter
+import argparse
+import struct
+import numpy as np
+from CubieCube import MOVE_INDEX, MOVE_NAMES
+from CubieState import CubieState
+
+# Description: This script manages the binary scramble -> solution dataset format. Every record has the same width: the state
+#              ...packed into its CubieState key (10 bytes), the solution length (1 byte) and the moves as 5 bit codes. A 32 byte
+#              ...header holds the record count and width, so record N sits at a fixed offset and the reader maps the file
+#              ...with numpy.memmap: opening a dataset reads nothing, and record N is read only when it is asked for.
+
+
+MAGIC = b'RKDS'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHQ14x')   # magic, version, record size, max moves, record count
+STATE_BYTES = 10                        # CubieState keys are below 2**80
+MOVE_BITS = 5                           # 18 face moves do not fit in 4 bits
+
+
+def record_dtype(max_moves):
+    """Returns the numpy dtype of one record for solutions of up to 'max_moves' moves.
+    Returns: numpy.dtype"""
+
+    return np.dtype([('state', 'u1', STATE_BYTES), ('length', 'u1'), ('moves', 'u1', (max_moves * MOVE_BITS + 7) // 8)])
+
+
+def pack_state(state_str):
+    """Packs a 54 length kociemba string into STATE_BYTES bytes.
+    Returns: bytes"""
+
+    return CubieState.from_kociemba(state_str).key.to_bytes(STATE_BYTES, 'little')
+
+
+def unpack_state(data):
+    """Unpacks the 54 length kociemba string of a packed state.
+    Returns: str"""
+
+    return CubieState.from_key(int.from_bytes(bytes(data), 'little')).to_kociemba()
+
+
+def pack_moves(solution, max_moves=24):
+    """Packs a solution into 5 bit move codes (Indices in CubieCube.MOVE_NAMES).
+    Args: solution= kociemba solution string or list of moves (Ex. "R U2 F'")
+    Returns: (int number of moves, bytes)"""
+
+    moves = solution.split() if isinstance(solution, str) else solution
+    if len(moves) > max_moves:
+        raise ValueError(f"Solution has {len(moves)} moves, the dataset holds at most {max_moves}")
+    value = 0
+    for i, move in enumerate(moves):
+        value |= MOVE_INDEX[move.replace("2'", "2")] << (MOVE_BITS * i)
+    return len(moves), value.to_bytes((max_moves * MOVE_BITS + 7) // 8, 'little')
+
+
+def unpack_moves(length, data):
+    """Unpacks 'length' 5 bit move codes to a kociemba solution string.
+    Returns: str"""
+
+    value = int.from_bytes(bytes(data), 'little')
+    mask = (1 << MOVE_BITS) - 1
+    return " ".join(MOVE_NAMES[(value >> (MOVE_BITS * i)) & mask] for i in range(length))
+
+
+class DatasetWriter:
+    """Streams records to a dataset file. The header is rewritten with the final count when the writer is closed.
+
+    *Use as a context manager: with DatasetWriter(path) as writer: writer.append(state, solution)"""
+
+    def __init__(self, path, max_moves=24) -> None:
+        """Constructor method for class.
+        Args: max_moves= longest solution the dataset can hold. Defaults to 24 (Enough for kociemba's default limit)"""
+
+        self.max_moves = max_moves
+        self.dtype = record_dtype(max_moves)
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.write_header()
+
+
+    def write_header(self):
+        """Writes the header at the start of the file."""
+
+        self.file.seek(0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, self.dtype.itemsize, self.max_moves, self.count))
+
+
+    def append(self, state_str, solution):
+        """Appends one record.
+        Args: state_str= 54 length kociemba string
+              solution= kociemba solution string or list of moves"""
+
+        length, moves = pack_moves(solution, self.max_moves)
+        self.file.write(pack_state(state_str) + bytes([length]) + moves)
+        self.count += 1
+
+
+    def close(self):
+        """Writes the final header and closes the file."""
+
+        self.write_header()
+        self.file.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class Dataset:
+    """Read only view of a dataset file. dataset[n] returns record n as (kociemba state, kociemba solution), and
+    dataset.records is the numpy.memmap of the raw records (Slicing it copies nothing)."""
+
+    def __init__(self, path) -> None:
+        """Constructor method for class. Raises ValueError if the file is not a dataset."""
+
+        with open(path, 'rb') as file:
+            magic, version, record_size, self.max_moves, self.count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} dataset")
+        dtype = record_dtype(self.max_moves)
+        if dtype.itemsize != record_size:
+            raise ValueError(f"{path} has {record_size} byte records, expected {dtype.itemsize}")
+        self.records = (np.memmap(path, dtype=dtype, mode='r', offset=HEADER.size, shape=(self.count,))
+                        if self.count else np.zeros(0, dtype=dtype))
+
+
+    def __len__(self):
+        return self.count
+
+
+    def __getitem__(self, n):
+        """Returns record n as (54 length kociemba string, kociemba solution string).
+        Returns: tuple"""
+
+        record = self.records[n]
+        return unpack_state(record['state']), unpack_moves(int(record['length']), record['moves'])
+
+
+    def __iter__(self):
+        for n in range(self.count):
+            yield self[n]
+
+
+    def state(self, n):
+        """Returns the CubieState of record n without building its kociemba string.
+        Returns: CubieState"""
+
+        return CubieState.from_key(int.from_bytes(bytes(self.records[n]['state']), 'little'))
+
+
+
+if __name__ =='__main__':
+    from Scrambler import scrambles
+    from SolverBackends import BACKENDS, get_backend
+
+    parser = argparse.ArgumentParser(description="Write or read a binary scramble -> solution dataset")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    write_parser = subparsers.add_parser('write', help="Solve random states and write them as a dataset")
+    write_parser.add_argument('path')
+    write_parser.add_argument('--count', type=int, default=1000)
+    write_parser.add_argument('--seed', type=int, default=0)
+    write_parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend")
+    read_parser = subparsers.add_parser('read', help="Print records of a dataset")
+    read_parser.add_argument('path')
+    read_parser.add_argument('records', type=int, nargs='*', help="Record numbers. Defaults to the first 5")
+    args = parser.parse_args()
+
+    if args.command == 'write':
+        solve = get_backend(args.solver)
+        text_bytes = 0
+        with DatasetWriter(args.path) as writer:
+            for state in scrambles(args.count, args.seed):
+                solution = solve(state)
+                writer.append(state, solution)
+                text_bytes += len(state) + len(solution) + 2
+        print(f"Wrote {args.count} records: {HEADER.size + args.count * writer.dtype.itemsize:,} bytes ({text_bytes:,} bytes as text)")
+    else:
+        dataset = Dataset(args.path)
+        start = perf_counter()
+        for n in args.records or range(min(5, len(dataset))):
+            state, solution = dataset[n]
+            print(f"{n}: {state} {solution}")
+        print(f"{len(dataset)} records, read in {1000 * (perf_counter() - start):.2f} ms")
@@ -0,0 +1,386 @@
+from operator import itemgetter
+from time import perf_counter
+import random
+from RubiksSolver import RubiksSolver
+
+# Description: This script manages the FastRubiksSolver class, an array backed alternative to RubiksSolver. The cube is stored
+#              ...as a single 54 byte bytearray of color codes and every move is one gather through a precomputed permutation.
+#              ...A 64 bit Zobrist hash of the state and the count of misplaced squares are either kept up to date by every
+#              ...move from the ~20 squares it changes (incremental=True, for searches that hash every state), or computed
+#              ...only when read, so moves stay a single gather.
+
+
+# Facelet order of the flat state. Matches the order kociemba expects: UP, RIGHT, FACE, BOTTOM, LEFT, BACK (9 squares each)
+SIDES = ["TOP", "RIGHT", "FACE", "BOTTOM", "LEFT", "BACK"]
+
+# Color codes (index into this list). Chosen so that a color's code is the index of its center's side in SIDES
+COLORS = ["White", "Red", "Green", "Yellow", "Orange", "Blue"]
+COLOR_TO_CODE = {color: code for code, color in enumerate(COLORS)}
+
+# Side <-> kociemba letter conversions
+SIDE_TO_LETTER = {'TOP': 'U', 'RIGHT': 'R', 'FACE': 'F', 'BOTTOM': 'D', 'LEFT': 'L', 'BACK': 'B'}
+LETTER_TO_SIDE = {letter: side for side, letter in SIDE_TO_LETTER.items()}
+DIRECTION_TO_SUFFIX = {'cw': "", 'ccw': "'", 'half': "2"}
+
+# Translation tables between color codes and the kociemba string form
+CODE_TO_LETTER = bytes.maketrans(bytes(range(6)), b"URFDLB")
+LETTER_TO_CODE = bytes.maketrans(b"URFDLB", bytes(range(6)))
+
+# Iteration order of the dict view. Same order as RubiksSolver's own cube_state dict
+VIEW_ORDER = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+
+IDENTITY = tuple(range(54))
+SOLVED_CENTERS = bytes(i // 9 for i in IDENTITY)    # Color code of each square's center in the standard orientation
+
+# Zobrist keys: one random 64 bit number per (square, color code). The hash of a state is the XOR of the keys of its 54
+# squares. Seeded, so a state hashes the same in every process
+_zobrist_rng = random.Random(0x5EED)
+ZOBRIST = [[_zobrist_rng.getrandbits(64) for _ in range(6)] for _ in IDENTITY]
+
+# Delta tables, indexed square*36 + before*6 + after: the change to the hash and to the misplaced count when a square's
+# color goes from 'before' to 'after'
+HASH_DELTA = [ZOBRIST[i][before] ^ ZOBRIST[i][after] for i in IDENTITY for before in range(6) for after in range(6)]
+MISPLACED_DELTA = [(after != i // 9) - (before != i // 9) for i in IDENTITY for before in range(6) for after in range(6)]
+
+
+
+def side_offset(side):
+    """Returns the index of the first square of 'side' in the flat state.
+    Returns: int"""
+
+    return SIDES.index(side) * 9
+
+
+def build_permutation(move_directory, side, direction):
+    """Converts one entry of RubiksSolver.move_directory into a 54 entry gather permutation.
+    Applying the move is then: new_state[i] = old_state[perm[i]].
+    Returns: tuple"""
+
+    perm = list(IDENTITY)
+    this_sides_move_directory = move_directory[side + "_" + direction]
+
+    # 1. Squares of the side being turned
+    offset = side_offset(side)
+    for i in range(9):
+        new_index = i + this_sides_move_directory['side_shift_values'][i]
+        perm[offset + new_index] = offset + i
+
+    # 2. Squares of the 4 neighboring sides (Each neighbor receives the squares of the neighbor before it)
+    neighbors = this_sides_move_directory['neighbors']
+    for i in range(4):
+        base_indices = this_sides_move_directory['base_indices'][i-1]
+        neighbor_shift_values = this_sides_move_directory['neighbor_shift_values'][i-1]
+        src_offset = side_offset(neighbors[i-1])
+        dst_offset = side_offset(neighbors[i])
+        for e in range(3):
+            new_idx = base_indices[e] + neighbor_shift_values[e]
+            perm[dst_offset + new_idx] = src_offset + base_indices[e]
+
+    return tuple(perm)
+
+
+def compose(first, second):
+    """Returns the permutation that applies 'first' and then 'second'.
+    Returns: tuple"""
+
+    return tuple(first[i] for i in second)
+
+
+def build_move_tables(move_directory):
+    """Builds the gather permutation of every face move in kociemba notation (Ex. U, U', U2)
+    from the move_directory of a RubiksSolver.
+    Returns: dict"""
+
+    tables = {}
+    for side, letter in SIDE_TO_LETTER.items():
+        cw = build_permutation(move_directory, side, 'cw')
+        tables[letter] = cw
+        tables[letter + "'"] = build_permutation(move_directory, side, 'ccw')
+        tables[letter + "2"] = compose(cw, cw)
+    return tables
+
+
+def zobrist_hash(facelets):
+    """Returns the Zobrist hash of a flat state, from scratch.
+    Returns: int"""
+
+    h = 0
+    for i, code in enumerate(facelets):
+        h ^= ZOBRIST[i][code]
+    return h
+
+
+def count_misplaced(facelets):
+    """Returns the number of squares of a flat state not matching the solved cube in the standard orientation, from scratch.
+    Returns: int"""
+
+    return sum(code != center for code, center in zip(facelets, SOLVED_CENTERS))
+
+
+def move_name(side, direction):
+    """Returns the kociemba notation of a [side, direction] move. Ex: ['RIGHT', 'ccw'] -> R'
+    Returns: str"""
+
+    return SIDE_TO_LETTER[side] + DIRECTION_TO_SUFFIX[direction]
+
+
+def facelets_from_kociemba(state_str):
+    """Converts a 54 length kociemba string (Ex. output of encode_before_kociemba) to a flat state.
+    Returns: bytearray"""
+
+    facelets = bytearray(state_str.encode().translate(LETTER_TO_CODE))
+    if len(facelets) != 54 or max(facelets) > 5:
+        raise ValueError(f"Invalid kociemba state string: {state_str}")
+    return facelets
+
+
+def facelets_to_kociemba(facelets):
+    """Converts a flat state to its 54 length kociemba string.
+    Returns: str"""
+
+    return bytes(facelets).translate(CODE_TO_LETTER).decode()
+
+
+class FastRubiksSolver(RubiksSolver):
+    """Array backed version of RubiksSolver. Holds the cube as a 54 byte bytearray (self.facelets) of color codes
+    and applies each move as a single gather through a precomputed permutation. The cube_state dict is still
+    available for reading and assigning, so the class can be used wherever RubiksSolver is used.
+
+    *self.state_hash (Zobrist hash) and self.misplaced (squares not matching the solved cube) follow every move
+     with incremental=True, so hashing, same_state and is_solved are O(1); otherwise they are computed when read.
+     Assign a new bytearray to self.facelets rather than changing it in place, so they are not read stale.
+    """
+
+    # Move permutations and their gather functions. Shared by all instances, built on first construction
+    move_tables = None
+    move_getters = None
+    move_changes = None     # Move -> (getter of the squares it changes, their offsets into the delta tables)
+
+    def __init__(self, gui, incremental=False) -> None:
+        """Constructor method for class.
+        Args: incremental= update the hash and the misplaced count on every move (See apply_move_incremental).
+                           Moves cost about 4x more, reading the hash after a move costs nothing"""
+
+        self.incremental = incremental
+        super().__init__(gui)
+
+        if FastRubiksSolver.move_tables is None:
+            FastRubiksSolver.move_tables = build_move_tables(self.move_directory)
+            FastRubiksSolver.move_getters = {name: itemgetter(*perm) for name, perm in FastRubiksSolver.move_tables.items()}
+            FastRubiksSolver.move_changes = {}
+            for name, perm in FastRubiksSolver.move_tables.items():
+                squares = [i for i in IDENTITY if perm[i] != i]     # 20 for a face move
+                FastRubiksSolver.move_changes[name] = (itemgetter(*squares), tuple(i * 36 for i in squares))
+        if incremental:
+            self.apply_move = self.apply_move_incremental
+
+
+    @property
+    def facelets(self):
+        """Flat state: 54 byte bytearray of color codes in kociemba order."""
+
+        return self._facelets
+
+
+    @facelets.setter
+    def facelets(self, facelets):
+        """Stores a new flat state. Its hash and misplaced count are computed from scratch now if incremental,
+        else on the next read."""
+
+        self._facelets = facelets
+        if self.incremental:
+            self._state_hash = zobrist_hash(facelets)
+            self._misplaced = count_misplaced(facelets)
+        else:
+            self._state_hash = None
+            self._misplaced = None
+        self.standard_centers = facelets[4::9] == SOLVED_CENTERS[4::9]     # Face moves never move the centers
+
+
+    @property
+    def state_hash(self):
+        """Zobrist hash of the current state. Computed on the first read after a change unless incremental.
+        Returns: int"""
+
+        if self._state_hash is None:
+            self._state_hash = zobrist_hash(self._facelets)
+        return self._state_hash
+
+
+    @property
+    def misplaced(self):
+        """Number of squares not matching the solved cube in the standard orientation. Computed on the first read
+        after a change unless incremental.
+        Returns: int"""
+
+        if self._misplaced is None:
+            self._misplaced = count_misplaced(self._facelets)
+        return self._misplaced
+
+
+    @property
+    def cube_state(self):
+        """Dict view of the cube state (side -> list of 9 color names), built from self.facelets.
+
+        *The returned dict is a copy. To change the state, assign a whole dict to cube_state."""
+
+        facelets = self.facelets
+        state = {}
+        for side in VIEW_ORDER:
+            offset = side_offset(side)
+            state[side] = [COLORS[code] for code in facelets[offset:offset+9]]
+        return state
+
+
+    @cube_state.setter
+    def cube_state(self, state):
+        """Stores a dict of side -> list of 9 color names into self.facelets."""
+
+        facelets = bytearray(54)
+        for side in SIDES:
+            offset = side_offset(side)
+            facelets[offset:offset+9] = bytes(COLOR_TO_CODE[color] for color in state[side])
+        self.facelets = facelets
+
+
+    def encode_before_kociemba(self):
+        """Takes the current cube state and converts to a 54 length string that represents
+        the state of each of the 6 cube sides. The flat state is already in kociemba order,
+        so this is a single byte translation."""
+
+        return facelets_to_kociemba(self.facelets)
+
+
+    def set_state_from_kociemba(self, state_str):
+        """Sets the current cube state from a 54 length kociemba string."""
+
+        self.facelets = facelets_from_kociemba(state_str)
+
+
+    def update_cube_state(self):
+        """Updates the state of the cube. Use to update cube after a turn
+        has been made."""
+
+        self.apply_move(move_name(self.current_side_being_moved, self.current_direction_of_rotation))
+
+
+    def apply_move(self, name):
+        """Applies a single move in kociemba notation (Ex. R, R', R2) to the state.
+        Args: name= move to apply"""
+
+        self._facelets = bytearray(self.move_getters[name](self._facelets))
+        self._state_hash = None
+        self._misplaced = None
+
+
+    def apply_move_incremental(self, name):
+        """Applies a single move like apply_move, and updates the hash and the misplaced count from the squares
+        the move changes (Used as apply_move when incremental).
+        Args: name= move to apply"""
+
+        old = self._facelets
+        new = bytearray(self.move_getters[name](old))
+        changes, offsets = self.move_changes[name]
+
+        # Only the squares the move changes can change the hash and the misplaced count
+        h = self._state_hash
+        misplaced = self._misplaced
+        for offset, before, after in zip(offsets, changes(old), changes(new)):
+            k = offset + before * 6 + after
+            h ^= HASH_DELTA[k]
+            misplaced += MISPLACED_DELTA[k]
+        self._facelets = new
+        self._state_hash = h
+        self._misplaced = misplaced
+
+
+    def apply_sequence(self, moves, cache=True):
+        """Applies a whole move sequence as one gather through its compiled permutation (See MoveCompiler.py).
+        Args: moves= kociemba solution string, list of move names or list of [side, direction] moves
+              cache= keep the compiled sequence for the next time it is applied (See MoveCompiler.compile)"""
+
+        from MoveCompiler import COMPILER
+        self.facelets = COMPILER.compile(moves, cache).apply(self._facelets)
+
+
+    def execute_solution(self, solution):
+        """Executes the passed list of moves as one compiled sequence (Not cached, a solution is rarely applied twice).
+        Like RubiksSolver, leaves the last move in current_side_being_moved and current_direction_of_rotation."""
+
+        self.apply_sequence(solution, cache=False)
+        if len(solution):
+            self.current_side_being_moved, self.current_direction_of_rotation = solution[-1]
+
+
+    def is_solved(self):
+        """Checks if the rubik's cube has been solved or not. Return True is solved, else False.
+        Return: Boolean"""
+
+        if self.standard_centers:
+            if self._misplaced is not None:
+                return self._misplaced == 0
+            return self._facelets == SOLVED_CENTERS
+
+        # Cube read in another orientation: misplaced counts against the standard one, so check every side
+        facelets = self.facelets
+        for offset in range(0, 54, 9):
+            if facelets[offset:offset+9].count(facelets[offset]) != 9:
+                return False
+        return True
+
+
+    def state_key(self):
+        """Returns the 64 bit hash of the current state (Kept up to date if incremental, else computed once per state).
+        Use as the dict key of a state
+        (Ex. cycle detection, caches).
+        Returns: int"""
+
+        return self.state_hash
+
+
+    def same_state(self, other):
+        """Checks if 'other' (a FastRubiksSolver) holds the same state. Hashes already known for both (Always, if both
+        are incremental) tell different states apart at once; otherwise the squares are compared (One bytes comparison,
+        cheaper than hashing).
+        Returns: Boolean"""
+
+        if self._state_hash is not None and other._state_hash is not None and self._state_hash != other._state_hash:
+            return False
+        return self._facelets == other._facelets
+
+
+def get_move_tables():
+    """Returns the shared move permutation tables, building them if no FastRubiksSolver
+    has been constructed yet.
+    Returns: dict"""
+
+    if FastRubiksSolver.move_tables is None:
+        FastRubiksSolver(None)
+    return FastRubiksSolver.move_tables
+
+
+def moves_per_second(solver, count=20000):
+    """Times 'count' random quarter turns made through solver.make_move.
+    Returns: float"""
+
+    random.seed(0)
+    faces = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+    moves = [(random.choice(faces), random.choice(['cw', 'ccw'])) for _ in range(count)]
+
+    start = perf_counter()
+    for side, direction in moves:
+        solver.current_side_being_moved = side
+        solver.current_direction_of_rotation = direction
+        solver.make_move()
+    return count / (perf_counter() - start)
+
+
+
+if __name__ =='__main__':
+    # Compare move throughput of the two state backends
+    base_rate = moves_per_second(RubiksSolver(None))
+    fast_rate = moves_per_second(FastRubiksSolver(None))
+    tracked_rate = moves_per_second(FastRubiksSolver(None, incremental=True))
+    print(f"RubiksSolver     : {base_rate:>12,.0f} moves/s")
+    print(f"FastRubiksSolver : {fast_rate:>12,.0f} moves/s  ({fast_rate / base_rate:.1f}x)")
+    print(f"  incremental    : {tracked_rate:>12,.0f} moves/s  ({tracked_rate / base_rate:.1f}x, hash and misplaced kept)")
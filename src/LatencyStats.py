@@ -0,0 +1,11 @@
+# Description: This script holds the latency statistics shared by the solve server and the benchmark suite.
+
+
+def percentile(sorted_values, q):
+    """Returns the q-th percentile (0-100) of an already sorted list, or None if it is empty.
+    Returns: float"""
+
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -1,6 +1,19 @@
-from RubiksBot import RubiksBot
+from time import perf_counter
+import argparse
+import json
+import sys
 from RubiksSolver import RubiksSolver
-import kociemba
+from FastRubiksSolver import FastRubiksSolver
+from SolverBackends import BACKENDS, get_backend, warm_up
+from MoveOptimizer import optimize, report
+from RegripPlanner import RegripPlanner, execute_plan
+from Pipeline import BotRunner, StageTimer
+from Tracing import TRACER, instrument_bot
+from CubeValidator import validate
+from Checkpoint import Checkpoint, load_checkpoint, restore_bot
+
+# Bot (gpiozero), cache (sqlite3), selection (multiprocessing) and near solved table (numpy) modules are imported in main,
+# only when they are used, so solving without hardware does not need gpiozero or pay for its import
 
 """
 Instructions: 
@@ -18,52 +31,375 @@ Instructions:
     -For placing cube into bot:
     When you are facing the bot, place the cube with the side with the green middle square facing you
     and the side with the white middle square facing above.
+
+    -For solving many cubes (--batch):
+    Put one state per line in a file (or pipe them to stdin), either as a 54 letter kociemba string (URFDLB letters)
+    or as the 6 sides in the order the prompts ask for them (FACE BACK LEFT RIGHT TOP BOTTOM), each as 9 color
+    letters, separated by spaces. Blank lines and lines starting with # are skipped. One JSON line is written per state.
+
+    -For resuming an interrupted solve (--checkpoint, --resume):
+    With --checkpoint PATH the progress is saved after every step. If the solve is interrupted, leave the cube in the
+    bot and run with --resume PATH: the bot reconnects and finishes the remaining moves from where it stopped.
+    A step is only saved once the servos have completed it, so with --overlap the steps no longer overlap.
+
+    -For solving states near solved instantly (--table):
+    Build a table once with: python NearSolvedTable.py build PATH --depth 5. With --table PATH every state within
+    that many moves of solved is answered from the table with an optimal solution, and any other state is solved as usual.
 """
 
 
+# Order the sides are entered in, and the color of each letter
+INPUT_SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+LETTER_TO_COLOR = {'g': 'Green', 'b': 'Blue', 'o': 'Orange', 'r': 'Red', 'w': 'White', 'y': 'Yellow'}
+
+
+""" Batch mode """
+
+def read_lines(file):
+    """Yields the (line number, text) of every line of 'file' that holds a state. Skips blank lines and # comments."""
+
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if line and not line.startswith('#'):
+            yield number, line
+
+
+def parse_state(line):
+    """Converts one line to a state the validator accepts. Raises ValueError if the line has neither form.
+    Args: line= 54 letter kociemba string, or 6 sides of 9 color letters (INPUT_SIDES order) separated by spaces
+    Returns: str (kociemba form) or dict (side -> 9 color names)"""
+
+    if len(line) == 54 and set(line) <= set("URFDLB"):
+        return line
+    sides = line.split()
+    if len(sides) != 6:
+        raise ValueError(f"Expected a 54 letter kociemba string or 6 sides of 9 color letters, got {len(sides)} field(s)")
+    return {side: [LETTER_TO_COLOR.get(letter, letter) for letter in letters] for side, letters in zip(INPUT_SIDES, sides)}
+
+
+def solve_lines(lines, backend='kociemba', cache_path=None, table=None):
+    """Parses, validates and solves every line. A bad line gives a result with an error instead of stopping the run.
+    Args: lines= (line number, text) pairs (See read_lines)
+          table= NearSolvedTable looked up before the cache and the backend
+    Yields: dicts with keys line and either state, solution, solve_seconds and moves, or error (and problems)"""
+
+    if cache_path:
+        from SolutionCache import SolutionCache
+        solve = SolutionCache(backend, path=cache_path).solve
+    else:
+        solve = get_backend(backend)
+    if table is not None:
+        solve = table.solver(solve)
+
+    for number, line in lines:
+        result = {'line': number}
+        try:
+            validation = validate(parse_state(line))
+            if not validation.valid:
+                result['error'] = "Invalid cube state"
+                result['problems'] = validation.problems
+            else:
+                result['state'] = validation.cube.to_kociemba()
+                start = perf_counter()
+                result['solution'] = solve(result['state'])
+                result['solve_seconds'] = round(perf_counter() - start, 6)
+                result['moves'] = len(result['solution'].split())
+        except ValueError as error:
+            result['error'] = str(error)
+        except Exception as error:     # Backend failures (Ex. a state the solver gives up on) are kept with their line too
+            result['error'] = f"{type(error).__name__}: {error}"
+        yield result
+
+
+def prompt_next_cube(result):
+    """Waits for the next cube to be placed in the bot (Used by run_batch with a real bot). The prompt goes to stderr,
+    so it does not mix with the JSON lines on stdout."""
+
+    print(f"Place the cube of line {result['line']} in the bot and press Enter", file=sys.stderr)
+    input()
+
+
+def execute_results(results, simulate=False, overlap=False, next_cube=None):
+    """Runs every solved result on a bot (The cube is loaded in the standard orientation) and adds the seconds the bot
+    took (bot_seconds, simulated or real) and whether the cube ended solved. A simulated bot is made for each cube.
+    A real bot is connected once, and before every cube after the first servo_x returns to its start angle
+    (RubiksBot.load_new_cube) and next_cube is called while the finished cube is swapped for the next one.
+    An error while executing a cube is recorded in its result, and the next cube is still executed.
+    Args: next_cube= function called with the result about to be executed on a real bot (Ex. prompt_next_cube)
+    Yields: the results"""
+
+    decoder = RubiksSolver(None)
+    bot = None
+    try:
+        for result in results:
+            if 'solution' in result:
+                try:
+                    if simulate:
+                        from SimulatedBot import SimulatedRubiksBot
+                        bot = SimulatedRubiksBot(overlap=overlap)
+                    elif bot is None:
+                        from RubiksBot import RubiksBot
+                        bot = RubiksBot(overlap=overlap)
+                    else:
+                        bot.load_new_cube()
+                        if next_cube is not None:
+                            next_cube(result)
+                    solver = FastRubiksSolver(None)
+                    solver.set_state_from_kociemba(result['state'])
+                    moves = optimize(decoder.decode_after_kociemba(result['solution'], half_turns=True))
+                    start = bot.clock.now()
+                    execute_plan(bot, RegripPlanner(bot).plan(moves), solver)
+                    result['bot_seconds'] = round(bot.clock.now() - start, 3)
+                    result['solved'] = solver.is_solved()
+                except Exception as error:
+                    result['error'] = f"{type(error).__name__}: {error}"
+                finally:
+                    if simulate and bot is not None:
+                        bot.close()     # Mock pins stay claimed until the bot is closed
+                        bot = None
+            yield result
+    finally:
+        if bot is not None:
+            bot.close()
 
-def main():
-    """Main driver function for Rubiks cube solver program."""
 
-    bot = RubiksBot()
+def run_batch(source='-', output='-', backend='kociemba', cache_path=None, execute=False, simulate=False, overlap=False,
+              table_path=None):
+    """Solves every state in 'source' and writes one JSON line per state to 'output' as soon as it is done.
+    Args: source= file of states, one per line ('-' for stdin)
+          output= file the JSON lines are written to ('-' for stdout)
+          execute= also run every solution on a bot (simulate= on a simulated one, overlap= see main). A real bot
+                   prompts for each cube on stdin, so the states must then come from a file
+          table_path= near solved table file (See NearSolvedTable.py). Defaults to no table
+    Returns: dict with keys states, solved and errors, and table (See NearSolvedTable.stats) with a table"""
+
+    if execute and not simulate and source == '-':
+        raise ValueError("Executing on a real bot reads the cube prompts from stdin, so the states must come from a file")
+    warm_up(backend)
+    counts = {'states': 0, 'solved': 0, 'errors': 0}
+    table = None
+    if table_path:
+        from NearSolvedTable import NearSolvedTable
+        table = NearSolvedTable(table_path)
+    source_file = sys.stdin if source == '-' else open(source)
+    output_file = sys.stdout if output == '-' else open(output, 'w')
+    try:
+        results = solve_lines(read_lines(source_file), backend, cache_path, table)
+        if execute:
+            results = execute_results(results, simulate, overlap, None if simulate else prompt_next_cube)
+        for result in results:
+            counts['states'] += 1
+            counts['errors' if 'error' in result else 'solved'] += 1
+            output_file.write(json.dumps(result) + "\n")
+            output_file.flush()
+    finally:
+        if source_file is not sys.stdin:
+            source_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+    if table is not None:
+        counts['table'] = table.stats()
+    return counts
+
+
+
+def main(backend='kociemba', cache_path=None, simulate=False, trace_path=None, overlap=False, select=False, mirrors=False,
+         profile_path=None, solve_only=False, checkpoint_path=None, table_path=None):
+    """Main driver function for Rubiks cube solver program.
+    Args: backend= name of the solver backend used to find the solution (See SolverBackends.py)
+          cache_path= sqlite file of previously found solutions. Defaults to no cache
+          simulate= run on a SimulatedRubiksBot (No hardware, no waiting) and print the time the bot would have taken
+          trace_path= file the simulated bot's servo commands are written to
+          overlap= let the bot's servos move at the same time where the steps allow it
+          select= solve every rotation of the state and keep the solution the bot executes fastest (Skips the cache)
+          mirrors= with select, also solve every mirror of the state
+          profile_path= trace every stage and bot action, write the spans to <profile_path>.jsonl and
+                        <profile_path>.trace.json (Chrome trace) and print where the time went
+          solve_only= print the solution without driving a bot (No hardware imports)
+          checkpoint_path= save the progress to this file after every step, so an interrupted solve can be resumed
+          table_path= near solved table file (See NearSolvedTable.py), looked up before the cache and the backend
+                      (Skipped with select)"""
+
+    if profile_path:
+        TRACER.enable()
+
+    # Servos are initialized in the background while the solver warms up and the cube state is entered and solved
+    timer = StageTimer()
     solver = RubiksSolver(None)
+    bot = runner = None
+    if not solve_only:
+        if simulate:
+            from SimulatedBot import SimulatedRubiksBot
+            bot = SimulatedRubiksBot(overlap=overlap, connect=False)
+        else:
+            from RubiksBot import RubiksBot
+            bot = RubiksBot(overlap=overlap, connect=False)
+        if profile_path:
+            instrument_bot()
+        checkpoint = Checkpoint(checkpoint_path) if checkpoint_path else None
+        runner = BotRunner(bot, solver, timer, checkpoint.step_done if checkpoint else None).start()
 
-    # 1. Set start cube state
-    state = {}
-    letter_to_color_conv = {'g': 'Green', 'b': 'Blue', 'o': 'Orange', 'r': 'Red', 'w': 'White', 'y': 'Yellow'}
-    for side in ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']:
-        side_input = input(f"Please enter state for {side}: ")    # Input will be a string of length 9, each letter representing first letter of color
-        side_input = [i for i in side_input]  # Convert string to a list
+    # The bot's thread is stopped and the bot closed however the solve ends
+    try:
+        # 0. Load the solver before the first state is entered
+        with timer.stage('warm_up'), TRACER.span('warm_up', backend=backend):
+            warm_up(backend)
 
-        # Replace each letter in list with its respective color
-        for i in range(len(side_input)):
-            side_input[i] = letter_to_color_conv[side_input[i]]
+        # 1. Set start cube state
+        with timer.stage('input'), TRACER.span('input'):
+            state = {}
+            for side in INPUT_SIDES:
+                side_input = input(f"Please enter state for {side}: ")    # Input will be a string of length 9, each letter representing first letter of color
+                side_input = [i for i in side_input]  # Convert string to a list
+
+                # Replace each letter in list with its respective color
+                for i in range(len(side_input)):
+                    side_input[i] = LETTER_TO_COLOR.get(side_input[i], side_input[i])    # Unknown letters are reported by the validator
         
-        # Store side input to dict
-        state[side] = side_input
+                # Store side input to dict
+                state[side] = side_input
     
-    solver.cube_state = state   # Set state
+            solver.cube_state = state   # Set state
 
-    # 2. Get cube solution
-    kociemba_input = solver.encode_before_kociemba()        # Prepare input for kociemba using current cube state
-    kociemba_output = kociemba.solve(kociemba_input)        # Access the solution string
-    decoded_solution = solver.decode_after_kociemba(kociemba_output)  # Decode the solution into a list of moves. Ex: [[side, direction], [...], ...]
+        # Check the state before solving, so a mistyped square is reported instead of failing in the solver
+        validation = validate(state)
+        if not validation.valid:
+            print(validation)
+            return
 
+        # 2. Get cube solution
+        with timer.stage('solve'):
+            with TRACER.span('encode'):
+                kociemba_input = solver.encode_before_kociemba()        # Prepare input for kociemba using current cube state
+            planner = None
+            table = None
+            with TRACER.span('solve', backend=backend, select=select):
+                if select:
+                    from SolutionSelector import select_solution
+                    planner = RegripPlanner(bot) if bot else None
+                    kociemba_output = select_solution(kociemba_input, backend, mirrors, planner=planner)['solution']
+                else:
+                    if cache_path:
+                        from SolutionCache import SolutionCache
+                        solve = SolutionCache(backend, path=cache_path).solve
+                    else:
+                        solve = get_backend(backend)
+                    if table_path:
+                        from NearSolvedTable import NearSolvedTable
+                        table = NearSolvedTable(table_path)
+                        solve = table.solver(solve)     # States near solved are answered from the table
+                    kociemba_output = solve(kociemba_input)     # Access the solution string
+            with TRACER.span('decode'):
+                decoded_solution = solver.decode_after_kociemba(kociemba_output, half_turns=True)  # Decode the solution into a list of moves. Ex: [[side, direction], [...], ...]
+            with TRACER.span('optimize'):
+                optimized_solution = optimize(decoded_solution)     # Merge and cancel moves, keep half turns as one bot turn
+        print("Optimizer: ", report(solver.decode_after_kociemba(kociemba_output), optimized_solution))
+        if table is not None:
+            print("Near solved table: ", "hit" if table.hits else "miss")
+
+        if solve_only:
+            print("Solution: ", kociemba_output)
+            print("Stages: ", timer.report())
+            return
+
+
+        # 3. Plan regrips and turns for the whole solution, then hand them to the bot (Also updates cube state in script)
+        with timer.stage('plan'), TRACER.span('plan'):
+            planner = planner or RegripPlanner(bot)
+            plan = planner.plan(optimized_solution)
+        if checkpoint:
+            checkpoint.begin(plan, solver, bot)
+        for step in plan:
+            runner.put(step)
+        runner.close()
+        print("Regrip planner: ", planner.report(optimized_solution, plan))
+        runner.join()
+        if checkpoint:
+            checkpoint.clear()
+
+        print("Cube solved: ", solver.is_solved())
+        print("Stages: ", timer.report())
+
+        if simulate:
+            print("Simulated bot: ", bot.summary())
+            if trace_path:
+                bot.write_trace(trace_path)
+
+        if profile_path:
+            TRACER.disable()
+            TRACER.write_jsonl(profile_path + ".jsonl")
+            TRACER.write_chrome_trace(profile_path + ".trace.json")
+            print("Where the time went (self seconds):")
+            for entry in TRACER.summary():
+                bot_time = f"  bot {entry['bot_seconds']:.3f} s" if 'bot_seconds' in entry else ""
+                print(f"  {entry['name']:<14} {entry['count']:>5}x  {entry['self_seconds']:>10.3f} s  (mean {entry['mean_seconds']:.4f} s){bot_time}")
+    finally:
+        if runner:
+            runner.shutdown()
+
+
+def resume(checkpoint_path, simulate=False, overlap=False):
+    """Finishes an interrupted solve from its checkpoint (See main). The cube must still be in the bot. Only the
+    remaining moves are planned again, from the bot's orientation once it has reconnected.
+    Args: checkpoint_path= checkpoint file written by main
+          simulate, overlap= see main"""
+
+    data = load_checkpoint(checkpoint_path)
+    if simulate:
+        from SimulatedBot import SimulatedRubiksBot
+        bot = SimulatedRubiksBot(overlap=overlap)
+    else:
+        from RubiksBot import RubiksBot
+        bot = RubiksBot(overlap=overlap)
+    restore_bot(bot, data)
+
+    solver = FastRubiksSolver(None)
+    solver.set_state_from_kociemba(data['cube_state'])
+    planner = RegripPlanner(bot)
+    plan = planner.plan(data['remaining_moves'])
+    print(f"Resuming after {data['steps_done']} steps: {len(data['remaining_moves'])} moves left, {len(plan)} steps")
+
+    checkpoint = Checkpoint(checkpoint_path)
+    checkpoint.begin(plan, solver, bot)
+    execute_plan(bot, plan, solver, checkpoint.step_done)
+    checkpoint.clear()
 
-    # 3. Execute moves through bot
-    for side, direction in decoded_solution:
-        
-        bot.load_side(side)   # Load side to rotate
-        
-        # Update cube state in script
-        solver.current_side_being_moved = side
-        solver.current_direction_of_rotation = direction
-        solver.make_move() # Make virtual move (Also updates cube state)
-         
-        bot.turn_cube(direction)    # Rotate cube
-        
     print("Cube solved: ", solver.is_solved())
+    if simulate:
+        print("Simulated bot: ", bot.summary())
 
 
 if __name__ =='__main__':
-    main()
+    parser = argparse.ArgumentParser(description="Rubik's cube solver bot")
+    parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend used to find the solution")
+    parser.add_argument('--cache', metavar='PATH', help="Reuse solutions stored in this sqlite file (Symmetric states share entries)")
+    parser.add_argument('--simulate', action='store_true', help="Run on a simulated bot and report the time the solve would take")
+    parser.add_argument('--trace', metavar='PATH', help="With --simulate, write the servo command trace to this file")
+    parser.add_argument('--overlap', action='store_true', help="Move both servos at the same time where the steps allow it")
+    parser.add_argument('--select', action='store_true', help="Solve every rotation of the cube and keep the solution the bot executes fastest")
+    parser.add_argument('--mirrors', action='store_true', help="With --select, also solve every mirror of the cube")
+    parser.add_argument('--profile', metavar='PREFIX', help="Trace every stage and bot action to PREFIX.jsonl and PREFIX.trace.json")
+    parser.add_argument('--solve-only', action='store_true', help="Print the solution without driving a bot (No hardware needed)")
+    parser.add_argument('--batch', metavar='PATH', help="Solve every state in this file ('-' for stdin), one per line, and write JSON lines")
+    parser.add_argument('--output', metavar='PATH', default='-', help="With --batch, file the JSON lines are written to. Defaults to stdout")
+    parser.add_argument('--execute', action='store_true', help="With --batch, also run every solution on the bot (Simulated with --simulate)")
+    parser.add_argument('--checkpoint', metavar='PATH', help="Save the progress to this file after every step")
+    parser.add_argument('--resume', metavar='PATH', help="Finish the interrupted solve saved in this checkpoint file")
+    parser.add_argument('--table', metavar='PATH', help="Answer states near solved from this table (See NearSolvedTable.py)")
+    args = parser.parse_args()
+    if args.resume:
+        resume(args.resume, args.simulate, args.overlap)
+        sys.exit(0)
+    if args.batch:
+        try:
+            counts = run_batch(args.batch, args.output, args.solver, args.cache, args.execute, args.simulate, args.overlap,
+                               args.table)
+        except ValueError as error:
+            parser.error(str(error))
+        print(f"{counts['states']} states: {counts['solved']} solved, {counts['errors']} errors", file=sys.stderr)
+        if 'table' in counts:
+            print(f"Near solved table: {counts['table']['hits']} hits, {counts['table']['misses']} misses "
+                  f"(hit rate {counts['table']['hit_rate']:.1%})", file=sys.stderr)
+        sys.exit(1 if counts['errors'] else 0)
+    main(args.solver, args.cache, args.simulate, args.trace, args.overlap, args.select, args.mirrors, args.profile, args.solve_only,
+         args.checkpoint, args.table)
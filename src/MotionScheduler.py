@@ -0,0 +1,85 @@
+# Description: This script manages the MotionScheduler class, which lets the bot's two servos move at the same time. Instead of
+#              ...sleeping after every servo command, each servo tracks the time it is busy until, and a command only waits
+#              ...for the servos it depends on. Redundant moves (Ex. raising the hood after a flatten only to lower it again
+#              ...to clamp) are dropped.
+
+
+class MotionScheduler:
+    """Issues servo commands as soon as their preconditions hold. A command has a hold time (how long its servo is busy
+    afterwards) and a set of servos that must be idle before it starts. Commands are issued in the order they are given,
+    so the clock only ever moves forward."""
+
+    def __init__(self, clock, servos='xy') -> None:
+        """Constructor method for class.
+        Args: clock= clock the schedule runs on (Ex. RealClock, VirtualClock)
+              servos= names of the servos being scheduled"""
+
+        self.clock = clock
+        start = clock.now()
+        self.busy_until = {name: start for name in servos}
+        self.angles = {name: None for name in servos}           # Last angle each servo was commanded to
+        self.commanded_at = {name: start for name in servos}    # Time of that command
+        self.pending = None     # Deferred command, held back in case the next command makes it redundant
+
+        # Counters
+        self.commands = 0
+        self.merged = 0
+        self.waited = 0.0   # Seconds spent waiting for preconditions
+
+
+    def move(self, name, servo, angle, hold, waits='xy', deferrable=False):
+        """Schedules a servo command.
+        Args: name= name of the servo (Ex. x, y)
+              servo= servo object the angle is set on
+              angle= angle to move to
+              hold= seconds the servo is busy after the command
+              waits= names of the servos that must be idle before the command starts
+              deferrable= hold the command back until the next one is known. It is dropped if the next command
+                          moves the same servo straight back to the angle it is leaving"""
+
+        # 1. Resolve the deferred command
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            if pending[0] == name and angle == self.angles[name]:
+                self.merged += 1
+            else:
+                self.issue(*pending)
+
+        # 2. Defer or issue this one
+        if deferrable:
+            self.pending = (name, servo, angle, hold, waits)
+        else:
+            self.issue(name, servo, angle, hold, waits)
+
+
+    def issue(self, name, servo, angle, hold, waits):
+        """Waits until every servo in 'waits' is idle, then commands 'servo'. A servo already at 'angle' is not
+        commanded again; it only has to have held the angle for 'hold' seconds."""
+
+        start = max([self.busy_until[other] for other in waits] + [self.clock.now()])
+        if start > self.clock.now():
+            self.waited += start - self.clock.now()
+            self.clock.sleep(start - self.clock.now())
+
+        if angle == self.angles[name]:
+            self.busy_until[name] = max(start, self.commanded_at[name] + hold)
+            self.merged += 1
+            return
+
+        servo.angle = angle
+        self.angles[name] = angle
+        self.commanded_at[name] = start
+        self.busy_until[name] = start + hold
+        self.commands += 1
+
+
+    def finish(self):
+        """Issues any deferred command and waits until every servo is idle."""
+
+        if self.pending is not None:
+            pending, self.pending = self.pending, None
+            self.issue(*pending)
+
+        end = max(self.busy_until.values())
+        if end > self.clock.now():
+            self.clock.sleep(end - self.clock.now())
@@ -0,0 +1,188 @@
+from collections import OrderedDict
+from operator import itemgetter
+from time import perf_counter
+from FastRubiksSolver import FastRubiksSolver, IDENTITY, compose, facelets_from_kociemba, get_move_tables, move_name
+
+# Description: This script compiles move sequences. A sequence of moves ([side, direction] lists or kociemba notation) is
+#              ...composed into one 54 entry gather permutation, so applying the whole algorithm to a flat state is a single
+#              ...gather however long it is. Compiled sequences can be composed, inverted and raised to a power, and
+#              ...recently compiled ones are kept in an LRU, so replaying a known algorithm skips the compile.
+
+
+class CompiledSequence:
+    """A move sequence as one gather permutation: new_state[i] = old_state[perm[i]]."""
+
+    __slots__ = ['perm', 'getter', 'moves']
+
+    def __init__(self, perm=IDENTITY, moves=()) -> None:
+        """Constructor method for class.
+        Args: perm= 54 entry gather permutation. Defaults to the empty sequence
+              moves= kociemba names of the moves it was compiled from (Empty for composed sequences)"""
+
+        self.perm = tuple(perm)
+        self.getter = itemgetter(*self.perm)
+        self.moves = tuple(moves)
+
+
+    def apply(self, facelets):
+        """Returns the flat state after the sequence.
+        Args: facelets= 54 byte flat state (See FastRubiksSolver)
+        Returns: bytearray"""
+
+        return bytearray(self.getter(facelets))
+
+
+    def compose(self, other):
+        """Returns the sequence of this one followed by 'other'.
+        Returns: CompiledSequence"""
+
+        return CompiledSequence(compose(self.perm, other.perm), self.moves + other.moves if self.moves and other.moves else ())
+
+
+    def __mul__(self, other):
+        return self.compose(other)
+
+
+    def inverse(self):
+        """Returns the sequence that undoes this one.
+        Returns: CompiledSequence"""
+
+        perm = [0] * 54
+        for i, source in enumerate(self.perm):
+            perm[source] = i
+        return CompiledSequence(perm)
+
+
+    def power(self, n):
+        """Returns this sequence repeated n times (Negative n repeats the inverse), by repeated squaring.
+        Returns: CompiledSequence"""
+
+        base = self if n >= 0 else self.inverse()
+        result = CompiledSequence()
+        n = abs(n)
+        while n:
+            if n & 1:
+                result = result.compose(base)
+            base = base.compose(base)
+            n >>= 1
+        return result
+
+
+    def __pow__(self, n):
+        return self.power(n)
+
+
+    def is_identity(self):
+        """Returns True if the sequence leaves every square where it was.
+        Returns: Boolean"""
+
+        return self.perm == IDENTITY
+
+
+    def order(self):
+        """Returns the number of times the sequence must be repeated to get back to the start.
+        Returns: int"""
+
+        n = 1
+        p = self
+        while not p.is_identity():
+            p = p.compose(self)
+            n += 1
+        return n
+
+
+def move_names(moves):
+    """Converts a sequence to kociemba move names (R2' is read as R2). Raises ValueError for a name that is not a face move.
+    Args: moves= kociemba solution string, list of move names or list of [side, direction] moves
+    Returns: tuple"""
+
+    if isinstance(moves, str):
+        moves = moves.split()
+    names = tuple(move.replace("2'", "2") if isinstance(move, str) else move_name(move[0], move[1]) for move in moves)
+    tables = get_move_tables()
+    for name in names:
+        if name not in tables:
+            raise ValueError(f"Unknown move '{name}'")
+    return names
+
+
+class MoveCompiler:
+    """Compiles move sequences, keeping the most recently used ones."""
+
+    def __init__(self, max_size=1024) -> None:
+        """Constructor method for class.
+        Args: max_size= number of compiled sequences kept"""
+
+        self.max_size = max_size
+        self.compiled = OrderedDict()   # Tuple of move names -> CompiledSequence, least recently used first
+        self.hits = 0
+        self.misses = 0
+
+
+    def compile(self, moves, cache=True):
+        """Returns the compiled sequence of 'moves' (See move_names for the accepted forms).
+        Args: cache= keep the compiled sequence. Pass False for one-off sequences (Ex. a solution), so they do not
+                     evict the algorithms that are replayed (A cached sequence is still reused)
+        Returns: CompiledSequence"""
+
+        names = move_names(moves)
+        sequence = self.compiled.get(names)
+        if sequence is not None:
+            self.hits += 1
+            self.compiled.move_to_end(names)
+            return sequence
+
+        self.misses += 1
+        tables = get_move_tables()
+        perm = IDENTITY
+        for name in names:
+            perm = compose(perm, tables[name])
+        sequence = CompiledSequence(perm, names)
+        if not cache:
+            return sequence
+        self.compiled[names] = sequence
+        if len(self.compiled) > self.max_size:
+            self.compiled.popitem(last=False)
+        return sequence
+
+
+    def solves(self, state_str, solution):
+        """Checks that 'solution' solves 'state_str' with one gather of the compiled solution.
+        Args: state_str= 54 length kociemba string
+              solution= kociemba solution string or list of moves
+        Returns: Boolean"""
+
+        facelets = self.compile(solution, cache=False).apply(facelets_from_kociemba(state_str))
+        return all(facelets[offset:offset+9].count(facelets[offset + 4]) == 9 for offset in range(0, 54, 9))
+
+
+    def stats(self):
+        """Returns cache counters.
+        Returns: dict with keys size, hits and misses"""
+
+        return {'size': len(self.compiled), 'hits': self.hits, 'misses': self.misses}
+
+
+# Shared compiler, used by FastRubiksSolver.apply_sequence
+COMPILER = MoveCompiler()
+
+
+
+if __name__ =='__main__':
+    solver = FastRubiksSolver(None)
+    algorithm = "R U R' U' R' F R2 U' R' U' R U R' F'"    # T permutation
+    sequence = COMPILER.compile(algorithm)
+    print(f"T perm: order {sequence.order()}, T perm squared is identity: {(sequence ** 2).is_identity()}")
+
+    count = 20000
+    start = perf_counter()
+    for _ in range(count):
+        for name in move_names(algorithm):
+            solver.apply_move(name)
+    one_by_one = count / (perf_counter() - start)
+    start = perf_counter()
+    for _ in range(count):
+        solver.apply_sequence(algorithm)
+    compiled = count / (perf_counter() - start)
+    print(f"Move by move: {one_by_one:>10,.0f} algorithms/s")
+    print(f"Compiled    : {compiled:>10,.0f} algorithms/s  ({compiled / one_by_one:.1f}x)")
@@ -0,0 +1,80 @@
+# Description: This script optimizes a decoded solution (i.e. [[side, direction], ...]) before it is executed by the bot.
+#              ...Half turns are kept as a single "half" move, consecutive moves of the same side are merged or
+#              ...cancelled, and moves of opposite sides (which commute) are looked through so U D U becomes U2 D.
+
+
+# Quarter turns (clockwise) made by each direction, and back
+QUARTERS = {'cw': 1, 'half': 2, 'ccw': 3}
+DIRECTIONS = {1: 'cw', 2: 'half', 3: 'ccw'}
+
+OPPOSITE = {'FACE': 'BACK', 'BACK': 'FACE', 'LEFT': 'RIGHT', 'RIGHT': 'LEFT', 'TOP': 'BOTTOM', 'BOTTOM': 'TOP'}
+
+# Seconds RubiksBot.turn_cube waits besides the servo_x sweep: clamp (0.5), release (0.5), revert (0.2) and flatten (0.2 + 0.5)
+TURN_CUBE_OVERHEAD = 0.5 + 0.5 + 0.2 + 0.2 + 0.5
+
+# Shortest servo_x sweep of each direction (RubiksBot.get_sleep_val of a 90 and a 180 degree sweep). A quarter turn that
+# wraps around the servo's 0-270 range sweeps 270 degrees (1.5 s) instead, see estimate_turn_seconds
+SWEEP_SECONDS = {'cw': 0.5, 'ccw': 0.5, 'half': 1.0}
+
+
+def optimize(moves):
+    """Returns an optimized copy of a decoded solution. Moves of the same side are merged when they are
+    next to each other, or separated only by a move of the opposite side. Moves that merge to nothing are dropped.
+    Args: moves= list of [side, direction] with direction cw, ccw or half
+    Returns: List"""
+
+    result = []     # [side, quarter turns]
+    for side, direction in moves:
+        quarters = QUARTERS[direction]
+
+        # Find the move to merge with
+        target = None
+        if result and result[-1][0] == side:
+            target = len(result) - 1
+        elif len(result) >= 2 and result[-1][0] == OPPOSITE[side] and result[-2][0] == side:
+            target = len(result) - 2
+
+        if target is None:
+            result.append([side, quarters])
+            continue
+
+        quarters = (result[target][1] + quarters) % 4
+        if quarters == 0:
+            del result[target]
+        else:
+            result[target][1] = quarters
+
+    return [[side, DIRECTIONS[quarters]] for side, quarters in result]
+
+
+def count_quarter_turns(moves):
+    """Number of quarter turns in a decoded solution (A half turn counts as two).
+    Returns: int"""
+
+    return sum(min(QUARTERS[direction], 4 - QUARTERS[direction]) for _, direction in moves)
+
+
+def estimate_turn_seconds(moves):
+    """Lower bound of the seconds RubiksBot spends in turn_cube for a decoded solution. Every sweep is taken at its
+    shortest; which turns wrap around servo_x's range (A 270 degree sweep) depends on the angle the regrips leave
+    servo_x at, so only the regrip planner knows the real time (See RegripPlanner.plan_seconds). Regrips are not included.
+    Returns: float"""
+
+    return sum(TURN_CUBE_OVERHEAD + SWEEP_SECONDS[direction] for _, direction in moves)
+
+
+def report(before, after):
+    """Compares a decoded solution before and after optimization. Quarter turns only drop when moves cancel,
+    while bot turns (turn_cube calls) also drop when two quarter turns become one half turn. seconds_saved compares
+    the estimate_turn_seconds lower bounds.
+    Returns: dict"""
+
+    return {
+        'quarter_turns_before': count_quarter_turns(before),
+        'quarter_turns_after': count_quarter_turns(after),
+        'quarter_turns_saved': count_quarter_turns(before) - count_quarter_turns(after),
+        'bot_turns_before': len(before),
+        'bot_turns_after': len(after),
+        'bot_turns_saved': len(before) - len(after),
+        'seconds_saved': round(estimate_turn_seconds(before) - estimate_turn_seconds(after), 2),
+    }
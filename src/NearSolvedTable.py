@@ -0,0 +1,251 @@
+from time import perf_counter
+import argparse
+import struct
+import numpy as np
+from CubieState import CubieState, N_TWIST, N_FLIP, N_CORNERS, N_EDGE4, N_MOVES, SOLVED, build_corners_move, build_edge4_move
+from Dataset import MOVE_BITS, unpack_moves
+from SolverBackends import BACKENDS, get_backend
+from TwoPhaseSolver import build_twist_move, build_flip_move
+
+# Description: This script builds and reads a lookup table of every state within N moves of solved, with an optimal solution
+#              ...for each. The table is generated breadth first over the cubie coordinate move tables and written sorted by
+#              ...state key, and the reader maps it with numpy.memmap and binary searches it, so a state near solved is solved
+#              ...in microseconds without calling the solver. States not in the table fall through to the solver backend.
+
+
+MAGIC = b'RKNT'
+VERSION = 1
+HEADER = struct.Struct('<4sHHHQ14x')   # magic, version, depth, solution bytes, state count
+KEY_BYTES = 11                          # 6 bytes of edge coordinates then 5 bytes of corner/orientation coordinates
+DEFAULT_DEPTH = 5                       # ~620k states, 10 MB. Depth 6 is ~8.2M states and takes a few GB to build
+
+
+def solution_bytes(depth):
+    """Returns the bytes one packed solution of up to 'depth' moves takes.
+    Returns: int"""
+
+    return (depth * MOVE_BITS + 7) // 8
+
+
+def coordinate_keys(twist, flip, corners, edges_u, edges_d, edges_slice):
+    """Packs arrays of cubie coordinates into table keys. A key is the CubieState key split in two big endian fields
+    (edges, then corners and orientations), so the keys sort in the same order as CubieState keys.
+    Returns: numpy.ndarray of KEY_BYTES bytes per state"""
+
+    twist, flip, corners, edges_u, edges_d, edges_slice = (np.asarray(column, dtype=np.uint64) for column in
+                                                           (twist, flip, corners, edges_u, edges_d, edges_slice))
+    edges = (edges_slice * np.uint64(N_EDGE4) + edges_d) * np.uint64(N_EDGE4) + edges_u
+    rest = (corners * np.uint64(N_FLIP) + flip) * np.uint64(N_TWIST) + twist
+    keys = np.empty((len(edges), KEY_BYTES), dtype=np.uint8)
+    keys[:, :6] = edges.astype('>u8').view(np.uint8).reshape(-1, 8)[:, 2:]
+    keys[:, 6:] = rest.astype('>u8').view(np.uint8).reshape(-1, 8)[:, 3:]
+    return keys.view(f'S{KEY_BYTES}').ravel()
+
+
+def state_key(state):
+    """Returns the table key of a CubieState (See coordinate_keys).
+    Returns: bytes"""
+
+    edges = (state.edges_slice * N_EDGE4 + state.edges_d) * N_EDGE4 + state.edges_u
+    rest = (state.corners * N_FLIP + state.flip) * N_TWIST + state.twist
+    return edges.to_bytes(6, 'big') + rest.to_bytes(5, 'big')
+
+
+def build_table(depth=DEFAULT_DEPTH, verbose=False):
+    """Finds every state within 'depth' moves of solved, breadth first, with the whole frontier advanced at once through
+    the coordinate move tables. Each state keeps the first (Shortest) move sequence that reaches it, and its solution is
+    that sequence inverted, so every solution is optimal in the half turn metric.
+    Returns: (numpy.ndarray keys sorted, numpy.ndarray solution lengths, numpy.ndarray packed solutions)"""
+
+    tables = [build_twist_move(), build_flip_move(), build_corners_move()] + [build_edge4_move()] * 3
+    tables = [table.astype(np.int64) for table in tables]
+    inverse_move = np.array([m - m % 3 + 2 - m % 3 for m in range(N_MOVES)], dtype=np.uint64)     # R <-> R', R2 <-> R2
+
+    # Frontier: the coordinates of the states found at the last depth, the moves that reached them and their last face
+    coords = [np.array([value]) for value in (SOLVED.twist, SOLVED.flip, SOLVED.corners,
+                                              SOLVED.edges_u, SOLVED.edges_d, SOLVED.edges_slice)]
+    paths = np.zeros((1, 0), dtype=np.uint8)
+    last_face = np.array([-1])
+    seen = coordinate_keys(*coords)
+    levels = [(seen, np.zeros(1, dtype=np.uint64), 0)]
+
+    for d in range(1, depth + 1):
+        # 1. Every move from every frontier state, skipping a second turn of the same face and opposite faces out of
+        # URF before DLB order (Both only reach states a shorter or equal sequence already reaches)
+        new_coords, new_paths, new_faces = [[] for _ in coords], [], []
+        for m in range(N_MOVES):
+            face = m // 3
+            keep = (last_face != face) & ~((last_face % 3 == face % 3) & (last_face > face))
+            for i, table in enumerate(tables):
+                new_coords[i].append(table[coords[i][keep], m])
+            new_paths.append(np.column_stack([paths[keep], np.full(keep.sum(), m, dtype=np.uint8)]))
+            new_faces.append(np.full(keep.sum(), face))
+        coords = [np.concatenate(column) for column in new_coords]
+        paths = np.concatenate(new_paths)
+        last_face = np.concatenate(new_faces)
+
+        # 2. Keep one copy of each state not found at a smaller depth
+        keys, first = np.unique(coordinate_keys(*coords), return_index=True)
+        new = ~np.isin(keys, seen, assume_unique=True)
+        keys, first = keys[new], first[new]
+        coords = [column[first] for column in coords]
+        paths = paths[first]
+        last_face = last_face[first]
+        seen = np.sort(np.concatenate([seen, keys]))
+
+        # 3. Solution: the path inverted, packed into 5 bit move codes
+        packed = np.zeros(len(keys), dtype=np.uint64)
+        for i in range(d):
+            packed |= inverse_move[paths[:, d - 1 - i]] << np.uint64(MOVE_BITS * i)
+        levels.append((keys, packed, d))
+        if verbose:
+            print(f"Depth {d}: {len(keys):>10,} states")
+
+    keys = np.concatenate([level[0] for level in levels])
+    lengths = np.concatenate([np.full(len(level[0]), level[2], dtype=np.uint8) for level in levels])
+    packed = np.concatenate([level[1] for level in levels])
+    order = np.argsort(keys, kind='stable')
+    moves = packed[order].astype('<u8').view(np.uint8).reshape(-1, 8)[:, :solution_bytes(depth)]
+    return keys[order], lengths[order], np.ascontiguousarray(moves)
+
+
+def write_table(path, depth=DEFAULT_DEPTH, verbose=False):
+    """Builds the table of 'depth' and writes it: the header, the sorted keys, the solution lengths, then the packed
+    solutions (Each section contiguous, so the keys can be searched without touching the solutions).
+    Returns: int number of states"""
+
+    keys, lengths, moves = build_table(depth, verbose)
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, depth, solution_bytes(depth), len(keys)))
+        file.write(keys.tobytes())
+        file.write(lengths.tobytes())
+        file.write(moves.tobytes())
+    return len(keys)
+
+
+class NearSolvedTable:
+    """Read only view of a table file. lookup() binary searches the memory mapped keys, so opening a table reads
+    nothing and a lookup touches about log2(count) keys.
+
+    *Counts the lookups that hit and missed, see stats()."""
+
+    def __init__(self, path) -> None:
+        """Constructor method for class. Raises ValueError if the file is not a table."""
+
+        with open(path, 'rb') as file:
+            magic, version, self.depth, width, self.count = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or width != solution_bytes(self.depth):
+            raise ValueError(f"{path} is not a version {VERSION} near solved table")
+        offset = HEADER.size
+        self.keys = np.memmap(path, dtype=f'S{KEY_BYTES}', mode='r', offset=offset, shape=(self.count,))
+        self.key_bytes = self.keys.view(np.uint8).reshape(self.count, KEY_BYTES)     # Exact bytes (S arrays strip trailing zeros)
+        offset += self.count * KEY_BYTES
+        self.lengths = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(self.count,))
+        offset += self.count
+        self.moves = np.memmap(path, dtype=np.uint8, mode='r', offset=offset, shape=(self.count, width))
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+
+
+    def __len__(self):
+        return self.count
+
+
+    def find(self, state):
+        """Returns the index of a CubieState in the table, or None.
+        Returns: int"""
+
+        key = state_key(state)
+        n = int(np.searchsorted(self.keys, key))
+        if n < self.count and self.key_bytes[n].tobytes() == key:
+            return n
+        return None
+
+
+    def lookup(self, cubestring):
+        """Returns an optimal solution of the state if it is within the table's depth of solved, else None.
+        A solved state returns an empty string.
+        Args: cubestring= 54 length kociemba string
+        Returns: str"""
+
+        n = self.find(CubieState.from_kociemba(cubestring))
+        if n is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return unpack_moves(int(self.lengths[n]), self.moves[n])
+
+
+    def solver(self, backend='kociemba'):
+        """Returns a solve function (Same as kociemba.solve) that answers from the table and calls the backend on a miss.
+        Args: backend= name of a backend (See SolverBackends.py) or a solve function
+        Returns: function"""
+
+        solve_fn = get_backend(backend) if isinstance(backend, str) else backend
+
+        def solve(cubestring):
+            solution = self.lookup(cubestring)
+            return solve_fn(cubestring) if solution is None else solution
+        return solve
+
+
+    def stats(self):
+        """Returns the lookup counters.
+        Returns: dict"""
+
+        lookups = self.hits + self.misses
+        return {
+            'depth': self.depth,
+            'states': self.count,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Build or test the lookup table of states near solved")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    build_parser = subparsers.add_parser('build', help="Build a table")
+    build_parser.add_argument('path')
+    build_parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH, help="Moves from solved covered by the table")
+    bench_parser = subparsers.add_parser('bench', help="Time table lookups against the solver on states near solved")
+    bench_parser.add_argument('path')
+    bench_parser.add_argument('--count', type=int, default=1000)
+    bench_parser.add_argument('--moves', type=int, default=None, help="Scramble length. Defaults to the table's depth + 1")
+    bench_parser.add_argument('--seed', type=int, default=0)
+    bench_parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend for misses")
+    args = parser.parse_args()
+
+    if args.command == 'build':
+        start = perf_counter()
+        count = write_table(args.path, args.depth, verbose=True)
+        print(f"Wrote {count:,} states to {args.path} in {perf_counter() - start:.1f} s")
+    else:
+        from Scrambler import scrambles
+        table = NearSolvedTable(args.path)
+        length = table.depth + 1 if args.moves is None else args.moves
+        states = list(scrambles(args.count, args.seed, moves=length))
+
+        # Solutions from the table must solve their state, and be no longer than the solver's
+        solve = table.solver(args.solver)
+        start = perf_counter()
+        solutions = [solve(state) for state in states]
+        seconds = perf_counter() - start
+        for state, solution in zip(states, solutions):
+            if not CubieState.from_kociemba(state).apply_moves(solution).is_solved():
+                raise SystemExit(f"Wrong solution {solution!r} for {state}")
+
+        stats = table.stats()
+        print(f"{args.count} states of {length} random moves: {seconds / args.count * 1e3:.3f} ms per solve, "
+              f"hit rate {stats['hit_rate']:.1%} ({stats['hits']} hits, {stats['misses']} misses)")
+
+        hit_states = [state for state, solution in zip(states, solutions) if len(solution.split()) <= table.depth]
+        start = perf_counter()
+        for state in hit_states:
+            table.lookup(state)
+        if hit_states:
+            print(f"Table hit: {(perf_counter() - start) / len(hit_states) * 1e6:.1f} us per lookup")
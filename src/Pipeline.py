@@ -0,0 +1,131 @@
+from contextlib import contextmanager
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter
+from RegripPlanner import execute_plan
+
+# Description: This script runs the stages of a solve at the same time instead of one after the other. The bot's servos are
+#              ...initialized in a background thread while the solver warms up and the cube state is read and solved. The
+#              ...regrip planner needs the whole solution, so the plan is handed to the bot's thread through a queue once it is
+#              ...made. Every stage is timed to show how much time the overlap hid.
+
+
+class StageTimer:
+    """Records the start and end time of named stages, from any thread."""
+
+    def __init__(self) -> None:
+        """Constructor method for class."""
+
+        self.start = perf_counter()
+        self.stages = {}    # name -> [start, end] in seconds since the timer was created
+        self.lock = Lock()
+
+
+    @contextmanager
+    def stage(self, name):
+        """Times the block as stage 'name'."""
+
+        begin = perf_counter() - self.start
+        try:
+            yield
+        finally:
+            with self.lock:
+                self.stages[name] = [begin, perf_counter() - self.start]
+
+
+    def report(self):
+        """Returns each stage's start, end and length, the wall time since the timer was created, and the seconds
+        hidden by overlapping stages (The sum of the stage lengths minus the wall time).
+        Returns: dict"""
+
+        with self.lock:
+            stages = {name: {'start': round(begin, 3), 'end': round(end, 3), 'seconds': round(end - begin, 3)}
+                      for name, (begin, end) in sorted(self.stages.items(), key=lambda item: item[1][0])}
+        wall = perf_counter() - self.start
+        total = sum(stage['seconds'] for stage in stages.values())
+        return {'stages': stages, 'wall_seconds': round(wall, 3), 'hidden_seconds': round(max(0.0, total - wall), 3)}
+
+
+class BotRunner:
+    """Connects a bot and executes the steps it is given, on a background thread. Steps are put on a queue and executed in
+    order once the bot is connected (See RegripPlanner.execute_plan for the step format)."""
+
+    def __init__(self, bot, solver=None, timer=None, on_step=None) -> None:
+        """Constructor method for class.
+        Args: bot= RubiksBot created with connect=False
+              solver= solver whose virtual cube is updated after every turn
+              timer= StageTimer the connect and execute stages are recorded on
+              on_step= function called after each executed step (See RegripPlanner.execute_plan)"""
+
+        self.bot = bot
+        self.solver = solver
+        self.timer = timer if timer is not None else StageTimer()
+        self.on_step = on_step
+        self.steps = Queue()
+        self.error = None
+        self.thread = Thread(target=self.run, name="BotRunner", daemon=True)
+
+
+    def start(self):
+        """Starts connecting the bot in the background.
+        Returns: BotRunner"""
+
+        self.thread.start()
+        return self
+
+
+    def run(self):
+        """Thread body. Errors are kept and raised again by join."""
+
+        try:
+            with self.timer.stage('connect'):
+                self.bot.connect()
+            first = self.steps.get()     # Wait for the first step, so execute only times the bot's own work
+            if first is None:
+                return
+            with self.timer.stage('execute'):
+                execute_plan(self.bot, self.stream(first), self.solver, self.on_step)
+        except Exception as error:
+            self.error = error
+
+
+    def stream(self, first):
+        """Yields 'first' and then every step put on the queue until the end marker."""
+
+        yield first
+        yield from iter(self.steps.get, None)
+
+
+    def put(self, step):
+        """Queues one step for execution."""
+
+        self.steps.put(step)
+
+
+    def close(self):
+        """Marks the end of the steps."""
+
+        self.steps.put(None)
+
+
+    def join(self):
+        """Waits for every queued step to be executed. Raises the error the thread stopped on, if any."""
+
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+
+    def shutdown(self, timeout=10.0):
+        """Stops the runner however the solve ended (Ex. the state was invalid, the solver raised, or every step ran):
+        marks the end, waits up to 'timeout' seconds for the thread so the servos are not left half initialized or
+        mid step, then closes the bot unless the thread stopped on an error.
+        Returns: Boolean True if the thread finished in time"""
+
+        self.close()
+        self.thread.join(timeout)
+        if self.thread.is_alive():
+            return False
+        if self.error is None:
+            self.bot.close()
+        return True
@@ -0,0 +1,248 @@
+import heapq
+from MoveOptimizer import OPPOSITE
+from Tracing import TRACER
+
+# Description: This script manages the RegripPlanner class, which plans every servo step needed to execute a solution on
+#              ...the bot. Instead of loading each side through the fixed load_instructions table, it searches over all
+#              ...24 cube orientations and the 4 servo_x angles, with step costs taken from the bot's own delay values,
+#              ...and picks the sequence of regrips and turns with the lowest total execution time for the whole solution.
+
+
+ANGLES = [0, 90, 180, 270]
+
+# How each revolution of the bot moves the sides between positions (Mirrors RubiksBot.update_bot_state): new[i] = old[gather[i]]
+X_CW_GATHER = [3, 0, 1, 2, 4, 5]
+X_CCW_GATHER = [1, 2, 3, 0, 4, 5]
+Y_GATHER = [4, 1, 5, 3, 2, 0]
+
+# Regrip steps and the orientation change each one makes
+REGRIP_STEPS = [(['x', 'cw'], X_CW_GATHER), (['x', 'ccw'], X_CCW_GATHER), (['y'], Y_GATHER)]
+
+
+def reorient(orientation, gather):
+    """Returns the orientation (tuple of sides by bot position) after a revolution.
+    Returns: tuple"""
+
+    return tuple(orientation[i] for i in gather)
+
+
+def group_moves(moves):
+    """Splits a decoded solution into groups whose moves may be executed in any order: a pair of moves on
+    opposite sides (which commute), or a single move. Each group is returned as the list of its possible orders.
+    Returns: List"""
+
+    groups = []
+    i = 0
+    while i < len(moves):
+        if i + 1 < len(moves) and moves[i+1][0] == OPPOSITE[moves[i][0]]:
+            groups.append([[moves[i], moves[i+1]], [moves[i+1], moves[i]]])
+            i += 2
+        else:
+            groups.append([[moves[i]]])
+            i += 1
+    return groups
+
+
+class RegripPlanner:
+    """Plans the execution of a decoded solution on a RubiksBot. A plan is a list of steps:
+    ['x', direction] (turn_bot_x), ['y'] (turn_bot_y) and ['turn', side, direction] (turn_cube)."""
+
+    def __init__(self, bot) -> None:
+        """Constructor method for class.
+        Args: bot= RubiksBot (or any object with the same delay values and angle methods) whose timing is planned for"""
+
+        self.bot = bot
+
+        # Step costs (seconds), from the bot's own delay values
+        self.flip_cost = bot.mid_flip_delay + bot.post_flip_delay + bot.flatten1_delay + bot.flatten2_delay
+        self.turn_overhead = bot.clamp_delay + bot.release_delay + bot.revert_delay + bot.flatten1_delay + bot.flatten2_delay
+
+        # Nodes: every (orientation, servo_x angle) pair reachable from the bot's starting orientation
+        orientations = [tuple(bot.bot_state)]
+        for orientation in orientations:
+            for _, gather in REGRIP_STEPS:
+                following = reorient(orientation, gather)
+                if following not in orientations:
+                    orientations.append(following)
+        self.nodes = [(orientation, angle) for orientation in orientations for angle in ANGLES]
+
+        # Shortest regrip path between every pair of nodes
+        self.paths = {node: self.shortest_paths(node) for node in self.nodes}
+
+
+    def regrip_edges(self, node):
+        """Returns the (step, next node, cost) of each regrip possible from 'node'.
+        Returns: List"""
+
+        orientation, angle = node
+        edges = []
+        for step, gather in REGRIP_STEPS:
+            if step[0] == 'x':
+                target = self.bot.get_target_angle(step[1], angle)
+                edges.append((step, (reorient(orientation, gather), target), self.bot.get_sleep_val(target, angle)))
+            else:
+                edges.append((step, (reorient(orientation, gather), angle), self.flip_cost))
+        return edges
+
+
+    def regrip(self, node, step):
+        """Returns the node after a single regrip step and the seconds it takes.
+        Returns: tuple (node, float)"""
+
+        return next((following, cost) for edge_step, following, cost in self.regrip_edges(node) if edge_step == step)
+
+
+    def shortest_paths(self, source):
+        """Dijkstra over regrip steps from 'source'.
+        Returns: dict of node -> (seconds, list of steps)"""
+
+        best = {source: (0.0, [])}
+        heap = [(0.0, 0, source)]
+        counter = 1
+        while heap:
+            cost, _, node = heapq.heappop(heap)
+            if cost > best[node][0]:
+                continue
+            for step, following, step_cost in self.regrip_edges(node):
+                new_cost = cost + step_cost
+                if following not in best or new_cost < best[following][0]:
+                    best[following] = (new_cost, best[node][1] + [step])
+                    heapq.heappush(heap, (new_cost, counter, following))
+                    counter += 1
+        return best
+
+
+    def turn(self, node, direction):
+        """Returns the node after turn_cube and the seconds it takes.
+        Returns: tuple (node, float)"""
+
+        orientation, angle = node
+        target = self.bot.get_target_angle(direction, angle)
+        return (orientation, target), self.turn_overhead + self.bot.get_sleep_val(target, angle)
+
+
+    def start_node(self):
+        """Node of the bot's current orientation and servo_x angle.
+        Returns: tuple"""
+
+        return (tuple(self.bot.bot_state), self.bot.curr_angle)
+
+
+    def plan(self, moves):
+        """Plans the fastest execution of a decoded solution from the bot's current orientation and angle.
+        Dynamic programming over the moves, keeping the best plan ending in each node, so regrips are chosen
+        with the rest of the solution in view. Moves on opposite sides are tried in both orders.
+        Args: moves= list of [side, direction] with direction cw, ccw or half
+        Returns: List of steps"""
+
+        layer = {self.start_node(): (0.0, [])}
+        for orders in group_moves(moves):
+            next_layer = {}
+            for order in orders:
+                current = layer
+                for side, direction in order:
+                    current = self.advance(current, side, direction)
+                for node, (cost, steps) in current.items():
+                    if node not in next_layer or cost < next_layer[node][0]:
+                        next_layer[node] = (cost, steps)
+            layer = next_layer
+
+        return min(layer.values(), key=lambda entry: entry[0])[1]
+
+
+    def advance(self, layer, side, direction):
+        """One step of the plan dynamic program: from every node of 'layer', regrip so 'side' sits at the
+        bottom (position 5) and turn it.
+        Returns: dict of node -> (seconds, steps)"""
+
+        following = {}
+        for node, (cost, steps) in layer.items():
+            for loaded, (regrip_cost, regrip_steps) in self.paths[node].items():
+                if loaded[0][5] != side:
+                    continue
+                turned, turn_cost = self.turn(loaded, direction)
+                total = cost + regrip_cost + turn_cost
+                if turned not in following or total < following[turned][0]:
+                    following[turned] = (total, steps + regrip_steps + [['turn', side, direction]])
+        return following
+
+
+    def baseline_plan(self, moves):
+        """The steps RubiksBot.load_side and turn_cube would take for the solution, using the fixed load_instructions table.
+        Returns: List of steps"""
+
+        steps = []
+        node = self.start_node()
+        for side, direction in moves:
+            for instruction in self.bot.load_instructions[str(node[0].index(side))]:
+                if instruction == 'y':
+                    step = ['y']
+                else:
+                    step = ['x', 'cw' if instruction[1] == 'c' else 'ccw']
+                steps.append(step)
+                node, _ = self.regrip(node, step)
+            steps.append(['turn', side, direction])
+            node, _ = self.turn(node, direction)
+        return steps
+
+
+    def plan_seconds(self, steps):
+        """Total execution time of a plan from the bot's current orientation and angle.
+        Returns: float"""
+
+        total = 0.0
+        node = self.start_node()
+        for step in steps:
+            if step[0] == 'turn':
+                node, cost = self.turn(node, step[2])
+            else:
+                node, cost = self.regrip(node, step)
+            total += cost
+        return total
+
+
+    def report(self, moves, steps):
+        """Compares a plan with the load_instructions baseline for the same solution.
+        Returns: dict"""
+
+        baseline = self.baseline_plan(moves)
+        baseline_seconds = self.plan_seconds(baseline)
+        planned_seconds = self.plan_seconds(steps)
+        return {
+            'baseline_seconds': round(baseline_seconds, 2),
+            'planned_seconds': round(planned_seconds, 2),
+            'seconds_saved': round(baseline_seconds - planned_seconds, 2),
+            'baseline_regrips': sum(step[0] != 'turn' for step in baseline),
+            'planned_regrips': sum(step[0] != 'turn' for step in steps),
+        }
+
+
+def execute_plan(bot, steps, solver=None, on_step=None):
+    """Executes a plan on the bot, updating the solver's virtual cube after every turn if one is given.
+    Returns once the bot's servos have completed the last step.
+    Args: on_step= function called with (index, step) once the servos have completed each step (Ex. Checkpoint.step_done).
+                   With an overlapping bot this waits for every step, so the next step no longer starts early"""
+
+    for index, step in enumerate(steps):
+        with TRACER.span('step', getattr(bot, 'clock', None), index=index, step=step):
+            execute_step(bot, step, solver)
+        if on_step is not None:
+            bot.finish()
+            on_step(index, step)
+    bot.finish()
+
+
+def execute_step(bot, step, solver=None):
+    """Executes one plan step on the bot (See execute_plan)."""
+
+    if step[0] == 'x':
+        bot.turn_bot_x(step[1])
+    elif step[0] == 'y':
+        bot.turn_bot_y()
+    else:
+        _, side, direction = step
+        if solver is not None:
+            solver.current_side_being_moved = side
+            solver.current_direction_of_rotation = direction
+            solver.make_move()
+        bot.turn_cube(direction)
@@ -0,0 +1,266 @@
+from queue import Empty, Full, Queue
+from threading import Lock, Thread
+from time import perf_counter
+import argparse
+from BatchSolver import solve_many
+from FastRubiksSolver import FastRubiksSolver
+from MoveOptimizer import optimize
+from RegripPlanner import RegripPlanner, execute_plan
+from RubiksBot import RubiksBot
+from RubiksSolver import RubiksSolver
+from SolverBackends import BACKENDS
+
+# Description: This script drives several bots (rigs) from one host. A shared solver pool solves the queued cubes and plans
+#              ...their regrips ahead of time, and every rig runs on its own thread, taking the next planned cube as soon
+#              ...as it is idle. Each rig gets the next cube in the placement orientation, so a plan fits whichever rig
+#              ...takes it. Reports the cubes, busy time and utilization of every rig and the cubes solved per hour.
+
+
+class Rig:
+    """One bot and the counters of the cubes it has executed."""
+
+    def __init__(self, name, bot) -> None:
+        """Constructor method for class.
+        Args: name= name the rig is reported under
+              bot= RubiksBot (Connected on the rig's thread if it is not yet)"""
+
+        self.name = name
+        self.bot = bot
+        self.cubes = 0
+        self.busy_seconds = 0.0     # Time spent executing plans, on the bot's clock
+        self.load_seconds = 0.0     # Time spent swapping cubes
+        self.wait_seconds = 0.0     # Time spent waiting for the solver pool to plan the next cube
+        self.start = None
+        self.end = None
+        self.error = None
+
+
+    def report(self):
+        """Returns the rig's counters. Utilization is the share of the rig's time spent executing plans; the rest of
+        the elapsed time is split into load_seconds and wait_seconds.
+        Returns: dict"""
+
+        elapsed = (self.end - self.start) if self.start is not None and self.end is not None else 0.0
+        return {
+            'name': self.name,
+            'cubes': self.cubes,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'load_seconds': round(self.load_seconds, 3),
+            'wait_seconds': round(self.wait_seconds, 3),
+            'elapsed_seconds': round(elapsed, 3),
+            'utilization': round(self.busy_seconds / elapsed, 3) if elapsed else 0.0,
+            'error': None if self.error is None else f"{type(self.error).__name__}: {self.error}",
+        }
+
+
+class RigScheduler:
+    """Assigns queued cubes to idle rigs.
+
+    *Each rig is timed on its own bot's clock. A virtual clock (See SimulatedBot.py) does not move while the rig waits
+     for the solver pool, so the rig moves it forward by the wall time it waited, and the cubes per hour of a
+     simulation include the solver's time."""
+
+    def __init__(self, bots, backend='kociemba', workers=None, load_seconds=0.0, lookahead=2) -> None:
+        """Constructor method for class.
+        Args: bots= list of RubiksBot, one per rig (Each with its own pins or pin factory)
+              backend= name of the solver backend (See SolverBackends.py)
+              workers= number of solver processes (See BatchSolver.solve_many)
+              load_seconds= time to take the solved cube out and place the next one, waited by the rig before each cube
+              lookahead= planned cubes kept waiting per rig"""
+
+        self.rigs = [Rig(f"rig{i}", bot) for i, bot in enumerate(bots)]
+        self.backend = backend
+        self.workers = workers
+        self.load_seconds = load_seconds
+        self.jobs = Queue(maxsize=max(1, lookahead * len(bots)))
+        self.results = []
+        self.lock = Lock()
+
+
+    def record(self, result):
+        """Stores the result of one cube."""
+
+        with self.lock:
+            self.results.append(result)
+
+
+    def plan_jobs(self, states):
+        """Feeder thread body. Solves the states over the pool and queues each one with its plan, then one end
+        marker per rig. Plans are made for a bot in the placement orientation (See RubiksBot.load_new_cube)."""
+
+        planner = RegripPlanner(RubiksBot(connect=False))
+        decoder = RubiksSolver(None)
+        try:
+            for result in solve_many(states, self.workers, backend=self.backend, ordered=False):
+                if result['error'] is not None:
+                    self.record({'index': result['index'], 'state': result['state'], 'error': result['error']})
+                    continue
+                moves = optimize(decoder.decode_after_kociemba(result['solution'], half_turns=True))
+                if not self.put((result, planner.plan(moves))):
+                    return
+        finally:
+            for _ in self.rigs:
+                self.put(None)
+
+
+    def put(self, job):
+        """Queues a job, giving up if every rig has stopped on an error.
+        Returns: Boolean True if queued"""
+
+        while any(rig.error is None for rig in self.rigs):
+            try:
+                self.jobs.put(job, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+
+    def run_rig(self, rig):
+        """Rig thread body. Executes planned cubes until the end marker. An error stops the rig, and is recorded with
+        the cube it happened on."""
+
+        bot = rig.bot
+        job = None
+        try:
+            if bot.servo_x is None:
+                bot.connect()
+            rig.start = bot.clock.now()
+            while True:
+                job = self.next_job(rig)
+                if job is None:
+                    break
+                result, plan = job
+                start = bot.clock.now()
+                bot.clock.sleep(self.load_seconds)
+                bot.load_new_cube()
+                rig.load_seconds += bot.clock.now() - start
+                solver = FastRubiksSolver(None)
+                solver.set_state_from_kociemba(result['state'])
+
+                start = bot.clock.now()
+                execute_plan(bot, plan, solver)
+                seconds = bot.clock.now() - start
+                rig.busy_seconds += seconds
+                rig.cubes += 1
+                self.record({'index': result['index'], 'state': result['state'], 'solution': result['solution'],
+                             'rig': rig.name, 'bot_seconds': round(seconds, 3), 'solved': solver.is_solved()})
+                job = None
+        except Exception as error:
+            rig.error = error
+            if job is not None:
+                self.record({'index': job[0]['index'], 'state': job[0]['state'], 'rig': rig.name,
+                             'error': f"{type(error).__name__}: {error}"})
+        finally:
+            rig.end = bot.clock.now()
+
+
+    def next_job(self, rig):
+        """Waits for the next planned cube, and counts the wait on the rig's clock (Moving a clock that did not move
+        while waiting forward by the wall time waited).
+        Returns: tuple (result, plan), or None at the end marker"""
+
+        clock = rig.bot.clock
+        clock_start = clock.now()
+        start = perf_counter()
+        job = self.jobs.get()
+        waited = perf_counter() - start
+        missing = waited - (clock.now() - clock_start)
+        if missing > 0:
+            clock.sleep(missing)
+        rig.wait_seconds += clock.now() - clock_start
+        return job
+
+
+    def run(self, states):
+        """Solves and executes every state, and waits for the rigs to finish.
+        Args: states= iterable of 54 length kociemba strings
+        Returns: dict with keys rigs (See Rig.report), cubes, errors, makespan_seconds (longest rig time),
+                 cubes_per_hour and wall_seconds"""
+
+        start = perf_counter()
+        threads = [Thread(target=self.run_rig, args=(rig,), name=rig.name, daemon=True) for rig in self.rigs]
+        threads.append(Thread(target=self.plan_jobs, args=(states,), name="Planner", daemon=True))
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Cubes left queued if every rig stopped
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except Empty:
+                break
+            if job is not None:
+                self.record({'index': job[0]['index'], 'state': job[0]['state'], 'error': "No rig left to execute the cube"})
+
+        rigs = [rig.report() for rig in self.rigs]
+        cubes = sum(rig['cubes'] for rig in rigs)
+        makespan = max(rig['elapsed_seconds'] for rig in rigs)
+        return {
+            'rigs': rigs,
+            'cubes': cubes,
+            'errors': sum('error' in result for result in self.results),
+            'makespan_seconds': makespan,
+            'cubes_per_hour': round(3600 * cubes / makespan, 1) if makespan else 0.0,
+            'wall_seconds': round(perf_counter() - start, 3),
+        }
+
+
+def simulated_bots(count, overlap=False):
+    """Returns 'count' connected SimulatedRubiksBots on different mock pins.
+    Returns: List"""
+
+    from SimulatedBot import SimulatedRubiksBot
+    return [SimulatedRubiksBot(overlap=overlap, servo_x_pin=2 + 2 * i, servo_y_pin=3 + 2 * i) for i in range(count)]
+
+
+def parse_rig(text):
+    """Parses a --rig value: X_PIN,Y_PIN[,HOST]. HOST is a pigpio daemon on another Pi.
+    Returns: RubiksBot (Not connected)"""
+
+    fields = text.split(",")
+    if len(fields) not in (2, 3):
+        raise argparse.ArgumentTypeError(f"Expected X_PIN,Y_PIN[,HOST], got {text}")
+    factory = None
+    if len(fields) == 3:
+        from gpiozero.pins.pigpio import PiGPIOFactory
+        factory = PiGPIOFactory(host=fields[2])
+    return RubiksBot(factory, connect=False, servo_x_pin=int(fields[0]), servo_y_pin=int(fields[1]))
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Solve queued cubes on several bots")
+    parser.add_argument('--rig', action='append', default=[], metavar='X_PIN,Y_PIN[,HOST]', help="A bot to drive. Repeat for more bots")
+    parser.add_argument('--simulate', type=int, default=0, metavar='N', help="Drive N simulated bots instead")
+    parser.add_argument('--states', metavar='PATH', help="File of states, one per line. Defaults to random states")
+    parser.add_argument('--count', type=int, default=20, help="Number of random states")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend")
+    parser.add_argument('--workers', type=int, default=None, help="Solver processes. Defaults to the CPU count")
+    parser.add_argument('--load-seconds', type=float, default=10.0, help="Time to swap the cube on a rig between solves")
+    parser.add_argument('--overlap', action='store_true', help="With --simulate, let the servos move at the same time")
+    args = parser.parse_args()
+
+    bots = simulated_bots(args.simulate, args.overlap) if args.simulate else [parse_rig(rig) for rig in args.rig]
+    if not bots:
+        parser.error("Give at least one --rig, or --simulate N")
+    if args.states:
+        with open(args.states) as file:
+            states = [line.strip() for line in file if line.strip()]
+    else:
+        from Scrambler import scrambles
+        states = list(scrambles(args.count, args.seed))
+
+    report = RigScheduler(bots, args.solver, args.workers, args.load_seconds).run(states)
+    for rig in report['rigs']:
+        print(f"{rig['name']}: {rig['cubes']:>4} cubes, busy {rig['busy_seconds']:>8.1f} s of {rig['elapsed_seconds']:>8.1f} s "
+              f"({rig['utilization']:.0%}), loading {rig['load_seconds']:.1f} s, waiting for the solver {rig['wait_seconds']:.1f} s"
+              f"{'  ' + rig['error'] if rig['error'] else ''}")
+    print(f"{report['cubes']} cubes in {report['makespan_seconds']:.1f} s: {report['cubes_per_hour']:.0f} cubes/hour "
+          f"({report['errors']} errors, {report['wall_seconds']:.2f} s wall)")
+    for bot in bots:
+        if bot.servo_x is not None:
+            bot.close()
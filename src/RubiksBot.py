@@ -1,6 +1,5 @@
-from time import sleep
-from gpiozero import AngularServo
-from gpiozero.pins.pigpio import PiGPIOFactory
+from time import sleep, perf_counter
+from MotionScheduler import MotionScheduler
 
 
 
@@ -8,12 +7,44 @@ from gpiozero.pins.pigpio import PiGPIOFactory
 #              ...to the Rubiks cube. Each of which are executed through commands to the motors.
 
 
+class RealClock:
+    """Wall clock used by the physical bot. Every wait of the bot goes through its clock, so a
+    simulated bot can swap in a virtual one (See SimulatedBot.py)."""
+
+    def sleep(self, seconds):
+        """Blocks for 'seconds'."""
+
+        sleep(seconds)
+
+
+    def now(self):
+        """Returns the current time in seconds.
+        Returns: float"""
+
+        return perf_counter()
+
+
 class RubiksBot:
     """Class represting controls for the phsyical bot. Used for making directional rotations, 
     revolutions and such to the Rubik's cube through use of the two servo motors."""
 
-    def __init__(self) -> None:
-        """Contructor class for the RubiksBot class."""
+    def __init__(self, pin_factory=None, clock=None, overlap=False, connect=True, servo_x_pin=21, servo_y_pin=19) -> None:
+        """Contructor class for the RubiksBot class.
+        Args: pin_factory= gpiozero pin factory driving the servos. Defaults to a PiGPIOFactory (Pass one with a host
+                           to drive a bot on another Pi, Ex. PiGPIOFactory(host='rig2.local'))
+              clock= clock used for every wait. Defaults to a RealClock
+              overlap= let servo_x and servo_y move at the same time where the steps allow it (See MotionScheduler.py)
+              connect= initialize the servos now. If False, call connect() before moving the bot
+              servo_x_pin, servo_y_pin= GPIO pins of the two servos"""
+
+        self.clock = clock if clock is not None else RealClock()
+        self.pin_factory = pin_factory
+        self.servo_x_pin = servo_x_pin
+        self.servo_y_pin = servo_y_pin
+        self.overlap = overlap
+        self.servo_x = None     # Set by connect
+        self.servo_y = None
+        self.scheduler = None
 
         # * Cube placement: When cube is placed in bot, the bottom side must be face down with the face side direction opposite of the hinge
 
@@ -35,6 +66,10 @@ class RubiksBot:
         self.mid_flip_delay = 0.3   # Mid Flip delay  (Much long to wait after servo_y has been moved to flip position)
         self.flatten1_delay = 0.2
         self.flatten2_delay = 0.5
+        self.post_flip_delay = 0.5  # Wait after servo_y returns from the flip position
+        self.clamp_delay = 0.5      # Wait after lowering the hood to clamp the cube, before rotating a side
+        self.release_delay = 0.5    # Wait after raising the hood once a side has been rotated
+        self.revert_delay = 0.2     # Wait after servo_x reverts the over turn buffer
     
         """ Servo x values """
         # Servo x servo angle to common angle value conversion
@@ -49,7 +84,6 @@ class RubiksBot:
 
         # [minPulse, MaxPulse, InitialAngle, minAngle, maxAngle]  
         self.vals = [0.0004, 0.0045, 4, 0, 144]
-        initial_angle_x = self.vals[2]
         self.ccw_angle = -90
         self.cw_angle = 90
         self.curr_angle = 0
@@ -61,21 +95,76 @@ class RubiksBot:
         self.flip_angle = initial_angle_y*(-1)
         self.flatten_angle = initial_angle_y*3 
 
+        if connect:
+            self.connect()
+
 
-        # Initialize both servos
-        factory = PiGPIOFactory()
-        servo_x_pin = 21
-        servo_y_pin = 19
-        self.servo_x =  AngularServo(servo_x_pin, pin_factory = factory, initial_angle=initial_angle_x,
+    def connect(self):
+        """Initializes both servos (Blocks for about 1.5s while servo_x moves to its initial angle). Nothing
+        else in the bot depends on the servos, so this can run in a background thread while a solution is found."""
+
+        initial_angle_x = self.vals[2]
+        initial_angle_y = self.neutral_angle
+
+        # Initialize both servos (gpiozero is imported here, so a bot that is never connected can be used for its
+        # timings without it, Ex. RegripPlanner(RubiksBot(connect=False)))
+        from gpiozero import AngularServo
+        if self.pin_factory is None:
+            from gpiozero.pins.pigpio import PiGPIOFactory    # Only needed (and only importable) on the Pi
+            self.pin_factory = PiGPIOFactory()
+        factory = self.pin_factory
+        self.servo_x =  AngularServo(self.servo_x_pin, pin_factory = factory, initial_angle=initial_angle_x,
                     min_angle=self.vals[3], max_angle=self.vals[4],
                     min_pulse_width=self.vals[0], max_pulse_width=self.vals[1])
-        sleep(1.5)
+        self.clock.sleep(1.5)
     
-        self.servo_y = AngularServo(servo_y_pin, pin_factory = factory, initial_angle=initial_angle_y,
+        self.servo_y = AngularServo(self.servo_y_pin, pin_factory = factory, initial_angle=initial_angle_y,
                     min_angle=-180, max_angle=180,
                     min_pulse_width=0.0005, max_pulse_width=0.00315)
+
+        if self.overlap:
+            self.scheduler = MotionScheduler(self.clock)
+
+
+    def move_servo(self, name, angle, hold, waits='xy', deferrable=False):
+        """Moves servo 'name' (x or y) to 'angle' and keeps it busy for 'hold' seconds. Without overlap this is
+        a plain move and sleep. With overlap the move only waits for the servos in 'waits' to be idle, and a
+        'deferrable' move may be dropped if the next one makes it redundant (See MotionScheduler.move)."""
+
+        servo = self.servo_x if name == 'x' else self.servo_y
+        if self.scheduler is None:
+            servo.angle = angle
+            self.clock.sleep(hold)
+        else:
+            self.scheduler.move(name, servo, angle, hold, waits, deferrable)
+
+
+    def finish(self):
+        """Waits until both servos have completed their last move."""
+
+        if self.scheduler is not None:
+            self.scheduler.finish()
+
+
+    def close(self):
+        """Waits for the last move, then releases both servos and their pins."""
+
+        self.finish()
+        self.servo_x.close()
+        self.servo_y.close()
         
 
+    def load_new_cube(self):
+        """Gets the bot ready for the next cube: servo_x returns to its start angle while the bot is empty, and
+        bot_state is reset to the placement orientation (See Main.py). Plans made for a new bot then apply as is."""
+
+        if self.curr_angle != 0:
+            self.move_servo('x', self.angle_conv['0'], self.get_sleep_val(0))
+            self.curr_angle = 0
+        self.finish()
+        self.bot_state = ['FACE', 'RIGHT', 'BACK', 'LEFT', 'TOP', 'BOTTOM']
+
+
     def update_bot_state(self, specifics):
         """Updates the class variable bot_state after each cube revolution."""
 
@@ -112,10 +201,9 @@ class RubiksBot:
         """Lowers the top cover down close enough to touch the top of the cube, flattening any regions
         that stick out."""
 
-        self.servo_y.angle = self.flatten_angle
-        sleep(self.flatten1_delay)
-        self.servo_y.angle = self.neutral_angle
-        sleep(self.flatten2_delay)
+        # Only servo_y is involved, so a flatten can start while servo_x is still reverting a turn
+        self.move_servo('y', self.flatten_angle, self.flatten1_delay, waits='y')
+        self.move_servo('y', self.neutral_angle, self.flatten2_delay, waits='y', deferrable=True)   # Skipped if the hood is lowered again next
 
 
     def load_side(self, side):
@@ -154,13 +242,14 @@ class RubiksBot:
             return -3
     
 
-    def get_sleep_val(self, angles_moved):
+    def get_sleep_val(self, angles_moved, curr_angle=None):
         """Returns a value that represents how long the program will pause
         to allow the motor to execute a turn. This value varys depending on
         the duration of the turn.
+        Args: curr_angle= angle the turn starts from. Defaults to self.curr_angle
         Returns: float"""
 
-        ca = self.curr_angle
+        ca = self.curr_angle if curr_angle is None else curr_angle
         na = angles_moved
         
         diff = abs(ca - na)
@@ -172,44 +261,57 @@ class RubiksBot:
             return 1.5
 
 
+    def get_target_angle(self, direction, curr_angle=None):
+        """Returns the angle (0, 90, 180 or 270) servo_x ends at after turning in 'direction'.
+        Args: direction= direction of rotation (cw, ccw or half)
+              curr_angle= angle the turn starts from. Defaults to self.curr_angle
+        Returns: int"""
+
+        ca = self.curr_angle if curr_angle is None else curr_angle
+
+        angle_factor = self.cw_angle if direction == 'cw' else self.ccw_angle
+        if direction == 'half':     # Sweep 180deg whichever way stays within 0-270
+            return ca + 180 if ca + 180 <= 270 else ca - 180
+        elif ca + angle_factor < 0:
+            return 270
+        elif ca + angle_factor > 270:
+            return 0
+        else:
+            return ca + angle_factor
+
+
     def turn_bot_x(self, direction, action='turn_bot'):
         """Rotates servo_x, either revolving or rotating the cube.
-        Args: direction= direction of rotation (cw or ccw).
+        Args: direction= direction of rotation (cw, ccw or half). half is a single 180deg sweep and is only used to rotate the cube.
               action= intention behind turn (turn_bot or turn_cube)
         """
         
         sleep_val = None
+        servo_x_angle = None
 
         # Update class data structure (Only if the cube is being revolved and not rotated)
         self.update_bot_state([direction, "x", 'bot']) if action == 'turn_bot' else None
         
         # Determine target angle
-        angle_factor = self.cw_angle if direction == 'cw' else self.ccw_angle
-        target_angle = None
-        if self.curr_angle + angle_factor < 0:
-            target_angle = 270
-        elif self.curr_angle + angle_factor > 270:
-            target_angle = 0
-        else:
-            target_angle = self.curr_angle + angle_factor
+        target_angle = self.get_target_angle(direction)
 
 
         # Perform physical turn
         buffer = self.get_buffer_val(target_angle) if action == 'turn_cube' else 0
         
         if self.curr_angle == 0 and target_angle == 270:  # Triggers a 270deg cw turn
-            self.servo_x.angle = self.angle_conv['270'] + buffer  # Buffer= +*
+            servo_x_angle = self.angle_conv['270'] + buffer  # Buffer= +*
             self.curr_angle = 270
             sleep_val = 1.5
         elif self.curr_angle == 270 and target_angle == 0:  # Triggers a 270deg ccw turn
-            self.servo_x.angle = self.angle_conv['0'] + buffer  # Buffer= -*
+            servo_x_angle = self.angle_conv['0'] + buffer  # Buffer= -*
             self.curr_angle = 0
             sleep_val = 1.5
         else:
             sleep_val = self.get_sleep_val(target_angle)
-            self.servo_x.angle = self.angle_conv[str(target_angle)] + buffer
+            servo_x_angle = self.angle_conv[str(target_angle)] + buffer
             self.curr_angle = target_angle
-        sleep(sleep_val)
+        self.move_servo('x', servo_x_angle, sleep_val)
 
 
     def turn_bot_y(self):
@@ -219,28 +321,23 @@ class RubiksBot:
         self.update_bot_state([None, "y", 'bot'])
 
         # Perform physical turn
-        self.servo_y.angle = self.flip_angle
-        sleep(self.mid_flip_delay)
-        self.servo_y.angle = self.neutral_angle
-        sleep(0.5)
+        self.move_servo('y', self.flip_angle, self.mid_flip_delay)
+        self.move_servo('y', self.neutral_angle, self.post_flip_delay)
         
         self.flatten_cube()  # Flatten cube
         
 
     def turn_cube(self, direction):
         """Rotates the current loaded side in the specified direction.
-        Args: direction= direction of rotation (cw or ccw)."""
+        Args: direction= direction of rotation (cw, ccw or half)."""
 
         # Perform physical turn
-        self.servo_y.angle = self.rotate_angle  # Lower hood to clamp cube
-        sleep(0.5)
+        self.move_servo('y', self.rotate_angle, self.clamp_delay)  # Lower hood to clamp cube
         self.turn_bot_x(direction, "turn_cube")      # Rotate cube side by calling function
-        self.servo_y.angle = self.neutral_angle
-        sleep(0.5)
+        self.move_servo('y', self.neutral_angle, self.release_delay)
         
         # Revert to position minus buffer
-        self.servo_x.angle = self.angle_conv[str(self.curr_angle)]
-        sleep(0.2)
+        self.move_servo('x', self.angle_conv[str(self.curr_angle)], self.revert_delay)
         
         self.flatten_cube()  # Flatten cube
         
@@ -1,7 +1,7 @@
 from time import sleep
-import kociemba
 import copy
 import random
+from SolverBackends import get_backend
 
 # Description: This script manages the RubiksSolver class, which holds the virtual representation of the Rubiks cube and
 #              ...also methods for accessing solution to any cube orientation using the kociemba algorithm.
@@ -77,17 +77,18 @@ class RubiksSolver:
         }
 
 
-    def start(self):
+    def start(self, backend='kociemba'):
         """Driver function. 
 
         *This function is to be called only by this class when 
-        running this script individually, and not by main.py."""
+        running this script individually, and not by main.py.
+        Args: backend= name of the solver backend (See SolverBackends.py)"""
 
         self.randomize()    # Scramble cube
 
         kociemba_input = self.encode_before_kociemba()          # Prepare input for kociemba using current cube state
 
-        kociemba_output = kociemba.solve(kociemba_input)        # Access the solution string
+        kociemba_output = get_backend(backend)(kociemba_input)  # Access the solution string
         print(kociemba_output)
 
         decoded_solution = self.decode_after_kociemba(kociemba_output)  # Decode the solution into a list of moves
@@ -125,10 +126,12 @@ class RubiksSolver:
         return state_str
 
 
-    def decode_after_kociemba(self, kociemba_solution):
+    def decode_after_kociemba(self, kociemba_solution, half_turns=False):
         """Takes the solution string returned from the kociemba module and 
         deciphers it to a nested list (i.e. [[side, direction], ...] ) that 
         consists of moves that need to be made to solve the cube.
+        Args: half_turns= keep half turns (Ex. R2) as a single [side, "half"] move
+              instead of two quarter turns. Defaults to False
         Returns: List"""
 
         code_to_side_conversion = {
@@ -152,6 +155,9 @@ class RubiksSolver:
             elif len(i) == 2 and "'" in i:  # Ex: R'
                 move = [code_to_side_conversion[i[0]], "ccw"]
                 moves.append(move)
+            elif len(i) >= 2 and "2" in i and half_turns:  # Ex: R2 or R2' as one half turn
+                move = [code_to_side_conversion[i[0]], "half"]
+                moves.append(move)
             elif len(i) == 2 and "2" in i:  # Ex: R2
                 move = [code_to_side_conversion[i[0]], "cw"]
                 moves.append(move)
@@ -163,7 +169,25 @@ class RubiksSolver:
         
         # Return decoded solution
         return moves
-  
+
+
+    def encode_packed(self):
+        """Packs the current cube state into the dataset record form (See Dataset.py).
+        Returns: bytes"""
+
+        from Dataset import pack_state
+        return pack_state(self.encode_before_kociemba())
+
+
+    def decode_packed(self, length, data, half_turns=False):
+        """Decodes a solution stored as dataset move codes, like decode_after_kociemba.
+        Args: length= number of moves
+              data= packed move codes (Ex. the moves field of a Dataset record)
+        Returns: List"""
+
+        from Dataset import unpack_moves
+        return self.decode_after_kociemba(unpack_moves(length, data), half_turns)
+
 
     def execute_solution(self, solution):
         """Executes the passed list of solutions, one by one.
@@ -191,6 +215,14 @@ class RubiksSolver:
         """Updates the state of the cube. Use to update cube after a turn
         has been made."""
 
+        # Half turns are made as two clockwise quarter turns
+        if self.current_direction_of_rotation == "half":
+            self.current_direction_of_rotation = "cw"
+            self.update_cube_state()
+            self.update_cube_state()
+            self.current_direction_of_rotation = "half"
+            return
+
         # 1. Make copy of existing state of the side being rotated (This will not be altered and will be for reference while actual list is being modified)
         #prev_state = self.cube_state[self.current_side_being_moved].copy()
         prev_state = copy.deepcopy(self.cube_state[self.current_side_being_moved])  # Deepcopy
@@ -0,0 +1,101 @@
+from time import perf_counter
+import argparse
+import random
+from CubieCube import CubieCube, MOVE_NAMES, perm_parity, perm_unrank
+from CubieState import SOLVED
+
+# Description: This script generates scrambled cube states. The default draws every legal state with equal probability by
+#              ...picking the corner and edge permutations and orientations directly, then fixing the permutation parity
+#              ...so the state can be reached. The move mode makes a random move sequence of a set length that never turns
+#              ...the same face twice in a row or turns opposite faces in both orders. Both are seeded and stream states
+#              ...one at a time, so millions can be written without holding them in memory.
+
+
+def random_cubie(rng):
+    """Returns a uniformly random legal CubieCube.
+    Args: rng= random.Random to draw from
+    Returns: CubieCube"""
+
+    # 1. Permutations (Swapping two edges when the parities differ keeps the edge permutation uniform)
+    cp = perm_unrank(rng.randrange(40320), 8)
+    ep = list(range(12))
+    rng.shuffle(ep)
+    if perm_parity(cp) != perm_parity(ep):
+        ep[0], ep[1] = ep[1], ep[0]
+
+    # 2. Orientations (The last corner and edge are fixed by the others)
+    co = [rng.randrange(3) for _ in range(7)]
+    co.append(-sum(co) % 3)
+    eo = [rng.randrange(2) for _ in range(11)]
+    eo.append(sum(eo) % 2)
+    return CubieCube(cp, co, ep, eo)
+
+
+def random_moves(length, rng):
+    """Returns a random move sequence with no trivial cancellations: a face is never turned twice in a row, and two
+    opposite faces in a row are always in URF before DLB order (So U D U and D U are never made).
+    Args: length= number of moves
+          rng= random.Random to draw from
+    Returns: List of moves in kociemba notation"""
+
+    moves = []
+    last = None
+    for _ in range(length):
+        while True:
+            face = rng.randrange(6)
+            if last is None or (face != last and not (face % 3 == last % 3 and face < last)):
+                break
+        moves.append(MOVE_NAMES[face * 3 + rng.randrange(3)])
+        last = face
+    return moves
+
+
+def scrambles(count=None, seed=None, moves=None):
+    """Yields scrambled states, one at a time.
+    Args: count= number of states. Defaults to never stopping
+          seed= seed of the states. The same seed gives the same states
+          moves= length of the random move sequence of each state. Defaults to uniformly random states
+    Yields: 54 length kociemba strings"""
+
+    rng = random.Random(seed)
+    made = 0
+    while count is None or made < count:
+        if moves is None:
+            yield random_cubie(rng).to_kociemba()
+        else:
+            yield SOLVED.apply_moves(random_moves(moves, rng)).to_kociemba()
+        made += 1
+
+
+def write_scrambles(path, count, seed=None, moves=None):
+    """Writes scrambled states to 'path', one per line (See scrambles).
+    Returns: int number of states written"""
+
+    written = 0
+    with open(path, 'w') as file:
+        for state in scrambles(count, seed, moves):
+            file.write(state + "\n")
+            written += 1
+    return written
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Generate scrambled cube states (54 length kociemba strings)")
+    parser.add_argument('count', type=int, help="Number of states")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--moves', type=int, default=None, help="Scramble with this many random moves instead of drawing uniformly")
+    parser.add_argument('--output', default=None, help="File to write the states to. Defaults to stdout")
+    parser.add_argument('--rate', action='store_true', help="Only print how many states per second are generated")
+    args = parser.parse_args()
+
+    if args.rate:
+        start = perf_counter()
+        for _ in scrambles(args.count, args.seed, args.moves):
+            pass
+        print(f"{args.count / (perf_counter() - start):,.0f} states/s")
+    elif args.output:
+        write_scrambles(args.output, args.count, args.seed, args.moves)
+    else:
+        for state in scrambles(args.count, args.seed, args.moves):
+            print(state)
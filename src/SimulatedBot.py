@@ -0,0 +1,188 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import json
+import warnings
+from gpiozero.exc import PWMSoftwareFallback
+from gpiozero.pins.mock import MockFactory, MockPWMPin
+from RubiksBot import RubiksBot
+
+# Description: This script manages the SimulatedRubiksBot class, a hardware free RubiksBot. The servos are driven through
+#              ...gpiozero's mock pins and every wait goes to a virtual clock, so a whole solve runs instantly while the
+#              ...bot still adds up the physical time each action would have taken and records every servo command.
+
+
+class VirtualClock:
+    """Clock that never blocks. sleep only moves the clock's time forward."""
+
+    def __init__(self) -> None:
+        """Constructor method for class."""
+
+        self.time = 0.0
+
+
+    def sleep(self, seconds):
+        """Advances the clock by 'seconds'."""
+
+        self.time += seconds
+
+
+    def now(self):
+        """Returns the current virtual time in seconds.
+        Returns: float"""
+
+        return self.time
+
+
+class TracedServo:
+    """Wraps a servo so every angle command is recorded in a trace along with the clock time it was given at."""
+
+    def __init__(self, servo, name, clock, trace) -> None:
+        """Constructor method for class.
+        Args: servo= servo being wrapped (Ex. AngularServo)
+              name= name the servo is recorded under (Ex. x, y)
+              clock= clock the command times are read from
+              trace= list the commands are appended to"""
+
+        self.servo = servo
+        self.name = name
+        self.clock = clock
+        self.trace = trace
+
+
+    @property
+    def angle(self):
+        """Current angle of the wrapped servo."""
+
+        return self.servo.angle
+
+
+    @angle.setter
+    def angle(self, value):
+        """Records the command, then sends it to the wrapped servo."""
+
+        self.trace.append({'time': round(self.clock.now(), 6), 'servo': self.name, 'angle': value})
+        self.servo.angle = value
+
+
+    def __getattr__(self, name):
+        """Everything else goes to the wrapped servo."""
+
+        return getattr(self.servo, name)
+
+
+class SimulatedRubiksBot(RubiksBot):
+    """RubiksBot running on gpiozero mock pins and a VirtualClock. Same moves, same bot_state tracking and
+    same delays as the physical bot, but no waiting: the time each action would take is added up instead.
+
+    *Action times are inclusive. turn_cube's time also counts under the turn_bot_x and flatten_cube it calls.
+     With overlap, an action's time is how long it held up the caller, and elapsed() is only final after finish()."""
+
+    ACTIONS = ['turn_bot_x', 'turn_bot_y', 'flatten_cube', 'turn_cube']
+
+    def __init__(self, clock=None, overlap=False, connect=True, servo_x_pin=21, servo_y_pin=19) -> None:
+        """Constructor method for class.
+        Args: clock= clock used for every wait. Defaults to a new VirtualClock
+              overlap= let the servos move at the same time (See RubiksBot.__init__)
+              connect= initialize the servos now (See RubiksBot.__init__)
+              servo_x_pin, servo_y_pin= mock pins of the two servos. Bots used at the same time need different pins"""
+
+        self.trace = []
+        self.action_seconds = defaultdict(float)
+        self.action_counts = defaultdict(int)
+        self.start_time = None
+
+        # Mock pins are shared by every mock factory, so a previous bot on the same pins must be closed first
+        super().__init__(MockFactory(pin_class=MockPWMPin), clock if clock is not None else VirtualClock(), overlap, connect,
+                         servo_x_pin, servo_y_pin)
+
+
+    def connect(self):
+        """See RubiksBot.connect. The servos are wrapped so their commands are traced."""
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', PWMSoftwareFallback)    # Servo jitter does not apply to mock pins
+            super().connect()
+
+        self.servo_x = TracedServo(self.servo_x, 'x', self.clock, self.trace)
+        self.servo_y = TracedServo(self.servo_y, 'y', self.clock, self.trace)
+        self.start_time = self.clock.now()     # Excludes the 1.5s servo start up wait
+
+
+    @contextmanager
+    def timed(self, action):
+        """Adds the clock time spent inside the block to 'action'."""
+
+        start = self.clock.now()
+        try:
+            yield
+        finally:
+            self.action_seconds[action] += self.clock.now() - start
+            self.action_counts[action] += 1
+
+
+    def flatten_cube(self):
+        """See RubiksBot.flatten_cube."""
+
+        with self.timed('flatten_cube'):
+            super().flatten_cube()
+
+
+    def turn_bot_x(self, direction, action='turn_bot'):
+        """See RubiksBot.turn_bot_x."""
+
+        with self.timed('turn_bot_x'):
+            super().turn_bot_x(direction, action)
+
+
+    def turn_bot_y(self):
+        """See RubiksBot.turn_bot_y."""
+
+        with self.timed('turn_bot_y'):
+            super().turn_bot_y()
+
+
+    def turn_cube(self, direction):
+        """See RubiksBot.turn_cube."""
+
+        with self.timed('turn_cube'):
+            super().turn_cube(direction)
+
+
+    def elapsed(self):
+        """Seconds of physical time the bot's actions would have taken since it was connected.
+        Returns: float"""
+
+        return self.clock.now() - self.start_time
+
+
+    def summary(self):
+        """Returns the total simulated time and the count and seconds of each action.
+        Returns: dict"""
+
+        return {
+            'seconds': round(self.elapsed(), 3),
+            'actions': {action: {'count': self.action_counts[action], 'seconds': round(self.action_seconds[action], 3)}
+                        for action in self.ACTIONS},
+            'servo_commands': len(self.trace),
+        }
+
+
+    def write_trace(self, path):
+        """Writes the servo command trace to 'path', one JSON object per line."""
+
+        with open(path, 'w') as file:
+            for command in self.trace:
+                file.write(json.dumps(command) + "\n")
+
+
+
+if __name__ =='__main__':
+    # Time loading every side of the cube and turning it clockwise, with and without overlapping servo moves
+    for overlap in [False, True]:
+        bot = SimulatedRubiksBot(overlap=overlap)
+        for side in ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']:
+            bot.load_side(side)
+            bot.turn_cube('cw')
+        bot.finish()
+        print(f"overlap={overlap}: ", bot.summary())
+        bot.close()
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+from threading import Lock
+import sqlite3
+from CubeSymmetry import SYMMETRIES, INVERSES, canonical_form
+from SolverBackends import get_backend
+
+# Description: This script manages the SolutionCache class, a caching layer in front of a solver backend. States are keyed
+#              ...on the canonical form of their kociemba string under the 48 cube symmetries, so a state and every
+#              ...rotated, mirrored or recolored copy of it share one cached solution. Entries are also keyed on the backend
+#              ...and the solution length cap, so caches filled with different solver settings never answer for each other.
+
+
+class SolutionCache:
+    """Solution cache with a bounded in-memory LRU and an optional on-disk (sqlite) tier.
+    Call solve() the same way as kociemba.solve.
+
+    *Safe to share between threads (Ex. the solve server's executor, the BotRunner thread): the sqlite connection is
+     opened with check_same_thread=False and one lock guards it and the LRU. The solver itself runs outside the lock,
+     so misses on different threads are solved at the same time."""
+
+    def __init__(self, backend='kociemba', max_size=4096, path=None, max_length=None) -> None:
+        """Constructor method for class.
+        Args: backend= name of the solver backend used on a miss (See SolverBackends.py)
+              max_size= number of solutions held in memory
+              path= sqlite file for the persistent tier. Defaults to no persistent tier
+              max_length= longest solution the backend may return. Defaults to the backend's own limit"""
+
+        self.solve_fn = get_backend(backend)
+        self.backend = backend
+        self.max_length = max_length
+        self.max_size = max_size
+        self.memory = OrderedDict()     # (backend, max_length, canonical state) -> canonical solution, least recently used first
+
+        # Counters
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self.lock = Lock()
+        self.db = None
+        if path is not None:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            # max_length 0 stands for the backend's own limit. Files from before the backend was keyed have an older
+            # 'solutions' table, which is left unused since its backend is unknown
+            self.db.execute("CREATE TABLE IF NOT EXISTS solutions_v2 (backend TEXT NOT NULL, max_length INTEGER NOT NULL, "
+                            "state TEXT NOT NULL, solution TEXT NOT NULL, PRIMARY KEY (backend, max_length, state))")
+            self.db.commit()
+
+
+    def solve(self, cubestring):
+        """Returns a solution for the state, from the cache when the state or any symmetric copy
+        of it has been solved before.
+        Returns: str"""
+
+        state, sym_index = canonical_form(cubestring)
+        solution = self.lookup(state)
+        if solution is None:
+            solution = self.solve_fn(state) if self.max_length is None else self.solve_fn(state, self.max_length)
+            self.store(state, solution)
+
+        # The cached solution solves the canonical state, map it back onto the caller's state
+        return SYMMETRIES[INVERSES[sym_index]].transform_solution(solution)
+
+
+    def key(self, state):
+        """Returns the cache key of a canonical state under this cache's backend and length cap.
+        Returns: tuple"""
+
+        return (self.backend, self.max_length or 0, state)
+
+
+    def lookup(self, state):
+        """Returns the cached solution of a canonical state, or None (Counted as a miss). Disk hits are promoted to memory.
+        Returns: str or None"""
+
+        key = self.key(state)
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                return self.memory[key]
+
+            if self.db is not None:
+                row = self.db.execute("SELECT solution FROM solutions_v2 WHERE backend = ? AND max_length = ? AND state = ?",
+                                      key).fetchone()
+                if row is not None:
+                    self.disk_hits += 1
+                    self.remember(key, row[0])
+                    return row[0]
+            self.misses += 1
+        return None
+
+
+    def store(self, state, solution):
+        """Stores the solution of a canonical state in memory and on disk."""
+
+        key = self.key(state)
+        with self.lock:
+            self.remember(key, solution)
+            if self.db is not None:
+                self.db.execute("INSERT OR REPLACE INTO solutions_v2 (backend, max_length, state, solution) VALUES (?, ?, ?, ?)",
+                                key + (solution,))
+                self.db.commit()
+
+
+    def remember(self, key, solution):
+        """Adds a solution to the in-memory LRU, evicting the least recently used entry when full. Called with the lock held."""
+
+        self.memory[key] = solution
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_size:
+            self.memory.popitem(last=False)
+            self.evictions += 1
+
+
+    def stats(self):
+        """Returns the cache counters.
+        Returns: dict"""
+
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.memory),
+            'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
+
+
+    def close(self):
+        """Closes the persistent tier."""
+
+        with self.lock:
+            if self.db is not None:
+                self.db.close()
+                self.db = None
@@ -0,0 +1,100 @@
+from time import perf_counter
+import argparse
+from BatchSolver import solve_many
+from CubeSymmetry import SYMMETRIES, INVERSES
+from MoveOptimizer import optimize
+from RegripPlanner import RegripPlanner
+from RubiksSolver import RubiksSolver
+from SolverBackends import BACKENDS
+
+# Description: This script picks the solution that is fastest for the bot to execute rather than the one with the fewest moves.
+#              ...The state is re-expressed under every whole cube rotation (and optionally every mirror), each copy is
+#              ...solved, every solution is mapped back onto the cube as it sits in the bot, and the regrip planner
+#              ...scores each one with the bot's own timings.
+
+
+def candidate_states(state_str, mirrors=False):
+    """Returns the (symmetry index, transformed state) of every rotation of the state, and of every mirror if 'mirrors'.
+    Copies that come out identical (Symmetric cubes) are only kept once.
+    Returns: List"""
+
+    candidates = []
+    seen = set()
+    for index in range(48 if mirrors else 24):
+        transformed = SYMMETRIES[index].transform_state(state_str)
+        if transformed not in seen:
+            seen.add(transformed)
+            candidates.append((index, transformed))
+    return candidates
+
+
+def select_solution(state_str, backend='kociemba', mirrors=False, lengths=(None,), workers=None, planner=None):
+    """Solves every rotation (and mirror) of the state and returns the solution with the lowest predicted execution time.
+    Args: state_str= 54 length kociemba string of the cube as it sits in the bot
+          backend= name of the solver backend (See SolverBackends.py)
+          mirrors= also solve the 24 mirrored copies
+          lengths= caps on the solution length to solve every copy with (None is the backend's own limit). Shorter
+                   caps give more candidates, but can take far longer to search
+          workers= number of solver processes (See BatchSolver.solve_many)
+          planner= RegripPlanner of the bot the solution is scored for. Defaults to a planner for a RubiksBot that is
+                   never connected (Scoring only reads its delays, so no hardware and no gpiozero import)
+    Returns: dict with keys solution (kociemba notation), moves (optimized, decoded), plan, seconds, symmetry,
+             max_length, candidates, baseline_seconds (the plain solve of the state, None if it failed) and solve_seconds"""
+
+    if planner is None:
+        from RubiksBot import RubiksBot
+        planner = RegripPlanner(RubiksBot(connect=False))
+    decoder = RubiksSolver(None)
+
+    # 1. Solve every candidate under every length cap
+    start = perf_counter()
+    candidates = candidate_states(state_str, mirrors)
+    solved = []     # (symmetry index, max_length, solution in the bot's frame)
+    for max_length in lengths:
+        results = solve_many([state for _, state in candidates], workers, backend=backend, max_length=max_length)
+        for result in results:
+            if result['error'] is None:
+                index = candidates[result['index']][0]
+                solution = SYMMETRIES[INVERSES[index]].transform_solution(result['solution'])
+                solved.append((index, max_length, solution))
+    solve_seconds = perf_counter() - start
+    if not solved:
+        raise ValueError(f"No candidate of the state could be solved: {state_str}")
+
+    # 2. Score every distinct solution with the bot's timings
+    best = None
+    baseline_seconds = None
+    scored = {}
+    for index, max_length, solution in solved:
+        if solution not in scored:
+            moves = optimize(decoder.decode_after_kociemba(solution, half_turns=True))
+            plan = planner.plan(moves)
+            scored[solution] = (moves, plan, planner.plan_seconds(plan))
+        moves, plan, seconds = scored[solution]
+
+        if index == 0 and max_length == lengths[0]:
+            baseline_seconds = seconds
+        if best is None or seconds < best['seconds']:
+            best = {'solution': solution, 'moves': moves, 'plan': plan, 'seconds': seconds, 'symmetry': index, 'max_length': max_length}
+
+    best['candidates'] = len(solved)
+    best['baseline_seconds'] = baseline_seconds
+    best['solve_seconds'] = solve_seconds
+    return best
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Pick the solution of a state that the bot executes fastest")
+    parser.add_argument('state', help="54 length kociemba string")
+    parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend")
+    parser.add_argument('--mirrors', action='store_true', help="Also solve the 24 mirrored copies of the state")
+    parser.add_argument('--lengths', type=int, nargs='*', default=[], help="Extra caps on the solution length to solve every copy with")
+    parser.add_argument('--workers', type=int, default=None, help="Solver processes. Defaults to the CPU count")
+    args = parser.parse_args()
+
+    result = select_solution(args.state, args.solver, args.mirrors, [None] + args.lengths, args.workers)
+    print(f"Solution : {result['solution']}  ({len(result['solution'].split())} moves, symmetry {result['symmetry']})")
+    baseline = 'n/a' if result['baseline_seconds'] is None else f"{result['baseline_seconds']:.1f} s"
+    print(f"Predicted: {result['seconds']:.1f} s  (Plain solve: {baseline})")
+    print(f"Solved {result['candidates']} candidates in {result['solve_seconds']:.2f} s")
@@ -0,0 +1,260 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from time import perf_counter
+import argparse
+import asyncio
+import json
+import os
+import random
+from BatchSolver import init_worker, solve_one
+from SolverBackends import BACKENDS
+from CubeValidator import validate
+from LatencyStats import percentile
+
+# Description: This script runs the solver as a long lived local service. Clients connect over TCP and send one JSON
+#              ...request per line; the server solves in a process pool, merges identical requests that are in flight
+#              ...into a single solve, and stops reading from clients while too many requests are pending.
+#
+#              Requests:  {"id": 1, "state": "<54 length kociemba string>"}   or   {"cmd": "stats"}
+#              Replies:   {"id": 1, "state": ..., "solution": ..., "error": ..., "latency_ms": ...}
+
+
+class SolveServer:
+    """Asyncio solve service wrapping the encode -> solve -> decode pipeline's solve step."""
+
+    def __init__(self, backend='kociemba', workers=None, max_pending=64, history=10000) -> None:
+        """Constructor method for class.
+        Args: backend= name of the solver backend (See SolverBackends.py)
+              workers= number of solver processes. Defaults to the CPU count
+              max_pending= number of unanswered requests before the server stops reading from clients
+              history= number of recent request latencies kept for the percentiles"""
+
+        self.backend = backend
+        self.workers = workers or os.cpu_count()
+        self.executor = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(backend,))
+        self.queue = asyncio.Queue()
+        self.slots = asyncio.Semaphore(max_pending)     # One slot per unanswered request
+        self.pending = 0
+        self.in_flight = {}     # state -> Future shared by every request for that state
+        self.latencies = deque(maxlen=history)
+
+        # Counters
+        self.requests = 0
+        self.solves = 0
+        self.coalesced = 0
+        self.errors = 0
+
+
+    async def solve(self, state):
+        """Returns the result of solving 'state'. Joins the solve already in flight for the same state if there is one.
+        Returns: dict"""
+
+        if state in self.in_flight:
+            self.coalesced += 1
+            return await asyncio.shield(self.in_flight[state])
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[state] = future
+        self.queue.put_nowait((state, future))
+        return await asyncio.shield(future)
+
+
+    async def dispatcher(self):
+        """Takes states off the queue and runs them in the executor. One dispatcher runs per worker."""
+
+        loop = asyncio.get_running_loop()
+        while True:
+            state, future = await self.queue.get()
+            try:
+                result = await loop.run_in_executor(self.executor, solve_one, (0, state))
+                self.solves += 1
+                future.set_result(result)
+            except Exception as error:
+                future.set_exception(error)
+            finally:
+                del self.in_flight[state]
+                self.queue.task_done()
+
+
+    async def handle_request(self, line, writer, write_lock):
+        """Decodes and answers one request line, writes the reply line and frees the request's slot. A bad request
+        (Not a JSON object or a bare state, or an invalid state) gets an error reply like a failed solve."""
+
+        start = perf_counter()
+        request_id = None
+        state = None
+        try:
+            try:
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    request = {'state': line.decode(errors='replace')}     # A bare state line
+                if not isinstance(request, dict):
+                    raise ValueError(f"Expected a JSON object, got {type(request).__name__}")
+                request_id = request.get('id')
+                if request.get('cmd') == 'stats':
+                    data = json.dumps(self.stats())
+                else:
+                    self.requests += 1
+                    state = str(request.get('state', '')).strip()
+                    validate(state).raise_if_invalid()  # Rejected here, without a trip to the pool
+                    result = await self.solve(state)
+                    reply = {'id': request_id, 'state': state, 'solution': result['solution'], 'error': result['error']}
+                    data = self.finish_reply(reply, start)
+            except Exception as error:
+                if state is None:
+                    self.requests += 1  # Never got as far as its state
+                reply = {'id': request_id, 'state': state, 'solution': None, 'error': f"{type(error).__name__}: {error}"}
+                data = self.finish_reply(reply, start)
+
+            async with write_lock:
+                writer.write((data + "\n").encode())
+                await writer.drain()
+        finally:
+            self.pending -= 1
+            self.slots.release()
+
+
+    def finish_reply(self, reply, start):
+        """Counts a solve reply, adds its latency and encodes it.
+        Returns: str JSON line without the newline"""
+
+        self.errors += reply['error'] is not None
+        latency = perf_counter() - start
+        self.latencies.append(latency)
+        reply['latency_ms'] = round(1000 * latency, 3)
+        return json.dumps(reply)
+
+
+    async def handle_client(self, reader, writer):
+        """Reads request lines from one client. Each request is answered in its own task, so a client can
+        pipeline requests; replies carry the request id and may arrive out of order."""
+
+        write_lock = asyncio.Lock()
+        tasks = set()
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            # Wait for a free slot before reading the next line, so a busy server slows its clients down
+            await self.slots.acquire()
+            self.pending += 1
+            task = asyncio.create_task(self.handle_request(line, writer, write_lock))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+        if tasks:
+            await asyncio.gather(*tasks)
+        writer.close()
+
+
+    def stats(self):
+        """Returns the server counters and latency percentiles (ms) of recent requests.
+        Returns: dict"""
+
+        latencies = sorted(self.latencies)
+        stats = {
+            'requests': self.requests,
+            'solves': self.solves,
+            'coalesced': self.coalesced,
+            'errors': self.errors,
+            'pending': self.pending,
+            'queued': self.queue.qsize(),
+            'in_flight': len(self.in_flight),
+        }
+        for q in [50, 90, 99]:
+            value = percentile(latencies, q)
+            stats[f'p{q}_ms'] = round(1000 * value, 3) if value is not None else None
+        return stats
+
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Starts the dispatchers and serves clients until cancelled."""
+
+        dispatchers = [asyncio.create_task(self.dispatcher()) for _ in range(self.workers)]
+        server = await asyncio.start_server(self.handle_client, host, port)
+        print(f"Solve server ({self.backend}, {self.workers} workers) listening on {host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in dispatchers:
+                task.cancel()
+            self.executor.shutdown(cancel_futures=True)
+
+
+""" Load generator """
+
+async def run_client(host, port, states, latencies):
+    """Sends 'states' one at a time over a single connection and records each round trip time."""
+
+    reader, writer = await asyncio.open_connection(host, port)
+    for i, state in enumerate(states):
+        start = perf_counter()
+        writer.write((json.dumps({'id': i, 'state': state}) + "\n").encode())
+        await writer.drain()
+        await reader.readline()
+        latencies.append(perf_counter() - start)
+    writer.close()
+
+
+async def generate_load(host, port, clients, requests, repeat, seed):
+    """Runs 'clients' concurrent clients, each sending 'requests' random states. A 'repeat' fraction of the
+    states is drawn from a small shared pool so identical requests overlap. Prints client side percentiles
+    and the server's stats."""
+
+    from Scrambler import scrambles
+
+    random.seed(seed)
+    scrambler = scrambles(seed=seed)
+
+    def scramble():
+        return next(scrambler)
+
+    shared = [scramble() for _ in range(max(1, clients // 2))]
+    corpora = [[random.choice(shared) if random.random() < repeat else scramble() for _ in range(requests)]
+               for _ in range(clients)]
+
+    latencies = []
+    start = perf_counter()
+    await asyncio.gather(*(run_client(host, port, corpus, latencies) for corpus in corpora))
+    elapsed = perf_counter() - start
+
+    latencies.sort()
+    print(f"{len(latencies)} requests in {elapsed:.2f} s ({len(latencies) / elapsed:.1f} req/s)")
+    print(f"client p50 {1000*percentile(latencies, 50):.1f} ms  p99 {1000*percentile(latencies, 99):.1f} ms")
+
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(b'{"cmd": "stats"}\n')
+    await writer.drain()
+    print("server", (await reader.readline()).decode().strip())
+    writer.close()
+
+
+
+if __name__ =='__main__':
+    parser = argparse.ArgumentParser(description="Local solve service and load generator")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = subparsers.add_parser('serve', help="Run the solve server")
+    serve_parser.add_argument('--solver', choices=list(BACKENDS), default='kociemba', help="Solver backend")
+    serve_parser.add_argument('--workers', type=int, default=None, help="Solver processes. Defaults to the CPU count")
+    serve_parser.add_argument('--max-pending', type=int, default=64, help="Unanswered requests before clients are slowed down")
+
+    load_parser = subparsers.add_parser('load', help="Generate load against a running server")
+    load_parser.add_argument('--clients', type=int, default=8, help="Concurrent connections")
+    load_parser.add_argument('--requests', type=int, default=50, help="Requests per connection")
+    load_parser.add_argument('--repeat', type=float, default=0.3, help="Fraction of requests drawn from a small shared pool")
+    load_parser.add_argument('--seed', type=int, default=0)
+
+    for sub in [serve_parser, load_parser]:
+        sub.add_argument('--host', default='127.0.0.1')
+        sub.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        async def run_server():
+            await SolveServer(args.solver, args.workers, args.max_pending).serve(args.host, args.port)
+        asyncio.run(run_server())
+    else:
+        asyncio.run(generate_load(args.host, args.port, args.clients, args.requests, args.repeat, args.seed))
@@ -0,0 +1,65 @@
+from time import perf_counter
+
+# Description: This script holds the solver backends that turn a 54 length kociemba string into a solution string.
+#              ...Every backend is called like kociemba.solve (With an optional cap on the solution length), so they
+#              ...can be swapped behind encode_before_kociemba and decode_after_kociemba. Backends import their solver
+#              ...on first use; warm_up does that (And any table loading) ahead of the first real solve.
+
+
+# Known state solved by warm_up
+WARM_UP_STATE = "DRLUUBFBRBLURRLRUBLRDDFDLFUFUFFDBRDUBRUFLLFDDBFLUBLRBD"
+
+
+def kociemba_backend(cubestring, max_length=None):
+    """Solves the state with the external kociemba module.
+    Args: max_length= longest solution accepted. Defaults to kociemba's own limit
+    Returns: str"""
+
+    import kociemba
+    if max_length is None:
+        return kociemba.solve(cubestring)
+    return kociemba.solve(cubestring, max_depth=max_length)
+
+
+def twophase_backend(cubestring, max_length=None):
+    """Solves the state with the in-process two-phase solver (TwoPhaseSolver.py). Finds the same solutions as kociemba
+    but searches in pure Python, so it is about 10x slower (~0.3 s per random state). Use it where the kociemba module
+    cannot be installed; kociemba stays the default everywhere.
+    Args: max_length= longest solution accepted. Defaults to the solver's own limit
+    Returns: str"""
+
+    import TwoPhaseSolver
+    if max_length is None:
+        return TwoPhaseSolver.solve(cubestring)
+    return TwoPhaseSolver.solve(cubestring, max_length)
+
+
+BACKENDS = {
+    'kociemba': kociemba_backend,      # Default
+    'twophase': twophase_backend,      # Slow, no compiled dependency
+}
+
+
+def get_backend(name):
+    """Returns the solve function registered under 'name'.
+    Returns: function"""
+
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown solver backend '{name}'. Choose from: {', '.join(BACKENDS)}")
+    return BACKENDS[name]
+
+
+def warm_up(name):
+    """Imports the backend and loads its tables by solving WARM_UP_STATE, and checks the solution really solves it.
+    Raises RuntimeError if it does not.
+    Returns: float seconds taken"""
+
+    from CubieCube import CubieCube
+
+    start = perf_counter()
+    solution = get_backend(name)(WARM_UP_STATE)
+    cube = CubieCube.from_kociemba(WARM_UP_STATE)
+    cube.apply_moves(solution)
+    if cube != CubieCube():
+        raise RuntimeError(f"Solver backend '{name}' returned a wrong solution during warm up: {solution}")
+    return perf_counter() - start
@@ -0,0 +1,226 @@
+from functools import wraps
+from threading import Lock, get_ident, local
+from time import perf_counter
+import json
+
+# Description: This script is the instrumentation layer. Code marks the work it does with named spans; when tracing is enabled
+#              ...every span is recorded with its start, length and thread, and can be written as JSON lines or as a Chrome
+#              ...trace (chrome://tracing, ui.perfetto.dev), or summarized by where the time went. When tracing is disabled
+#              ...a span is a shared object that does nothing, and bot methods are left unwrapped. Every span is timed on
+#              ...perf_counter, so spans from every part of a run add up. Bot spans also record the time that passed on the
+#              ...bot's own clock (bot_seconds), which for a simulated bot is the time the real bot would have taken.
+
+
+class NullSpan:
+    """Span used while tracing is disabled. Does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NULL_SPAN = NullSpan()
+
+
+class Span:
+    """One timed region. Records itself on the tracer when it ends."""
+
+    def __init__(self, tracer, name, args, clock=None) -> None:
+        """Constructor method for class.
+        Args: clock= bot clock (with a now method) whose time is also recorded, as bot_seconds"""
+
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.clock = clock
+        self.start = None
+        self.clock_start = None
+        self.children = 0.0     # Seconds spent in spans nested directly inside this one
+
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        stack.append(self)
+        if self.clock is not None:
+            self.clock_start = self.clock.now()
+        self.start = self.tracer.time()
+        return self
+
+
+    def __exit__(self, *exc):
+        end = self.tracer.time()
+        bot_seconds = self.clock.now() - self.clock_start if self.clock is not None else None
+        stack = self.tracer.stack()
+        stack.pop()
+        seconds = end - self.start
+        if stack:
+            stack[-1].children += seconds
+        self.tracer.record(self, seconds, len(stack), bot_seconds)
+        return False
+
+
+class Tracer:
+    """Collects spans from every thread."""
+
+    def __init__(self, now=perf_counter) -> None:
+        """Constructor method for class.
+        Args: now= function returning the current time in seconds"""
+
+        self.enabled = False
+        self.now = now
+        self.origin = 0.0
+        self.records = []
+        self.threads = {}   # Thread ident -> small thread number, in order of first span
+        self.lock = Lock()
+        self.local = local()
+
+
+    def enable(self, now=None):
+        """Starts recording spans (Clears any recorded before).
+        Args: now= function returning the current time in seconds. Defaults to the tracer's current one"""
+
+        if now is not None:
+            self.now = now
+        self.records = []
+        self.threads = {}
+        self.origin = self.now()
+        self.enabled = True
+
+
+    def disable(self):
+        """Stops recording spans. Recorded spans are kept."""
+
+        self.enabled = False
+
+
+    def span(self, name, clock=None, **args):
+        """Returns a context manager timing the block as span 'name'. 'args' are stored with the span.
+        Args: clock= bot clock whose time during the block is also recorded (See Span)
+        Returns: Span"""
+
+        if not self.enabled:
+            return NULL_SPAN
+        return Span(self, name, args, clock)
+
+
+    def time(self):
+        """Seconds since tracing was enabled.
+        Returns: float"""
+
+        return self.now() - self.origin
+
+
+    def stack(self):
+        """Open spans of the calling thread, innermost last.
+        Returns: List"""
+
+        stack = getattr(self.local, 'stack', None)
+        if stack is None:
+            stack = self.local.stack = []
+        return stack
+
+
+    def record(self, span, seconds, depth, bot_seconds=None):
+        """Stores a finished span."""
+
+        with self.lock:
+            thread = self.threads.setdefault(get_ident(), len(self.threads))
+            record = {
+                'name': span.name,
+                'start': round(span.start, 6),
+                'seconds': round(seconds, 6),
+                'self_seconds': round(seconds - span.children, 6),
+                'thread': thread,
+                'depth': depth,
+                'args': span.args,
+            }
+            if bot_seconds is not None:
+                record['bot_seconds'] = round(bot_seconds, 6)
+            self.records.append(record)
+
+
+    def summary(self, top=None):
+        """Ranks span names by self time (Time not spent in a nested span), so the ranking adds up to the traced time.
+        Returns: List of dicts with keys name, count, seconds, self_seconds, mean_seconds and max_seconds, and
+                 bot_seconds for spans timed on a bot clock"""
+
+        totals = {}
+        for record in self.records:
+            entry = totals.setdefault(record['name'], {'name': record['name'], 'count': 0, 'seconds': 0.0,
+                                                       'self_seconds': 0.0, 'max_seconds': 0.0})
+            entry['count'] += 1
+            entry['seconds'] += record['seconds']
+            entry['self_seconds'] += record['self_seconds']
+            entry['max_seconds'] = max(entry['max_seconds'], record['seconds'])
+            if 'bot_seconds' in record:
+                entry['bot_seconds'] = entry.get('bot_seconds', 0.0) + record['bot_seconds']
+        ranked = sorted(totals.values(), key=lambda entry: entry['self_seconds'], reverse=True)
+        for entry in ranked:
+            entry['mean_seconds'] = entry['seconds'] / entry['count']
+            for key in ['seconds', 'self_seconds', 'mean_seconds', 'max_seconds', 'bot_seconds']:
+                if key in entry:
+                    entry[key] = round(entry[key], 6)
+        return ranked[:top] if top else ranked
+
+
+    def write_jsonl(self, path):
+        """Writes every recorded span to 'path', one JSON object per line, in the order they ended."""
+
+        with open(path, 'w') as file:
+            for record in self.records:
+                file.write(json.dumps(record) + "\n")
+
+
+    def write_chrome_trace(self, path):
+        """Writes the recorded spans to 'path' in the Chrome trace event format."""
+
+        events = [{'name': record['name'], 'ph': 'X', 'pid': 0, 'tid': record['thread'],
+                   'ts': round(1e6 * record['start'], 3), 'dur': round(1e6 * record['seconds'], 3),
+                   'args': dict(record['args'], bot_seconds=record['bot_seconds']) if 'bot_seconds' in record else record['args']}
+                  for record in self.records]
+        with open(path, 'w') as file:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, file)
+
+
+TRACER = Tracer()
+
+
+def traced(name, tracer=TRACER):
+    """Decorator timing every call of a method as span 'name', also recording the time on the clock of the object it
+    is called on if it has one (Ex. RubiksBot.clock). The call's positional arguments (after self) are stored with the span."""
+
+    def decorate(function):
+        @wraps(function)
+        def wrapper(self, *args, **kwargs):
+            if not tracer.enabled:
+                return function(self, *args, **kwargs)
+            with Span(tracer, name, {'args': list(args)} if args else {}, getattr(self, 'clock', None)):
+                return function(self, *args, **kwargs)
+        wrapper.traced = True
+        return wrapper
+    return decorate
+
+
+def instrument(cls, method_names, tracer=TRACER):
+    """Wraps the named methods of 'cls' with traced, once. Called when tracing is turned on, so an untraced run
+    keeps calling the plain methods."""
+
+    for method_name in method_names:
+        method = getattr(cls, method_name)
+        if not getattr(method, 'traced', False):
+            setattr(cls, method_name, traced(method_name, tracer)(method))
+
+
+# Bot methods traced by instrument_bot. Plans are executed step by step (See RegripPlanner.execute_plan, which traces
+# every step), so these are the methods a step calls
+BOT_METHODS = ['turn_bot_x', 'turn_bot_y', 'turn_cube', 'flatten_cube']
+
+
+def instrument_bot():
+    """Traces the RubiksBot methods in BOT_METHODS (Subclasses such as SimulatedRubiksBot reach them through super).
+    Imports RubiksBot, so only call it when a bot is used."""
+
+    from RubiksBot import RubiksBot
+    instrument(RubiksBot, BOT_METHODS)
@@ -0,0 +1,428 @@
+from itertools import permutations
+from math import factorial
+from time import perf_counter
+import mmap
+import os
+import struct
+import numpy as np
+from CubieCube import CubieCube, MOVE_CUBES, MOVE_NAMES, SLICE_MASKS, MASK_TO_SLICE, SOLVED_SLICE
+
+# Description: This script manages the in-process two-phase solver. It solves a 54 length kociemba string the same way
+#              ...kociemba.solve does, using cubie coordinates, move tables and pruning tables. The tables are generated
+#              ...once with numpy, saved to one binary file and memory-mapped read only, so every worker process that
+#              ...loads them shares a single page-cached copy. Like kociemba, phase 2 is searched at most PHASE2_MAX_DEPTH
+#              ...moves deep, so solutions come out as short as kociemba's, but the search runs in pure Python and is
+#              ...about 10x slower than the kociemba module (See SolverBackends.twophase_backend).
+
+
+# Default location of the table file. Can be overridden with the RUBIKS_TABLE_PATH environment variable
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables", "twophase.bin")
+
+# File layout: header (magic, version, section count), section directory (name, item size, offset, count), then the data
+MAGIC = b"RKTP"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+SECTION = struct.Struct("<24sB7xQQ")
+ALIGNMENT = 64
+
+# Coordinate sizes
+N_TWIST = 2187
+N_FLIP = 2048
+N_SLICE = 495
+N_PERM8 = 40320
+N_SLICE_PERM = 24
+N_MOVES = 18
+
+# Moves that keep the cube in the phase 2 subgroup (Indices into MOVE_NAMES): U, U2, U', R2, F2, D, D2, D', L2, B2
+PHASE2_MOVES = [0, 1, 2, 4, 7, 9, 10, 11, 13, 16]
+N_PHASE2_MOVES = len(PHASE2_MOVES)
+PHASE2_MOVE_SET = set(PHASE2_MOVES)
+
+# Moves allowed after a move of each face (Indexed by that face + 1, index 0 before the first move): never the same face
+# twice in a row, and opposite faces only in URF before DLB order
+NEXT_MOVES = [[m for m in range(N_MOVES) if m // 3 not in (face, face - 3)] for face in range(-1, 6)]
+NEXT_PHASE2_MOVES = [[(k, m) for k, m in enumerate(PHASE2_MOVES) if m // 3 not in (face, face - 3)] for face in range(-1, 6)]
+
+# Longest phase 2 searched for each phase 1 solution (As kociemba does). Longer phase 2 searches rarely succeed where a
+# longer phase 1 would not, and cost far more
+PHASE2_MAX_DEPTH = 10
+
+
+""" Table generation """
+
+def rank_perms(perms):
+    """Vectorized lexicographic rank of each row of an (N, n) array of permutations.
+    Returns: numpy.ndarray"""
+
+    n = perms.shape[1]
+    rank = np.zeros(perms.shape[0], dtype=np.int64)
+    for i in range(n - 1):
+        smaller = (perms[:, i+1:] < perms[:, i:i+1]).sum(axis=1)
+        rank += smaller * factorial(n - 1 - i)
+    return rank
+
+
+def build_twist_move():
+    """Move table of the corner orientation coordinate.
+    Returns: numpy.ndarray (N_TWIST, 18)"""
+
+    twists = np.arange(N_TWIST)
+    co = np.zeros((N_TWIST, 8), dtype=np.int64)
+    for i in range(6, -1, -1):
+        twists, co[:, i] = np.divmod(twists, 3)
+    co[:, 7] = (-co[:, :7].sum(axis=1)) % 3
+
+    table = np.zeros((N_TWIST, N_MOVES), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBES):
+        new_co = (co[:, move.cp] + move.co) % 3
+        table[:, m] = new_co[:, :7] @ (3 ** np.arange(6, -1, -1))
+    return table
+
+
+def build_flip_move():
+    """Move table of the edge orientation coordinate.
+    Returns: numpy.ndarray (N_FLIP, 18)"""
+
+    flips = np.arange(N_FLIP)
+    eo = np.zeros((N_FLIP, 12), dtype=np.int64)
+    for i in range(10, -1, -1):
+        flips, eo[:, i] = np.divmod(flips, 2)
+    eo[:, 11] = eo[:, :11].sum(axis=1) % 2
+
+    table = np.zeros((N_FLIP, N_MOVES), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBES):
+        new_eo = (eo[:, move.ep] + move.eo) % 2
+        table[:, m] = new_eo[:, :11] @ (2 ** np.arange(10, -1, -1))
+    return table
+
+
+def build_slice_move():
+    """Move table of the UD-slice edge position coordinate.
+    Returns: numpy.ndarray (N_SLICE, 18)"""
+
+    masks = np.array(SLICE_MASKS)
+    bits = (masks[:, None] >> np.arange(12)) & 1
+    mask_to_slice = np.zeros(4096, dtype=np.uint16)
+    mask_to_slice[masks] = [MASK_TO_SLICE[mask] for mask in SLICE_MASKS]
+
+    table = np.zeros((N_SLICE, N_MOVES), dtype=np.uint16)
+    for m, move in enumerate(MOVE_CUBES):
+        new_bits = bits[:, move.ep]
+        table[:, m] = mask_to_slice[new_bits @ (1 << np.arange(12))]
+    return table
+
+
+def build_perm_move(n, positions):
+    """Move table (phase 2 moves only) of a permutation coordinate over the edges or corners
+    at 'positions'. positions= None selects the corners.
+    Returns: numpy.ndarray (n!, N_PHASE2_MOVES)"""
+
+    perms = np.array(list(permutations(range(n))), dtype=np.int64)
+    table = np.zeros((len(perms), N_PHASE2_MOVES), dtype=np.uint16)
+    for k, m in enumerate(PHASE2_MOVES):
+        move = MOVE_CUBES[m]
+        if positions is None:
+            source = move.cp
+        else:
+            source = [move.ep[p] - positions[0] for p in positions]
+        table[:, k] = rank_perms(perms[:, source])
+    return table
+
+
+def build_pruning(move_a, move_b, goal):
+    """Breadth first search over the product of two coordinates, recording the distance
+    of every pair (a * len(move_b) + b) to the goal.
+    Returns: numpy.ndarray of uint8"""
+
+    n_b = move_b.shape[0]
+    prun = np.full(move_a.shape[0] * n_b, 255, dtype=np.uint8)
+    prun[goal] = 0
+    depth = 0
+    while True:
+        frontier = np.flatnonzero(prun == depth)
+        if frontier.size == 0:
+            return prun
+        a, b = np.divmod(frontier, n_b)
+        for m in range(move_a.shape[1]):
+            following = move_a[a, m].astype(np.int64) * n_b + move_b[b, m]
+            following = following[prun[following] == 255]
+            prun[following] = depth + 1
+        depth += 1
+
+
+def generate_tables():
+    """Generates every move and pruning table used by the search.
+    Returns: dict of name -> numpy.ndarray"""
+
+    tables = {
+        "twist_move": build_twist_move(),
+        "flip_move": build_flip_move(),
+        "slice_move": build_slice_move(),
+        "corners_move": build_perm_move(8, None),
+        "ud_edges_move": build_perm_move(8, list(range(8))),
+        "slice_perm_move": build_perm_move(4, list(range(8, 12))),
+    }
+    tables["slice_twist_prun"] = build_pruning(tables["slice_move"], tables["twist_move"], SOLVED_SLICE * N_TWIST)
+    tables["slice_flip_prun"] = build_pruning(tables["slice_move"], tables["flip_move"], SOLVED_SLICE * N_FLIP)
+    tables["corners_slice_prun"] = build_pruning(tables["corners_move"], tables["slice_perm_move"], 0)
+    tables["ud_edges_slice_prun"] = build_pruning(tables["ud_edges_move"], tables["slice_perm_move"], 0)
+    return tables
+
+
+def save_tables(tables, path):
+    """Writes the tables to 'path' in the binary table format. The file is written
+    next to its destination and then renamed, so readers never see a partial file."""
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    # Lay out every section at an aligned offset after the header and section directory
+    offset = HEADER.size + SECTION.size * len(tables)
+    directory = []
+    for name, table in tables.items():
+        offset = -(-offset // ALIGNMENT) * ALIGNMENT
+        directory.append((name, table, offset))
+        offset += table.nbytes
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(tables)))
+        for name, table, offset in directory:
+            file.write(SECTION.pack(name.encode(), table.itemsize, offset, table.size))
+        for name, table, offset in directory:
+            file.write(b"\0" * (offset - file.tell()))
+            file.write(np.ascontiguousarray(table).astype(f"<u{table.itemsize}").tobytes())
+    os.replace(tmp_path, path)
+
+
+""" Table loading """
+
+class TwoPhaseTables:
+    """Read only, memory-mapped view of a table file. Each table is exposed as a flat memoryview
+    (fast to index from Python) named after its section, Ex. tables.twist_move[twist*18 + move]."""
+
+    def __init__(self, path) -> None:
+        """Constructor method for class.
+        Args: path= path of a table file written by save_tables"""
+
+        self.path = path
+        with open(path, "rb") as file:
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, count = HEADER.unpack_from(self.map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} two-phase table file")
+
+        self.sections = {}
+        view = memoryview(self.map)
+        for i in range(count):
+            name, itemsize, offset, size = SECTION.unpack_from(self.map, HEADER.size + i * SECTION.size)
+            name = name.rstrip(b"\0").decode()
+            typecode = "B" if itemsize == 1 else "H"
+            self.sections[name] = view[offset:offset + itemsize * size].cast(typecode)
+            setattr(self, name, self.sections[name])
+
+
+    def as_array(self, name):
+        """Returns a zero-copy numpy view of a table.
+        Returns: numpy.ndarray"""
+
+        section = self.sections[name]
+        return np.frombuffer(section, dtype=np.uint8 if section.itemsize == 1 else np.uint16)
+
+
+_loaded_tables = {}
+
+
+def load_tables(path=None):
+    """Returns the tables at 'path', generating and saving them first if the file does not exist.
+    Tables are opened once per process.
+    Returns: TwoPhaseTables"""
+
+    path = path or os.environ.get("RUBIKS_TABLE_PATH", DEFAULT_TABLE_PATH)
+    if path not in _loaded_tables:
+        if not os.path.exists(path):
+            save_tables(generate_tables(), path)
+        _loaded_tables[path] = TwoPhaseTables(path)
+    return _loaded_tables[path]
+
+
+""" Search """
+
+class TwoPhaseSearch:
+    """Single solve of one cube. Phase 1 brings the cube into the subgroup generated by
+    U, D, R2, L2, F2, B2; phase 2 solves it using only those moves."""
+
+    def __init__(self, tables, cube, max_length, deadline) -> None:
+        """Constructor method for class."""
+
+        self.tables = tables
+        self.cube = cube
+        self.max_length = max_length
+        self.deadline = deadline
+        self.moves = []
+        self.nodes = 0
+
+
+    def run(self):
+        """Returns the first solution (list of move indices) that is at most max_length moves long, else None.
+        Returns: List or None"""
+
+        t = self.tables
+        twist = self.cube.get_twist()
+        flip = self.cube.get_flip()
+        slice_ = self.cube.get_slice()
+        start_depth = max(t.slice_twist_prun[slice_*N_TWIST + twist], t.slice_flip_prun[slice_*N_FLIP + flip])
+        for depth in range(start_depth, self.max_length + 1):
+            if self.phase1(twist, flip, slice_, depth):
+                return self.moves
+        return None
+
+
+    def check_deadline(self):
+        """Raises TimeoutError once the deadline has passed. Called once per searched node, only checks the clock
+        every 4096 nodes."""
+
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 4095 == 0 and perf_counter() > self.deadline:
+            raise TimeoutError(f"No solution found within the time limit ({self.nodes} nodes searched)")
+
+
+    def phase1(self, twist, flip, slice_, togo):
+        """Depth limited search for phase 1 solutions exactly 'togo' moves long. Each one found is handed to phase 2.
+        Returns: bool (True once a full solution has been found)"""
+
+        if togo == 0:
+            # A phase 1 solution ending with a phase 2 move was already tried as a shorter one
+            if self.moves and self.moves[-1] in PHASE2_MOVE_SET:
+                return False
+            return self.start_phase2()
+
+        self.check_deadline()
+        t = self.tables
+        twist_move, flip_move, slice_move = t.twist_move, t.flip_move, t.slice_move
+        slice_twist_prun, slice_flip_prun = t.slice_twist_prun, t.slice_flip_prun
+        twist, flip, slice_ = twist * N_MOVES, flip * N_MOVES, slice_ * N_MOVES
+        moves = self.moves
+        for m in NEXT_MOVES[moves[-1] // 3 + 1 if moves else 0]:
+            new_slice = slice_move[slice_ + m]
+            new_twist = twist_move[twist + m]
+            if slice_twist_prun[new_slice*N_TWIST + new_twist] >= togo:
+                continue
+            new_flip = flip_move[flip + m]
+            if slice_flip_prun[new_slice*N_FLIP + new_flip] >= togo:
+                continue
+            moves.append(m)
+            if self.phase1(new_twist, new_flip, new_slice, togo - 1):
+                return True
+            moves.pop()
+        return False
+
+
+    def start_phase2(self):
+        """Computes the phase 2 coordinates after the current phase 1 moves and searches phase 2.
+        Returns: bool"""
+
+        t = self.tables
+        cube = self.cube.copy()
+        for m in self.moves:
+            cube.multiply(MOVE_CUBES[m])
+        corners = cube.get_corners()
+        ud_edges = cube.get_ud_edges()
+        slice_perm = cube.get_slice_perm()
+
+        phase1_length = len(self.moves)
+        start_depth = max(t.corners_slice_prun[corners*N_SLICE_PERM + slice_perm],
+                          t.ud_edges_slice_prun[ud_edges*N_SLICE_PERM + slice_perm])
+        for depth in range(start_depth, min(PHASE2_MAX_DEPTH, self.max_length - phase1_length) + 1):
+            if self.phase2(corners, ud_edges, slice_perm, depth):
+                return True
+        return False
+
+
+    def phase2(self, corners, ud_edges, slice_perm, togo):
+        """Depth limited search for a phase 2 solution exactly 'togo' moves long.
+        Returns: bool"""
+
+        if togo == 0:
+            return corners == 0 and ud_edges == 0 and slice_perm == 0
+
+        self.check_deadline()
+        t = self.tables
+        moves = self.moves
+        for k, m in NEXT_PHASE2_MOVES[moves[-1] // 3 + 1 if moves else 0]:
+            new_corners = t.corners_move[corners*N_PHASE2_MOVES + k]
+            new_ud_edges = t.ud_edges_move[ud_edges*N_PHASE2_MOVES + k]
+            new_slice_perm = t.slice_perm_move[slice_perm*N_PHASE2_MOVES + k]
+            if (t.corners_slice_prun[new_corners*N_SLICE_PERM + new_slice_perm] >= togo
+                    or t.ud_edges_slice_prun[new_ud_edges*N_SLICE_PERM + new_slice_perm] >= togo):
+                continue
+            moves.append(m)
+            if self.phase2(new_corners, new_ud_edges, new_slice_perm, togo - 1):
+                return True
+            moves.pop()
+        return False
+
+
+def solve(cubestring, max_length=24, timeout=None, tables=None):
+    """Solves a 54 length kociemba string. Drop in replacement for kociemba.solve.
+    Args: cubestring= state to solve (Ex. output of encode_before_kociemba)
+          max_length= longest solution accepted. Lower values give shorter solutions but search longer
+          timeout= seconds to search before raising TimeoutError. Defaults to no limit
+          tables= TwoPhaseTables to use. Defaults to load_tables()
+    Returns: str (Ex. "R2 U' F ...")"""
+
+    deadline = perf_counter() + timeout if timeout is not None else None
+    tables = tables or load_tables()
+
+    if len(cubestring) != 54 or cubestring[4::9] != "URFDLB":
+        raise ValueError(f"Invalid kociemba state string: {cubestring}")
+    cube = CubieCube.from_kociemba(cubestring)
+    cube.verify()
+
+    moves = TwoPhaseSearch(tables, cube, max_length, deadline).run()
+    if moves is None:
+        raise ValueError(f"No solution of at most {max_length} moves exists")
+    return " ".join(MOVE_NAMES[m] for m in moves)
+
+
+def report_latency(name, solve_fn, states):
+    """Solves every state with solve_fn and prints latency statistics."""
+
+    latencies = []
+    lengths = []
+    for state in states:
+        start = perf_counter()
+        solution = solve_fn(state)
+        latencies.append(perf_counter() - start)
+        lengths.append(len(solution.split()))
+    latencies.sort()
+    print(f"{name:<10}: mean {1000*sum(latencies)/len(latencies):8.2f} ms  median {1000*latencies[len(latencies)//2]:8.2f} ms"
+          f"  max {1000*latencies[-1]:8.2f} ms  avg length {sum(lengths)/len(lengths):.1f}")
+
+
+
+if __name__ =='__main__':
+    import tempfile
+    import kociemba
+    from CubeBatch import CubeBatch
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "twophase.bin")
+
+        # Cold start: generate, save and map the tables
+        start = perf_counter()
+        save_tables(generate_tables(), path)
+        TwoPhaseTables(path)
+        print(f"Cold start: {perf_counter() - start:8.3f} s   ({os.path.getsize(path)/1e6:.1f} MB)")
+
+        # Warm start: map the existing file
+        start = perf_counter()
+        tables = TwoPhaseTables(path)
+        print(f"Warm start: {1000*(perf_counter() - start):8.3f} ms")
+
+        # Per solve latency of both backends on the same random states
+        batch = CubeBatch.solved(50)
+        batch.randomize(count=40, rng=0)
+        states = batch.encode_before_kociemba()
+        report_latency("kociemba", kociemba.solve, states)
+        report_latency("twophase", lambda state: solve(state, tables=tables), states)
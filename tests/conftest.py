@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Description: pytest setup. The modules in src import each other by file name (They are run from src), so src is put on
+#              ...the import path before the tests are collected.
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
@@ -0,0 +1,34 @@
+from CubieState import CubieState
+from BatchSolver import solve_many
+from Scrambler import scrambles
+
+# Description: Tests that the solver pool returns one result per state, in order, with errors for invalid states.
+
+
+STATES = list(scrambles(6, seed=5))
+INVALID = "U" * 54
+
+
+def test_pool_results_in_order_and_solved():
+    states = STATES[:3] + [INVALID, "not a state"] + STATES[3:]
+    results = list(solve_many(states, workers=2, chunksize=2))
+    assert [result['index'] for result in results] == list(range(len(states)))
+    assert [result['state'] for result in results] == states
+    for result in results[:3] + results[5:]:
+        assert result['error'] is None
+        assert CubieState.from_kociemba(result['state']).apply_moves(result['solution']).is_solved()
+    for result in results[3:5]:
+        assert result['solution'] is None
+        assert result['error']
+
+
+def test_unordered_and_in_process_give_the_same_results():
+    unordered = sorted(solve_many(STATES, workers=2, ordered=False), key=lambda result: result['index'])
+    in_process = list(solve_many(STATES, workers=1))
+    assert [result['solution'] for result in unordered] == [result['solution'] for result in in_process]
+
+
+def test_max_length_is_passed_to_the_workers():
+    results = list(solve_many(STATES[:2], workers=2, max_length=22))
+    for result in results:
+        assert result['error'] is not None or len(result['solution'].split()) <= 22
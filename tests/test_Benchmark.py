@@ -0,0 +1,69 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from Benchmark import compare
+from LatencyStats import percentile
+
+# Description: Tests the latency percentiles and the regression check between two benchmark runs.
+
+
+SRC = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+
+
+def results(**metrics):
+    return {'meta': {}, 'metrics': {name: {'value': value, 'better': better} for name, (value, better) in metrics.items()}}
+
+
+def test_percentile_of_nothing_is_none():
+    assert percentile([], 50) is None
+    assert percentile([], 99) is None
+
+
+def test_percentile_of_one_sample():
+    for q in [0, 50, 99, 100]:
+        assert percentile([0.25], q) == 0.25
+
+
+def test_percentile_ranks():
+    values = list(range(1, 101))
+    assert percentile(values, 0) == 1
+    assert percentile(values, 50) == 51
+    assert percentile(values, 99) == 99
+    assert percentile(values, 100) == 100
+    assert percentile([1, 2], 99) == 2
+
+
+def test_compare_flags_wrong_way_changes_only():
+    old = results(latency=(1.0, 'lower'), throughput=(100.0, 'higher'), steady=(2.0, 'lower'))
+    new = results(latency=(1.5, 'lower'), throughput=(200.0, 'higher'), steady=(2.2, 'lower'))
+    rows = {row[0]: row for row in compare(old, new)}
+    assert rows['latency'][3] == pytest.approx(0.5) and rows['latency'][4]
+    assert not rows['throughput'][4]
+    assert not rows['steady'][4]
+    dropped = results(latency=(1.0, 'lower'), throughput=(60.0, 'higher'), steady=(2.0, 'lower'))
+    assert {row[0]: row[4] for row in compare(old, dropped)} == {'latency': False, 'throughput': True, 'steady': False}
+
+
+def test_missing_metric_is_a_regression_and_new_metric_is_not():
+    old = results(latency=(1.0, 'lower'), removed=(5.0, 'lower'))
+    new = results(latency=(1.0, 'lower'), added=(3.0, 'lower'))
+    rows = compare(old, new)
+    assert ('removed', 5.0, None, None, True) in rows
+    assert [row[0] for row in rows if row[4]] == ['removed']
+    assert 'added' not in [row[0] for row in rows]
+
+
+def test_zero_baseline_does_not_divide():
+    rows = compare(results(errors=(0, 'lower')), results(errors=(3, 'lower')))
+    assert rows == [('errors', 0, 3, 0.0, False)]
+
+
+def test_compare_cli_exits_nonzero_on_a_missing_metric(tmp_path):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(results(latency=(1.0, 'lower'), removed=(5.0, 'lower'))))
+    new.write_text(json.dumps(results(latency=(1.0, 'lower'))))
+    run = subprocess.run([sys.executable, "Benchmark.py", "compare", str(old), str(new)], cwd=SRC, capture_output=True, text=True)
+    assert run.returncode == 1
+    assert "missing" in run.stdout
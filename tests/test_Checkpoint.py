@@ -0,0 +1,102 @@
+import json
+import pytest
+import kociemba
+from Checkpoint import Checkpoint, load_checkpoint, restore_bot
+from FastRubiksSolver import FastRubiksSolver
+from MoveOptimizer import optimize
+from RegripPlanner import RegripPlanner, execute_plan
+from RubiksSolver import RubiksSolver
+from Scrambler import scrambles
+from SimulatedBot import SimulatedRubiksBot
+
+# Description: Tests that a solve interrupted midway is resumed from its checkpoint and still solves the cube.
+
+
+STATES = list(scrambles(3, seed=24))
+
+
+class Jam(Exception):
+    pass
+
+
+def interrupted_solve(path, state, stop_after, overlap):
+    """Runs the solve with a checkpoint and raises Jam once step 'stop_after' is saved.
+    Returns: (plan, states the solver was in after every step)"""
+
+    bot = SimulatedRubiksBot(overlap=overlap)
+    try:
+        solver = FastRubiksSolver(None)
+        solver.set_state_from_kociemba(state)
+        plan = RegripPlanner(bot).plan(optimize(RubiksSolver(None).decode_after_kociemba(kociemba.solve(state), half_turns=True)))
+        checkpoint = Checkpoint(path)
+        checkpoint.begin(plan, solver, bot)
+        seen = []
+
+        def on_step(index, step):
+            # The step must be complete on the servos before it is saved
+            if bot.scheduler is not None:
+                assert bot.scheduler.pending is None
+                assert bot.clock.now() >= max(bot.scheduler.busy_until.values())
+            checkpoint.step_done(index, step)
+            seen.append(solver.encode_before_kociemba())
+            if index == stop_after:
+                raise Jam()
+
+        with pytest.raises(Jam):
+            execute_plan(bot, plan, solver, on_step)
+        return plan, seen
+    finally:
+        bot.close()
+
+
+@pytest.mark.parametrize("overlap", [False, True])
+@pytest.mark.parametrize("state", STATES)
+def test_resume_after_interruption_solves(tmp_path, state, overlap):
+    path = str(tmp_path / "checkpoint.json")
+    stop_after = 5
+    plan, seen = interrupted_solve(path, state, stop_after, overlap)
+
+    data = load_checkpoint(path)
+    assert data['steps_done'] == stop_after + 1
+    assert data['remaining_steps'] == plan[stop_after + 1:]
+    assert data['cube_state'] == seen[-1]
+
+    bot = SimulatedRubiksBot(overlap=overlap)
+    try:
+        restore_bot(bot, data)
+        solver = FastRubiksSolver(None)
+        solver.set_state_from_kociemba(data['cube_state'])
+        remaining = RegripPlanner(bot).plan(data['remaining_moves'])
+        checkpoint = Checkpoint(path)
+        checkpoint.begin(remaining, solver, bot)
+        execute_plan(bot, remaining, solver, checkpoint.step_done)
+        assert solver.is_solved()
+        assert load_checkpoint(path)['remaining_steps'] == []
+        checkpoint.clear()
+    finally:
+        bot.close()
+    assert not (tmp_path / "checkpoint.json").exists()
+
+
+def test_save_is_atomic_json(tmp_path):
+    path = str(tmp_path / "checkpoint.json")
+    bot = SimulatedRubiksBot()
+    try:
+        solver = FastRubiksSolver(None)
+        solver.set_state_from_kociemba(STATES[0])
+        Checkpoint(path).begin([['y']], solver, bot)
+    finally:
+        bot.close()
+    with open(path) as file:
+        data = json.load(file)
+    assert data['steps_done'] == 0
+    assert data['cube_state'] == STATES[0]
+    assert not (tmp_path / "checkpoint.json.tmp").exists()
+
+
+def test_inconsistent_checkpoint_rejected(tmp_path):
+    path = tmp_path / "checkpoint.json"
+    path.write_text(json.dumps({'cube_state': STATES[0], 'bot_state': [], 'curr_angle': 0, 'steps_done': 0,
+                                'remaining_steps': [['turn', 'FACE', 'cw']]}))
+    with pytest.raises(ValueError):
+        load_checkpoint(str(path))
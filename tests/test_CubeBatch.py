@@ -0,0 +1,76 @@
+import random
+import numpy as np
+import pytest
+from CubeBatch import CubeBatch, MOVE_NAMES, compile_moves
+from FastRubiksSolver import FastRubiksSolver
+from RubiksSolver import RubiksSolver
+from Scrambler import scrambles
+
+# Description: Tests that moves applied to a whole batch leave every row where FastRubiksSolver and RubiksSolver leave it.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+DIRECTIONS = ['cw', 'ccw', 'half']
+STATES = list(scrambles(8, seed=2))
+
+
+def after_move(name):
+    solver = FastRubiksSolver(None)
+    solver.apply_move(name)
+    return solver.encode_before_kociemba()
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_apply_move_matches_fast_solver(seed):
+    rng = random.Random(seed)
+    batch = CubeBatch.from_kociemba(STATES)
+    solvers = []
+    for state in STATES:
+        solvers.append(FastRubiksSolver(None))
+        solvers[-1].set_state_from_kociemba(state)
+    for name in [rng.choice(MOVE_NAMES) for _ in range(30)]:
+        batch.apply_move(name)
+        for solver in solvers:
+            solver.apply_move(name)
+        assert batch.encode_before_kociemba() == [solver.encode_before_kociemba() for solver in solvers]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_apply_sequence_matches_rubiks_solver(seed):
+    rng = random.Random(seed)
+    moves = [[rng.choice(SIDES), rng.choice(DIRECTIONS)] for _ in range(40)]
+    slow = RubiksSolver(None)
+    slow.execute_solution(moves)
+    batch = CubeBatch.solved(3)
+    batch.apply_sequence(moves)
+    assert batch.encode_before_kociemba() == [slow.encode_before_kociemba()] * 3
+
+
+def test_apply_row_moves_matches_per_row():
+    batch = CubeBatch.from_kociemba(STATES)
+    move_ids = np.arange(len(STATES)) % len(MOVE_NAMES)
+    batch.apply_row_moves(move_ids)
+    for state, move_id, row in zip(STATES, move_ids, batch.encode_before_kociemba()):
+        solver = FastRubiksSolver(None)
+        solver.set_state_from_kociemba(state)
+        solver.apply_move(MOVE_NAMES[move_id])
+        assert row == solver.encode_before_kociemba()
+
+
+def test_randomize_and_is_solved():
+    batch = CubeBatch.solved(100)
+    assert batch.is_solved().all()
+    batch.randomize(count=20, rng=0)
+    assert not batch.is_solved().any()
+
+
+def test_move_names_normalized_or_rejected():
+    assert (compile_moves("R2'") == compile_moves("R2")).all()
+    batch = CubeBatch.solved(1)
+    batch.apply_move("U2'")
+    assert batch.encode_before_kociemba() == [after_move("U2")]
+    for moves in ["R3", "X", "R U x"]:
+        with pytest.raises(ValueError):
+            compile_moves(moves)
+    with pytest.raises(ValueError):
+        batch.apply_move("R'2")
@@ -0,0 +1,40 @@
+import pytest
+from CubeSymmetry import SYMMETRIES, INVERSES, ROTATIONS, canonical_form
+from CubieState import CubieState
+from Scrambler import scrambles
+
+# Description: Tests that the 48 cube symmetries round-trip, carry solutions with the states, and canonicalize consistently.
+
+
+STATES = list(scrambles(3, seed=5))
+SCRAMBLE = "R U2 F' L D B2 R' U"
+
+
+def test_there_are_48_symmetries_with_24_rotations():
+    assert len(SYMMETRIES) == 48
+    assert len({sym.gather for sym in SYMMETRIES}) == 48
+    assert not any(sym.mirrored for sym in ROTATIONS)
+    assert all(sym.mirrored for sym in SYMMETRIES[24:])
+
+
+@pytest.mark.parametrize("index", range(48))
+def test_inverse_round_trips(index):
+    sym, inverse = SYMMETRIES[index], SYMMETRIES[INVERSES[index]]
+    for state in STATES:
+        assert inverse.transform_state(sym.transform_state(state)) == state
+        assert sym.transform_state(inverse.transform_state(state)) == state
+
+
+@pytest.mark.parametrize("index", range(48))
+def test_transformed_scramble_makes_transformed_state(index):
+    sym = SYMMETRIES[index]
+    state = CubieState.from_moves(SCRAMBLE).to_kociemba()
+    assert CubieState.from_moves(sym.transform_solution(SCRAMBLE)).to_kociemba() == sym.transform_state(state)
+
+
+def test_symmetric_copies_share_a_canonical_form():
+    state = STATES[0]
+    key, index = canonical_form(state)
+    assert SYMMETRIES[index].transform_state(state) == key
+    for sym in SYMMETRIES:
+        assert canonical_form(sym.transform_state(state))[0] == key
@@ -0,0 +1,59 @@
+import pytest
+from CubeValidator import validate
+from CubieCube import CubieCube
+from Scrambler import scrambles
+
+# Description: Tests that the validator accepts legal states and names the law an unsolvable state breaks.
+
+
+STATES = list(scrambles(3, seed=12))
+
+
+def broken(state, change):
+    """Returns the kociemba string of 'state' with one cubie level change made."""
+
+    cube = CubieCube.from_kociemba(state)
+    change(cube)
+    return cube.to_kociemba()
+
+
+def checks(state):
+    return {problem['check'] for problem in validate(state).problems}
+
+
+def twist_corner(cube):
+    cube.co[0] = (cube.co[0] + 1) % 3
+
+
+def flip_edge(cube):
+    cube.eo[0] ^= 1
+
+
+def swap_edges(cube):
+    cube.ep[0], cube.ep[1] = cube.ep[1], cube.ep[0]
+    cube.eo[0], cube.eo[1] = cube.eo[1], cube.eo[0]
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_accepts_legal_states(state):
+    report = validate(state)
+    assert report.valid, str(report)
+    assert report.cube.to_kociemba() == state
+
+
+@pytest.mark.parametrize("state", STATES)
+@pytest.mark.parametrize("change, check", [(twist_corner, 'twist'), (flip_edge, 'flip'), (swap_edges, 'parity')])
+def test_rejects_unsolvable_states(state, change, check):
+    bad = broken(state, change)
+    assert not validate(bad).valid
+    assert checks(bad) == {check}
+
+
+def test_raise_if_invalid():
+    with pytest.raises(ValueError):
+        validate(broken(STATES[0], twist_corner)).raise_if_invalid()
+
+
+def test_rejects_wrong_color_counts():
+    state = STATES[0]
+    assert not validate(("U" if state[0] != "U" else "R") + state[1:]).valid
@@ -0,0 +1,47 @@
+import random
+import pytest
+from CubieCube import MOVE_NAMES
+from CubieState import CubieState, SOLVED, sequence_order
+from RubiksSolver import RubiksSolver
+
+# Description: Tests that CubieState follows RubiksSolver move for move and that its group operations hold.
+
+
+def random_sequence(seed, length=40):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(MOVE_NAMES) for _ in range(length))
+
+
+def rubiks_solver_state(sequence):
+    solver = RubiksSolver(None)
+    solver.execute_solution(solver.decode_after_kociemba(sequence, half_turns=True))
+    return solver.encode_before_kociemba()
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_matches_rubiks_solver(seed):
+    sequence = random_sequence(seed)
+    assert CubieState.from_moves(sequence).to_kociemba() == rubiks_solver_state(sequence)
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_conversions_round_trip(seed):
+    state = CubieState.from_moves(random_sequence(seed))
+    assert CubieState.from_key(state.key) == state
+    assert CubieState.from_kociemba(state.to_kociemba()) == state
+    assert CubieState.from_cube_state(state.to_cube_state()) == state
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_group_operations(seed):
+    a = CubieState.from_moves(random_sequence(seed))
+    b = CubieState.from_moves(random_sequence(seed + 100))
+    assert (a * a.inverse()).is_solved()
+    assert (a * b).inverse() == b.inverse() * a.inverse()
+    assert a.apply_moves(random_sequence(seed + 100)) == a * b
+
+
+def test_order():
+    assert sequence_order("R U") == 105
+    assert CubieState.from_moves("R").order() == 4
+    assert SOLVED.order() == 1
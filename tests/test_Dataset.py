@@ -0,0 +1,50 @@
+import random
+import pytest
+from CubieCube import MOVE_NAMES
+from CubieState import CubieState
+from Dataset import Dataset, DatasetWriter, pack_moves, unpack_moves
+from Scrambler import scrambles
+
+# Description: Tests that dataset records read back exactly as they were written.
+
+
+def records(count, seed=0):
+    rng = random.Random(seed)
+    return [(state, " ".join(rng.choice(MOVE_NAMES) for _ in range(rng.randint(0, 24))))
+            for state in scrambles(count, seed=seed)]
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "data.rkds")
+    written = records(50)
+    with DatasetWriter(path) as writer:
+        for state, solution in written:
+            writer.append(state, solution)
+
+    dataset = Dataset(path)
+    assert len(dataset) == 50
+    assert list(dataset) == written
+    assert dataset[17] == written[17]
+    assert dataset.state(3) == CubieState.from_kociemba(written[3][0])
+
+
+def test_empty_dataset(tmp_path):
+    path = str(tmp_path / "empty.rkds")
+    DatasetWriter(path).close()
+    assert len(Dataset(path)) == 0
+    assert list(Dataset(path)) == []
+
+
+def test_move_packing():
+    solution = "R U2 F' D L2 B'"
+    assert unpack_moves(*pack_moves(solution)) == solution
+    assert unpack_moves(*pack_moves("R2' U")) == "R2 U"
+    with pytest.raises(ValueError):
+        pack_moves("R " * 25)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        Dataset(str(path))
@@ -0,0 +1,114 @@
+import random
+import pytest
+from RubiksSolver import RubiksSolver
+from FastRubiksSolver import FastRubiksSolver
+
+# Description: Tests that the array backed FastRubiksSolver follows RubiksSolver move for move.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+DIRECTIONS = ['cw', 'ccw', 'half']
+
+
+def random_moves(rng, count):
+    return [[rng.choice(SIDES), rng.choice(DIRECTIONS)] for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_rubiks_solver_move_by_move(seed):
+    rng = random.Random(seed)
+    slow, fast = RubiksSolver(None), FastRubiksSolver(None)
+    for side, direction in random_moves(rng, 60):
+        for solver in (slow, fast):
+            solver.current_side_being_moved = side
+            solver.current_direction_of_rotation = direction
+            solver.make_move()
+        assert fast.encode_before_kociemba() == slow.encode_before_kociemba()
+    assert fast.cube_state == slow.cube_state
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_execute_solution_matches(seed):
+    moves = random_moves(random.Random(seed), 40)
+    slow, fast = RubiksSolver(None), FastRubiksSolver(None)
+    slow.execute_solution(moves)
+    fast.execute_solution(moves)
+    assert fast.encode_before_kociemba() == slow.encode_before_kociemba()
+    assert (fast.current_side_being_moved, fast.current_direction_of_rotation) == tuple(moves[-1])
+    assert (slow.current_side_being_moved, slow.current_direction_of_rotation) == tuple(moves[-1])
+
+
+def test_state_round_trips_through_kociemba_and_dict():
+    slow = RubiksSolver(None)
+    slow.execute_solution(random_moves(random.Random(7), 30))
+    fast = FastRubiksSolver(None)
+    fast.set_state_from_kociemba(slow.encode_before_kociemba())
+    assert fast.cube_state == slow.cube_state
+    other = FastRubiksSolver(None)
+    other.cube_state = slow.cube_state
+    assert other.encode_before_kociemba() == slow.encode_before_kociemba()
+
+
+def test_is_solved_after_scramble_and_undo():
+    moves = random_moves(random.Random(11), 25)
+    undo = [[side, {'cw': 'ccw', 'ccw': 'cw', 'half': 'half'}[direction]] for side, direction in reversed(moves)]
+    fast = FastRubiksSolver(None)
+    assert fast.is_solved()
+    fast.execute_solution(moves)
+    assert not fast.is_solved()
+    fast.execute_solution(undo)
+    assert fast.is_solved()
+
+
+def test_state_hash_follows_moves():
+    from FastRubiksSolver import zobrist_hash
+    moves = random_moves(random.Random(3), 30)
+    fast, other = FastRubiksSolver(None), FastRubiksSolver(None)
+    seen = {fast.state_key()}
+    for side, direction in moves:
+        fast.current_side_being_moved = side
+        fast.current_direction_of_rotation = direction
+        fast.make_move()
+        assert fast.state_hash == zobrist_hash(fast.facelets)
+        seen.add(fast.state_key())
+    assert len(seen) > 1
+
+    other.set_state_from_kociemba(fast.encode_before_kociemba())
+    assert other.state_key() == fast.state_key()
+    assert other.same_state(fast)
+    assert not other.same_state(FastRubiksSolver(None))
+    assert fast.misplaced == sum(a != b for a, b in zip(fast.encode_before_kociemba(), FastRubiksSolver(None).encode_before_kociemba()))
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_incremental_hash_and_misplaced_follow_moves(seed):
+    from FastRubiksSolver import zobrist_hash, count_misplaced
+    rng = random.Random(seed)
+    fast, lazy = FastRubiksSolver(None, incremental=True), FastRubiksSolver(None)
+    for name in [rng.choice(list(fast.move_tables)) for _ in range(200)]:
+        fast.apply_move(name)
+        lazy.apply_move(name)
+        assert fast._state_hash == zobrist_hash(fast.facelets)
+        assert fast._misplaced == count_misplaced(fast.facelets)
+        assert fast.state_hash == lazy.state_hash
+        assert fast.misplaced == lazy.misplaced
+        assert fast.is_solved() == lazy.is_solved()
+
+    # Assigning a state recomputes both, and make_move goes through the incremental path
+    fast.set_state_from_kociemba(lazy.encode_before_kociemba())
+    fast.current_side_being_moved, fast.current_direction_of_rotation = 'RIGHT', 'half'
+    fast.make_move()
+    assert fast._state_hash == zobrist_hash(fast.facelets)
+    assert fast._misplaced == count_misplaced(fast.facelets)
+
+
+def test_incremental_is_solved_after_scramble_and_undo():
+    moves = random_moves(random.Random(12), 25)
+    undo = [[side, {'cw': 'ccw', 'ccw': 'cw', 'half': 'half'}[direction]] for side, direction in reversed(moves)]
+    fast = FastRubiksSolver(None, incremental=True)
+    for side, direction in moves + undo:
+        fast.current_side_being_moved = side
+        fast.current_direction_of_rotation = direction
+        fast.make_move()
+    assert fast.misplaced == 0
+    assert fast.is_solved()
@@ -0,0 +1,120 @@
+import json
+import pytest
+import Main
+from CubieState import CubieState
+from Main import execute_results, parse_state, read_lines, run_batch, solve_lines
+from Scrambler import scrambles
+
+# Description: Tests the batch path of Main: parsing, solving and executing many states, one result per line.
+
+
+STATES = list(scrambles(3, seed=22))
+SOLVED_SIDES = "ggggggggg bbbbbbbbb ooooooooo rrrrrrrrr wwwwwwwww yyyyyyyyy"
+
+
+def test_read_lines_skips_blanks_and_comments():
+    lines = ["# states\n", "\n", STATES[0] + "\n", "  \n", STATES[1]]
+    assert list(read_lines(lines)) == [(3, STATES[0]), (5, STATES[1])]
+
+
+def test_parse_state_forms():
+    assert parse_state(STATES[0]) == STATES[0]
+    sides = parse_state(SOLVED_SIDES)
+    assert sides['FACE'] == ['Green'] * 9 and sides['BOTTOM'] == ['Yellow'] * 9
+    with pytest.raises(ValueError):
+        parse_state("not a cube")
+
+
+def test_solve_lines_solves_and_reports_bad_lines():
+    lines = [(1, STATES[0]), (2, "not a cube"), (3, "U" * 54), (4, SOLVED_SIDES)]
+    results = list(solve_lines(lines))
+    assert [result['line'] for result in results] == [1, 2, 3, 4]
+    assert CubieState.from_kociemba(STATES[0]).apply_moves(results[0]['solution']).is_solved()
+    assert results[0]['moves'] == len(results[0]['solution'].split())
+    assert 'error' in results[1]
+    assert results[2]['error'] == "Invalid cube state" and results[2]['problems']
+    assert CubieState.from_kociemba(results[3]['state']).apply_moves(results[3]['solution']).is_solved()
+
+
+def test_solve_lines_keeps_going_after_a_backend_error(monkeypatch):
+    backend = Main.get_backend('kociemba')
+
+    def solve(cubestring):
+        if cubestring == STATES[0]:
+            raise RuntimeError("search gave up")
+        return backend(cubestring)
+    monkeypatch.setattr(Main, 'get_backend', lambda name: solve)
+    results = list(solve_lines([(1, STATES[0]), (2, STATES[1])]))
+    assert results[0]['error'] == "RuntimeError: search gave up"
+    assert 'solution' in results[1]
+
+
+def test_execute_results_on_simulated_bots():
+    results = list(execute_results(solve_lines(enumerate(STATES, 1)), simulate=True))
+    assert all(result['solved'] for result in results)
+    assert all(result['bot_seconds'] > 0 for result in results)
+
+
+def test_execute_error_is_recorded_and_the_batch_goes_on(monkeypatch):
+    execute_plan = Main.execute_plan
+    calls = []
+
+    def jam_first(bot, steps, solver):
+        calls.append(bot)
+        if len(calls) == 1:
+            raise RuntimeError("servo jammed")
+        execute_plan(bot, steps, solver)
+    monkeypatch.setattr(Main, 'execute_plan', jam_first)
+    results = list(execute_results(solve_lines(enumerate(STATES, 1)), simulate=True))
+    assert results[0]['error'] == "RuntimeError: servo jammed"
+    assert all(result['solved'] for result in results[1:])    # The jammed bot's pins were released
+
+
+def test_run_batch_writes_one_line_per_state(tmp_path):
+    source = tmp_path / "states.txt"
+    output = tmp_path / "results.jsonl"
+    source.write_text("\n".join(["# batch", STATES[0], "bad", STATES[1]]) + "\n")
+    counts = run_batch(str(source), str(output), execute=True, simulate=True)
+    assert counts == {'states': 3, 'solved': 2, 'errors': 1}
+    results = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [result['line'] for result in results] == [2, 3, 4]
+    assert results[0]['solved'] and results[2]['solved']
+
+
+def test_run_batch_real_bot_needs_a_file():
+    with pytest.raises(ValueError):
+        run_batch('-', execute=True)
+
+
+def test_real_bot_is_reused_with_a_prompt_between_cubes(monkeypatch):
+    import RubiksBot
+    from SimulatedBot import SimulatedRubiksBot
+    bots = []
+
+    def make_bot(overlap=False):
+        bots.append(SimulatedRubiksBot(overlap=overlap))
+        return bots[-1]
+    monkeypatch.setattr(RubiksBot, 'RubiksBot', make_bot)
+    prompted = []
+    results = list(execute_results(solve_lines(enumerate(STATES, 1)), next_cube=lambda result: prompted.append(result['line'])))
+    assert len(bots) == 1
+    assert prompted == [2, 3]
+    assert all(result['solved'] for result in results)
+    assert bots[0].servo_x.closed
+
+
+def test_main_closes_the_bot_when_the_solver_raises(monkeypatch):
+    from SimulatedBot import SimulatedRubiksBot
+    sides = iter(SOLVED_SIDES.split())
+    monkeypatch.setattr('builtins.input', lambda prompt="": next(sides))
+
+    def fail(cubestring):
+        raise RuntimeError("solver crashed")
+    monkeypatch.setattr(Main, 'get_backend', lambda name: fail)
+    closed = []
+    monkeypatch.setattr(SimulatedRubiksBot, 'close', lambda bot: closed.append(bot))
+    with pytest.raises(RuntimeError):
+        Main.main(simulate=True)
+    monkeypatch.undo()
+    assert len(closed) == 1
+    closed[0].close()     # Release its mock pins for real
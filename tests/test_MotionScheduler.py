@@ -0,0 +1,116 @@
+import random
+import pytest
+from MotionScheduler import MotionScheduler
+from SimulatedBot import VirtualClock
+
+# Description: Tests that scheduled servo commands end where the same commands issued one by one end, and that no command
+#              ...starts before the servos it waits for are idle.
+
+
+class FakeServo:
+    """Servo that records every angle it is commanded to, with the clock time."""
+
+    def __init__(self, clock) -> None:
+        self.clock = clock
+        self.log = []
+
+    @property
+    def angle(self):
+        return self.log[-1][1] if self.log else None
+
+    @angle.setter
+    def angle(self, angle):
+        self.log.append((self.clock.now(), angle))
+
+
+class RecordingScheduler(MotionScheduler):
+    """Records (start, name, hold, waits) of every command that reaches a servo."""
+
+    def __init__(self, clock) -> None:
+        super().__init__(clock)
+        self.issued = []
+
+    def issue(self, name, servo, angle, hold, waits):
+        commands = self.commands
+        super().issue(name, servo, angle, hold, waits)
+        if self.commands > commands:
+            self.issued.append((self.commanded_at[name], name, hold, waits))
+
+
+def random_commands(rng, count):
+    """Commands shaped like RubiksBot's: every command waits for its own servo, only servo_y's are deferrable."""
+
+    commands = []
+    for _ in range(count):
+        name = rng.choice('xy')
+        waits = rng.choice([name, 'xy'])
+        commands.append((name, rng.choice([0, 90, 180]), rng.choice([0.1, 0.2, 0.5, 1.0]), waits, name == 'y' and rng.random() < 0.5))
+    return commands
+
+
+def run(commands, scheduled):
+    clock = VirtualClock()
+    servos = {'x': FakeServo(clock), 'y': FakeServo(clock)}
+    scheduler = RecordingScheduler(clock)
+    for name, angle, hold, waits, deferrable in commands:
+        if scheduled:
+            scheduler.move(name, servos[name], angle, hold, waits, deferrable)
+        else:
+            servos[name].angle = angle
+            clock.sleep(hold)
+    if scheduled:
+        scheduler.finish()
+    return clock, servos, scheduler
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_same_final_angles_as_unscheduled(seed):
+    commands = random_commands(random.Random(seed), 40)
+    _, plain, _ = run(commands, scheduled=False)
+    clock, servos, scheduler = run(commands, scheduled=True)
+    for name in 'xy':
+        assert servos[name].angle == plain[name].angle
+    assert scheduler.pending is None
+    assert clock.now() >= max(scheduler.busy_until.values())
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_commands_wait_for_busy_servos(seed):
+    commands = random_commands(random.Random(seed), 40)
+    plain_clock, _, _ = run(commands, scheduled=False)
+    clock, _, scheduler = run(commands, scheduled=True)
+    last = {}   # servo -> (start, hold) of its last command
+    for start, name, hold, waits in scheduler.issued:
+        for other in waits:
+            if other in last:
+                assert start >= last[other][0] + last[other][1] - 1e-9
+        last[name] = (start, hold)
+    assert [start for start, *_ in scheduler.issued] == sorted(start for start, *_ in scheduler.issued)
+    assert clock.now() <= plain_clock.now() + 1e-9     # Overlap and merges never make the sequence slower
+
+
+def test_hood_raise_dropped_before_clamp():
+    # flatten_cube then turn_cube: the hood is raised after the flatten only to be lowered again to clamp
+    clock = VirtualClock()
+    y = FakeServo(clock)
+    scheduler = MotionScheduler(clock)
+    scheduler.move('y', y, 180, 0.2, waits='y')
+    scheduler.move('y', y, 60, 0.5, waits='y', deferrable=True)
+    scheduler.move('y', y, 180, 0.5)
+    scheduler.finish()
+    assert [angle for _, angle in y.log] == [180]
+    assert scheduler.merged == 2
+    assert clock.now() == pytest.approx(0.5)
+
+
+def test_deferred_raise_issued_before_other_servo():
+    clock = VirtualClock()
+    x, y = FakeServo(clock), FakeServo(clock)
+    scheduler = MotionScheduler(clock)
+    scheduler.move('y', y, 180, 0.2, waits='y')
+    scheduler.move('y', y, 60, 0.5, waits='y', deferrable=True)
+    scheduler.move('x', x, 90, 1.0)
+    scheduler.finish()
+    assert y.log == [(0.0, 180), (0.2, 60)]
+    assert x.log == [(0.7, 90)]
+    assert clock.now() == pytest.approx(1.7)
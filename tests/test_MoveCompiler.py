@@ -0,0 +1,95 @@
+import random
+import pytest
+import kociemba
+from RubiksSolver import RubiksSolver
+from FastRubiksSolver import FastRubiksSolver, facelets_from_kociemba, facelets_to_kociemba
+from MoveCompiler import MoveCompiler, move_names
+from Scrambler import scrambles
+
+# Description: Tests that a compiled move sequence does what its moves do one at a time.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+DIRECTIONS = ['cw', 'ccw', 'half']
+
+
+def random_moves(rng, count):
+    return [[rng.choice(SIDES), rng.choice(DIRECTIONS)] for _ in range(count)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_matches_rubiks_solver(seed):
+    moves = random_moves(random.Random(seed), 40)
+    slow = RubiksSolver(None)
+    start = slow.encode_before_kociemba()
+    slow.execute_solution(moves)
+    compiled = MoveCompiler().compile(moves)
+    assert facelets_to_kociemba(compiled.apply(facelets_from_kociemba(start))) == slow.encode_before_kociemba()
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_apply_sequence_matches_execute_solution(seed):
+    moves = random_moves(random.Random(seed), 40)
+    stepped, compiled = FastRubiksSolver(None), FastRubiksSolver(None)
+    stepped.execute_solution(moves)
+    compiled.apply_sequence(moves)
+    assert compiled.encode_before_kociemba() == stepped.encode_before_kociemba()
+
+
+def test_move_forms_compile_alike():
+    compiler = MoveCompiler()
+    expected = compiler.compile("R U2 F'").perm
+    assert compiler.compile(["R", "U2", "F'"]).perm == expected
+    assert compiler.compile([['RIGHT', 'cw'], ['TOP', 'half'], ['FACE', 'ccw']]).perm == expected
+    assert list(move_names("R U2 F'")) == ["R", "U2", "F'"]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_compose_inverse_power_order(seed):
+    rng = random.Random(seed)
+    first, second = random_moves(rng, 20), random_moves(rng, 20)
+    compiler = MoveCompiler()
+    a, b = compiler.compile(first), compiler.compile(second)
+    assert (a * b).perm == compiler.compile(first + second).perm
+    assert (a * a.inverse()).is_identity()
+    assert (a ** 3).perm == (a * a * a).perm
+    assert (a ** -1).perm == a.inverse().perm
+    assert (a ** a.order()).is_identity()
+
+
+def test_known_orders():
+    compiler = MoveCompiler()
+    assert compiler.compile("R").order() == 4
+    assert compiler.compile("R U").order() == 105
+    assert compiler.compile("").is_identity()
+
+
+@pytest.mark.parametrize("state", list(scrambles(3, 0)))
+def test_solves(state):
+    compiler = MoveCompiler()
+    solution = kociemba.solve(state)
+    assert compiler.solves(state, solution)
+    assert not compiler.solves(state, solution + " R")
+
+
+def test_cache_counts_hits_and_evicts():
+    compiler = MoveCompiler(max_size=2)
+    for sequence in ["R U", "R U", "F", "L", "R U"]:
+        compiler.compile(sequence)
+    stats = compiler.stats()
+    assert stats['size'] == 2
+    assert stats['hits'] == 1
+    assert stats['misses'] == 4
+
+
+def test_one_off_sequences_are_not_cached():
+    from MoveCompiler import COMPILER
+    compiler = MoveCompiler()
+    compiler.compile("R U")
+    assert compiler.compile("F D", cache=False).perm == compiler.compile("F D").perm
+    assert compiler.compile("R U", cache=False) is compiler.compile("R U")    # Cached sequences are still reused
+    assert compiler.stats()['size'] == 2
+
+    size = COMPILER.stats()['size']
+    FastRubiksSolver(None).execute_solution(random_moves(random.Random(99), 30))
+    assert COMPILER.stats()['size'] == size
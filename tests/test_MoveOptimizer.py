@@ -0,0 +1,66 @@
+import random
+import pytest
+from FastRubiksSolver import FastRubiksSolver
+from MoveOptimizer import count_quarter_turns, estimate_turn_seconds, optimize, report
+from RegripPlanner import RegripPlanner, execute_plan
+from SimulatedBot import SimulatedRubiksBot
+
+# Description: Tests that optimized solutions reach the same state with no more moves, and the turn time estimate.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+DIRECTIONS = ['cw', 'ccw', 'half']
+
+
+def random_moves(rng, count):
+    return [[rng.choice(SIDES), rng.choice(DIRECTIONS)] for _ in range(count)]
+
+
+def final_state(moves):
+    solver = FastRubiksSolver(None)
+    for side, direction in moves:
+        solver.current_side_being_moved = side
+        solver.current_direction_of_rotation = direction
+        solver.make_move()
+    return solver.encode_before_kociemba()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_same_state_and_never_longer(seed):
+    rng = random.Random(seed)
+    # Few sides, so merges and cancellations happen often
+    moves = [[rng.choice(['TOP', 'BOTTOM', 'RIGHT']), rng.choice(DIRECTIONS)] for _ in range(rng.randint(0, 30))]
+    optimized = optimize(moves)
+    assert final_state(optimized) == final_state(moves)
+    assert len(optimized) <= len(moves)
+    assert count_quarter_turns(optimized) <= count_quarter_turns(moves)
+    assert optimize(optimized) == optimized
+
+
+@pytest.mark.parametrize("moves, expected", [
+    ([['TOP', 'cw'], ['BOTTOM', 'cw'], ['TOP', 'cw']], [['TOP', 'half'], ['BOTTOM', 'cw']]),
+    ([['RIGHT', 'cw'], ['RIGHT', 'ccw']], []),
+    ([['RIGHT', 'half'], ['RIGHT', 'cw']], [['RIGHT', 'ccw']]),
+    ([['FACE', 'cw'], ['TOP', 'cw'], ['FACE', 'cw']], [['FACE', 'cw'], ['TOP', 'cw'], ['FACE', 'cw']]),
+])
+def test_merges(moves, expected):
+    assert optimize(moves) == expected
+
+
+def test_report_counts():
+    before = [['TOP', 'cw'], ['TOP', 'cw'], ['LEFT', 'cw'], ['LEFT', 'ccw']]
+    result = report(before, optimize(before))
+    assert result['bot_turns_saved'] == 3
+    assert result['quarter_turns_saved'] == 2
+    assert result['seconds_saved'] > 0
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_turn_estimate_is_a_lower_bound(seed):
+    moves = optimize(random_moves(random.Random(seed), 25))
+    bot = SimulatedRubiksBot()
+    try:
+        execute_plan(bot, RegripPlanner(bot).plan(moves), FastRubiksSolver(None))
+        assert estimate_turn_seconds(moves) <= bot.action_seconds['turn_cube'] + 1e-9
+    finally:
+        bot.close()
@@ -0,0 +1,64 @@
+import pytest
+from CubieState import CubieState
+from NearSolvedTable import NearSolvedTable, write_table
+from Scrambler import scrambles
+
+# Description: Tests that a written near solved table reads back with an optimal solution for every state in it.
+
+
+DEPTH = 3
+
+
+@pytest.fixture(scope="module")
+def table(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("table") / "near.rknt")
+    count = write_table(path, DEPTH)
+    table = NearSolvedTable(path)
+    assert len(table) == count
+    return table
+
+
+def test_state_counts(table):
+    # States at exactly 0, 1, 2 and 3 moves from solved in the half turn metric
+    assert len(table) == 1 + 18 + 243 + 3240
+
+
+def test_keys_sorted(table):
+    assert all(table.keys[i] < table.keys[i + 1] for i in range(len(table) - 1))
+
+
+@pytest.mark.parametrize("moves", [1, 2, 3])
+def test_lookup_solves_with_optimal_length(table, moves):
+    for state in scrambles(20, seed=moves, moves=moves):
+        solution = table.lookup(state)
+        assert solution is not None
+        assert len(solution.split()) <= moves
+        assert CubieState.from_kociemba(state).apply_moves(solution).is_solved()
+
+
+def test_solved_state_is_empty_solution(table):
+    assert table.lookup(CubieState().to_kociemba()) == ""
+
+
+def test_miss_falls_back_to_solver(table):
+    state = next(scrambles(1, seed=0))
+    assert table.lookup(state) is None
+    solve = table.solver(lambda cubestring: "FALLBACK")
+    assert solve(state) == "FALLBACK"
+
+
+def test_stats_count_hits_and_misses(tmp_path):
+    path = str(tmp_path / "near.rknt")
+    write_table(path, 2)
+    table = NearSolvedTable(path)
+    table.lookup(next(scrambles(1, seed=0, moves=1)))
+    table.lookup(next(scrambles(1, seed=0)))
+    stats = table.stats()
+    assert (stats['depth'], stats['hits'], stats['misses'], stats['hit_rate']) == (2, 1, 1, 0.5)
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        NearSolvedTable(str(path))
@@ -0,0 +1,105 @@
+from threading import Event
+from time import sleep
+import pytest
+from Pipeline import BotRunner, StageTimer
+
+# Description: Tests that the bot's thread connects first, executes the queued steps in order and is always shut down.
+
+
+class FakeBot:
+    """Records the calls a BotRunner makes. connect blocks until 'connected' is set."""
+
+    def __init__(self, fail_on=None) -> None:
+        self.calls = []
+        self.connected = Event()
+        self.fail_on = fail_on
+        self.closed = False
+
+    def connect(self):
+        self.connected.wait(5)
+        self.calls.append('connect')
+
+    def turn_bot_x(self, direction):
+        self.calls.append(('x', direction))
+
+    def turn_bot_y(self):
+        if self.fail_on == 'y':
+            raise RuntimeError("servo jammed")
+        self.calls.append(('y',))
+
+    def turn_cube(self, direction):
+        self.calls.append(('turn', direction))
+
+    def finish(self):
+        self.calls.append('finish')
+
+    def close(self):
+        self.closed = True
+
+
+def test_stage_timer_orders_stages():
+    timer = StageTimer()
+    with timer.stage('first'):
+        sleep(0.01)
+    with timer.stage('second'):
+        pass
+    report = timer.report()
+    assert list(report['stages']) == ['first', 'second']
+    assert report['stages']['first']['seconds'] >= 0.01
+    assert report['stages']['first']['end'] <= report['stages']['second']['start']
+    assert report['wall_seconds'] >= report['stages']['second']['end']
+
+
+def test_steps_run_in_order_after_connect():
+    bot = FakeBot()
+    timer = StageTimer()
+    done = []
+    runner = BotRunner(bot, timer=timer, on_step=lambda index, step: done.append(index)).start()
+    steps = [['x', 'cw'], ['y'], ['turn', 'BOTTOM', 'half'], ['x', 'ccw']]
+    for step in steps:
+        runner.put(step)
+    runner.close()
+    assert bot.calls == []     # Steps wait for the connect
+    bot.connected.set()
+    runner.join()
+    assert bot.calls[0] == 'connect'
+    assert [call for call in bot.calls if call not in ('connect', 'finish')] == [('x', 'cw'), ('y',), ('turn', 'half'), ('x', 'ccw')]
+    assert bot.calls[-1] == 'finish'
+    assert done == [0, 1, 2, 3]
+    stages = timer.report()['stages']
+    assert stages['connect']['end'] <= stages['execute']['start']
+    assert runner.shutdown()
+    assert bot.closed
+
+
+def test_shutdown_before_any_step_joins_the_thread():
+    bot = FakeBot()
+    bot.connected.set()
+    runner = BotRunner(bot).start()
+    assert runner.shutdown(timeout=5)
+    assert not runner.thread.is_alive()
+    assert bot.calls == ['connect']
+    assert bot.closed
+
+
+def test_shutdown_times_out_on_a_stuck_connect():
+    bot = FakeBot()
+    runner = BotRunner(bot).start()
+    assert not runner.shutdown(timeout=0.05)
+    assert not bot.closed
+    bot.connected.set()
+    runner.thread.join(5)
+    assert not runner.thread.is_alive()
+
+
+def test_error_is_raised_by_join_and_bot_left_open():
+    bot = FakeBot(fail_on='y')
+    bot.connected.set()
+    runner = BotRunner(bot).start()
+    runner.put(['x', 'cw'])
+    runner.put(['y'])
+    runner.close()
+    with pytest.raises(RuntimeError):
+        runner.join()
+    assert runner.shutdown()
+    assert not bot.closed
@@ -0,0 +1,51 @@
+import random
+import pytest
+import kociemba
+from FastRubiksSolver import FastRubiksSolver
+from MoveOptimizer import optimize
+from RegripPlanner import RegripPlanner, execute_plan
+from RubiksBot import RubiksBot
+from RubiksSolver import RubiksSolver
+from Scrambler import scrambles
+from SimulatedBot import SimulatedRubiksBot
+
+# Description: Tests that regrip plans are never slower than the load_instructions baseline and still solve the cube.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+STATES = list(scrambles(4, seed=8))
+
+
+@pytest.fixture(scope="module")
+def planner():
+    return RegripPlanner(RubiksBot(connect=False))
+
+
+def decoded_solution(state):
+    return optimize(RubiksSolver(None).decode_after_kociemba(kociemba.solve(state), half_turns=True))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_plan_never_costs_more_than_baseline(planner, seed):
+    rng = random.Random(seed)
+    moves = [[rng.choice(SIDES), rng.choice(['cw', 'ccw', 'half'])] for _ in range(rng.randint(1, 25))]
+    steps = planner.plan(moves)
+    assert planner.plan_seconds(steps) <= planner.plan_seconds(planner.baseline_plan(moves)) + 1e-9
+    assert sum(step[0] == 'turn' for step in steps) == len(moves)
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_planned_solution_solves_the_cube(planner, state):
+    moves = decoded_solution(state)
+    steps = planner.plan(moves)
+    report = planner.report(moves, steps)
+    assert report['planned_seconds'] <= report['baseline_seconds']
+
+    bot = SimulatedRubiksBot()
+    try:
+        solver = FastRubiksSolver(None)
+        solver.set_state_from_kociemba(state)
+        execute_plan(bot, steps, solver)
+        assert solver.is_solved()
+    finally:
+        bot.close()
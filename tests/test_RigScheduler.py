@@ -0,0 +1,25 @@
+import pytest
+from RigScheduler import RigScheduler, simulated_bots
+from Scrambler import scrambles
+
+# Description: Tests that a simulated multi rig run solves every cube and accounts for all of each rig's time.
+
+
+@pytest.fixture
+def bots():
+    bots = simulated_bots(2)
+    yield bots
+    for bot in bots:
+        bot.close()
+
+
+def test_every_cube_solved_and_time_accounted(bots):
+    scheduler = RigScheduler(bots, workers=1, load_seconds=5.0)
+    report = scheduler.run(list(scrambles(4, 0)))
+    assert report['cubes'] == 4
+    assert report['errors'] == 0
+    assert all(result['solved'] for result in scheduler.results)
+    for rig in report['rigs']:
+        assert rig['load_seconds'] >= 5.0 * rig['cubes']
+        accounted = rig['busy_seconds'] + rig['load_seconds'] + rig['wait_seconds']
+        assert accounted == pytest.approx(rig['elapsed_seconds'], abs=0.01)
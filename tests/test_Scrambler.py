@@ -0,0 +1,69 @@
+import random
+from collections import Counter
+import pytest
+from CubeValidator import validate
+from CubieCube import MOVE_NAMES, perm_parity
+from Scrambler import random_cubie, random_moves, scrambles, write_scrambles
+
+# Description: Tests that generated states are always legal and that the uniform generator shows no bias.
+
+
+SAMPLES = 6000
+
+
+@pytest.fixture(scope="module")
+def cubes():
+    rng = random.Random(17)
+    return [random_cubie(rng) for _ in range(SAMPLES)]
+
+
+def assert_uniform(counts, outcomes, samples=SAMPLES):
+    """Every outcome within 5 standard deviations of its expected count."""
+
+    p = 1 / outcomes
+    spread = 5 * (samples * p * (1 - p)) ** 0.5
+    assert len(counts) == outcomes
+    for value, count in counts.items():
+        assert abs(count - samples * p) < spread, f"{value}: {count} of {samples}"
+
+
+def test_states_are_always_legal(cubes):
+    for cube in cubes[:1000]:
+        assert perm_parity(cube.cp) == perm_parity(cube.ep)
+        assert validate(cube.to_kociemba()).valid
+
+
+def test_scrambles_are_legal_in_both_modes():
+    for state in list(scrambles(200, seed=3)) + list(scrambles(200, seed=3, moves=25)):
+        assert validate(state).valid
+
+
+def test_orientations_are_unbiased(cubes):
+    for position in [0, 7]:     # The last corner's twist is fixed by the others
+        assert_uniform(Counter(cube.co[position] for cube in cubes), 3)
+    for position in [0, 11]:    # Same for the last edge's flip
+        assert_uniform(Counter(cube.eo[position] for cube in cubes), 2)
+
+
+def test_permutations_are_unbiased(cubes):
+    assert_uniform(Counter(cube.cp[0] for cube in cubes), 8)
+    for position in [0, 1, 11]:     # Positions 0 and 1 are the ones swapped to fix the parity
+        assert_uniform(Counter(cube.ep[position] for cube in cubes), 12)
+    assert_uniform(Counter(perm_parity(cube.cp) for cube in cubes), 2)
+
+
+def test_random_moves_never_cancel_trivially():
+    moves = random_moves(2000, random.Random(4))
+    faces = [MOVE_NAMES.index(move) // 3 for move in moves]
+    for last, face in zip(faces, faces[1:]):
+        assert face != last
+        assert not (face % 3 == last % 3 and face < last)
+    assert_uniform(Counter(move[1:] for move in moves), 3, len(moves))
+
+
+def test_seeded_and_written(tmp_path):
+    assert list(scrambles(5, seed=9)) == list(scrambles(5, seed=9))
+    assert list(scrambles(5, seed=9)) != list(scrambles(5, seed=10))
+    path = tmp_path / "states.txt"
+    assert write_scrambles(str(path), 5, seed=9) == 5
+    assert path.read_text().split() == list(scrambles(5, seed=9))
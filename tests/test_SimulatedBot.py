@@ -0,0 +1,88 @@
+import json
+import random
+import pytest
+from RegripPlanner import RegripPlanner, execute_plan
+from SimulatedBot import SimulatedRubiksBot, TracedServo, VirtualClock
+
+# Description: Tests that a simulated bot adds up the bot's own delays on its virtual clock and traces every servo command.
+
+
+SIDES = ['FACE', 'BACK', 'LEFT', 'RIGHT', 'TOP', 'BOTTOM']
+
+
+@pytest.fixture
+def bot():
+    bot = SimulatedRubiksBot()
+    yield bot
+    bot.close()
+
+
+def random_moves(seed, count=20):
+    rng = random.Random(seed)
+    return [[rng.choice(SIDES), rng.choice(['cw', 'ccw', 'half'])] for _ in range(count)]
+
+
+def test_virtual_clock_never_blocks():
+    clock = VirtualClock()
+    clock.sleep(2.5)
+    clock.sleep(0.5)
+    assert clock.now() == 3.0
+
+
+def test_traced_servo_records_then_forwards():
+    class Servo:
+        angle = None
+        min_angle = -90
+    clock, trace = VirtualClock(), []
+    servo = TracedServo(Servo(), 'y', clock, trace)
+    clock.sleep(1.0)
+    servo.angle = 45
+    assert trace == [{'time': 1.0, 'servo': 'y', 'angle': 45}]
+    assert servo.angle == 45
+    assert servo.min_angle == -90
+
+
+def test_flip_takes_its_delays(bot):
+    start = bot.clock.now()
+    bot.turn_bot_y()
+    delays = [bot.mid_flip_delay, bot.post_flip_delay, bot.flatten1_delay, bot.flatten2_delay]
+    assert bot.clock.now() - start == pytest.approx(sum(delays))
+    assert [(command['servo'], command['angle']) for command in bot.trace] == \
+        [('y', bot.flip_angle), ('y', bot.neutral_angle), ('y', bot.flatten_angle), ('y', bot.neutral_angle)]
+    times = [command['time'] for command in bot.trace]
+    assert [later - earlier for earlier, later in zip(times, times[1:])] == pytest.approx(delays[:3])
+    assert bot.action_counts['turn_bot_y'] == 1
+    assert bot.action_counts['flatten_cube'] == 1
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_plan_run_takes_the_planned_time(bot, seed, tmp_path):
+    planner = RegripPlanner(bot)
+    plan = planner.plan(random_moves(seed))
+    planned = planner.plan_seconds(plan)     # From the bot's orientation and angle before the run
+    execute_plan(bot, plan)
+    assert bot.elapsed() == pytest.approx(planned)
+    summary = bot.summary()
+    assert summary['actions']['turn_cube']['count'] == sum(step[0] == 'turn' for step in plan)
+    assert summary['servo_commands'] == len(bot.trace)
+    times = [command['time'] for command in bot.trace]
+    assert times == sorted(times)
+    assert bot.trace[-1]['time'] <= bot.clock.now()
+
+    path = tmp_path / "trace.jsonl"
+    bot.write_trace(str(path))
+    assert [json.loads(line) for line in path.read_text().splitlines()] == bot.trace
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_overlap_is_never_slower(seed):
+    seconds = []
+    for overlap in [False, True]:
+        bot = SimulatedRubiksBot(overlap=overlap)
+        try:
+            plan = RegripPlanner(bot).plan(random_moves(seed))
+            execute_plan(bot, plan)
+            seconds.append(bot.elapsed())
+        finally:
+            bot.close()
+    assert seconds[1] < seconds[0]
@@ -0,0 +1,56 @@
+from concurrent.futures import ThreadPoolExecutor
+from CubeSymmetry import SYMMETRIES
+from CubieState import CubieState
+from Scrambler import scrambles
+from SolutionCache import SolutionCache
+
+# Description: Tests of the symmetry keyed solution cache.
+
+
+STATE = next(scrambles(1, seed=9))
+
+
+def solves(state, solution):
+    return CubieState.from_kociemba(state).apply_moves(solution).is_solved()
+
+
+def test_symmetric_copy_is_a_hit_with_a_working_solution():
+    cache = SolutionCache()
+    assert solves(STATE, cache.solve(STATE))
+    copy = SYMMETRIES[30].transform_state(STATE)
+    assert solves(copy, cache.solve(copy))
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_disk_tier_is_keyed_on_backend_and_max_length(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SolutionCache('kociemba', path=path)
+    cache.solve(STATE)
+    cache.close()
+
+    same = SolutionCache('kociemba', path=path)
+    assert solves(STATE, same.solve(STATE))
+    assert same.disk_hits == 1
+    same.close()
+
+    for other in (SolutionCache('twophase', path=path), SolutionCache('kociemba', path=path, max_length=23)):
+        assert solves(STATE, other.solve(STATE))
+        assert other.disk_hits == 0 and other.misses == 1
+        other.close()
+
+
+def test_max_length_caps_the_solution():
+    solution = SolutionCache(max_length=21).solve(STATE)
+    assert solves(STATE, solution)
+    assert len(solution.split()) <= 21
+
+
+def test_disk_tier_is_shared_between_threads(tmp_path):
+    states = list(scrambles(4, seed=3))
+    cache = SolutionCache('kociemba', path=str(tmp_path / "cache.sqlite"), max_size=2)
+    with ThreadPoolExecutor(4) as executor:
+        solutions = list(executor.map(cache.solve, states * 3))
+    assert all(solves(state, solution) for state, solution in zip(states * 3, solutions))
+    stats = cache.stats()
+    assert stats['hits'] + stats['disk_hits'] + stats['misses'] == 12
+    cache.close()
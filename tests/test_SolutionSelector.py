@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+from CubieState import CubieState
+from SolutionSelector import candidate_states, select_solution
+from Scrambler import scrambles
+
+# Description: Tests that the selected solution solves the cube and is never predicted slower than the plain solve.
+
+
+SRC = os.path.join(os.path.dirname(__file__), os.pardir, "src")
+STATE = next(scrambles(1, seed=12))
+
+
+def test_candidates_are_distinct_rotations():
+    candidates = candidate_states(STATE)
+    assert candidates[0] == (0, STATE)
+    assert len({state for _, state in candidates}) == len(candidates) == 24
+    assert len(candidate_states(CubieState().to_kociemba())) == 1
+
+
+def test_selected_solution_solves_and_beats_the_plain_solve():
+    result = select_solution(STATE, workers=2)
+    assert CubieState.from_kociemba(STATE).apply_moves(result['solution']).is_solved()
+    assert result['baseline_seconds'] is not None
+    assert result['seconds'] <= result['baseline_seconds']
+    assert result['candidates'] == 24
+
+
+def test_scoring_needs_no_hardware_import():
+    code = ("import sys; from SolutionSelector import select_solution; "
+            f"select_solution({STATE!r}, workers=1); assert 'gpiozero' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code], cwd=SRC, check=True)
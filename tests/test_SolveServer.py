@@ -0,0 +1,48 @@
+import asyncio
+import json
+from CubieState import CubieState
+from Scrambler import scrambles
+from SolveServer import SolveServer
+
+# Description: Tests that the solve server answers every request line, including bad ones, on one connection.
+
+
+STATE = next(scrambles(1, seed=4))
+
+
+async def exchange(lines):
+    """Starts a server on a free port, sends the lines on one connection and returns the replies by line."""
+
+    server = SolveServer(workers=1)
+    dispatchers = [asyncio.create_task(server.dispatcher())]
+    listener = await asyncio.start_server(server.handle_client, '127.0.0.1', 0)
+    port = listener.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for line in lines:
+            writer.write((line + "\n").encode())
+        await writer.drain()
+        replies = [json.loads(await asyncio.wait_for(reader.readline(), 30)) for _ in lines]
+        writer.close()
+        return replies, server
+    finally:
+        listener.close()
+        for task in dispatchers:
+            task.cancel()
+        server.executor.shutdown()
+
+
+def test_every_line_gets_a_reply():
+    lines = ['5', '[1]', '"x"', '{"id": 1, "state": "bad"}', json.dumps({'id': 2, 'state': STATE}), STATE]
+    replies, server = asyncio.run(exchange(lines))
+
+    errors = [reply for reply in replies if reply['error'] is not None]
+    assert len(errors) == 4
+    assert sorted(str(reply['id']) for reply in errors) == ['1', 'None', 'None', 'None']
+    assert all("JSON object" in reply['error'] for reply in errors if reply['id'] is None)
+
+    solved = [reply for reply in replies if reply['error'] is None]
+    assert {reply['id'] for reply in solved} == {2, None}
+    for reply in solved:
+        assert CubieState.from_kociemba(STATE).apply_moves(reply['solution']).is_solved()
+    assert server.requests == 6 and server.errors == 4
@@ -0,0 +1,112 @@
+import json
+import pytest
+from SimulatedBot import SimulatedRubiksBot, VirtualClock
+from Tracing import BOT_METHODS, NULL_SPAN, TRACER, Tracer, instrument, instrument_bot
+
+# Description: Tests that nested spans are recorded and written as consistent Chrome trace events, and that a disabled
+#              ...tracer records nothing.
+
+
+class StepClock:
+    """Time source that moves forward one second every time it is read."""
+
+    def __init__(self) -> None:
+        self.time = 0.0
+
+    def __call__(self):
+        self.time += 1.0
+        return self.time
+
+
+def test_nested_spans_make_valid_chrome_events(tmp_path):
+    tracer = Tracer(now=StepClock())
+    tracer.enable()
+    bot_clock = VirtualClock()
+    with tracer.span('solve', backend='kociemba'):
+        with tracer.span('encode'):
+            pass
+        with tracer.span('step', bot_clock, index=0):
+            bot_clock.sleep(2.5)
+    tracer.disable()
+
+    assert [record['name'] for record in tracer.records] == ['encode', 'step', 'solve']     # In the order they ended
+    encode, step, solve = tracer.records
+    assert (solve['depth'], encode['depth'], step['depth']) == (0, 1, 1)
+    assert solve['self_seconds'] == solve['seconds'] - encode['seconds'] - step['seconds']
+    assert step['bot_seconds'] == 2.5
+    assert 'bot_seconds' not in solve
+
+    path = tmp_path / "trace.json"
+    tracer.write_chrome_trace(str(path))
+    events = {event['name']: event for event in json.loads(path.read_text())['traceEvents']}
+    for event in events.values():
+        assert event['ph'] == 'X' and event['dur'] >= 0 and event['pid'] == 0 and event['tid'] == 0
+    parent = events['solve']
+    for name in ['encode', 'step']:
+        child = events[name]
+        assert parent['ts'] <= child['ts']
+        assert child['ts'] + child['dur'] <= parent['ts'] + parent['dur']
+    assert events['encode']['ts'] + events['encode']['dur'] <= events['step']['ts']
+    assert events['step']['args'] == {'index': 0, 'bot_seconds': 2.5}
+    assert events['solve']['args'] == {'backend': 'kociemba'}
+
+    jsonl = tmp_path / "trace.jsonl"
+    tracer.write_jsonl(str(jsonl))
+    assert [json.loads(line) for line in jsonl.read_text().splitlines()] == tracer.records
+
+
+def test_summary_ranks_by_self_time():
+    tracer = Tracer(now=StepClock())
+    tracer.enable()
+    with tracer.span('outer'):
+        for _ in range(3):
+            with tracer.span('inner'):
+                pass
+    summary = {entry['name']: entry for entry in tracer.summary()}
+    assert summary['inner']['count'] == 3
+    assert sum(entry['self_seconds'] for entry in summary.values()) == summary['outer']['seconds']
+    assert tracer.summary(top=1)[0]['self_seconds'] >= summary['outer']['self_seconds']
+
+
+def test_disabled_tracer_returns_the_shared_null_span():
+    calls = []
+    tracer = Tracer(now=lambda: calls.append(1) or 0.0)
+    assert tracer.span('a') is NULL_SPAN
+    assert tracer.span('b', VirtualClock(), key=1) is NULL_SPAN
+    with tracer.span('c') as span:
+        assert span is NULL_SPAN
+    assert tracer.records == []
+    assert calls == []     # Not even the clock is read
+
+
+def test_traced_methods_pass_straight_through_when_disabled():
+    class Worker:
+        def work(self, value):
+            return value * 2
+    tracer = Tracer(now=StepClock())
+    plain = Worker.work
+    instrument(Worker, ['work'], tracer)
+    instrument(Worker, ['work'], tracer)     # Wrapped only once
+    assert Worker.work.__wrapped__ is plain
+    assert Worker().work(4) == 8
+    assert tracer.records == []
+    tracer.enable()
+    assert Worker().work(5) == 10
+    assert tracer.records[0]['name'] == 'work' and tracer.records[0]['args'] == {'args': [5]}
+
+
+def test_instrument_bot_records_bot_time(monkeypatch):
+    import RubiksBot
+    for name in BOT_METHODS:
+        monkeypatch.setattr(RubiksBot.RubiksBot, name, getattr(RubiksBot.RubiksBot, name))     # Restored after the test
+    instrument_bot()
+    bot = SimulatedRubiksBot()
+    TRACER.enable()
+    try:
+        bot.turn_bot_y()
+    finally:
+        TRACER.disable()
+        bot.close()
+    records = {record['name']: record for record in TRACER.records}
+    assert records['turn_bot_y']['bot_seconds'] == pytest.approx(bot.mid_flip_delay + bot.post_flip_delay + bot.flatten1_delay + bot.flatten2_delay)
+    assert records['flatten_cube']['depth'] == records['turn_bot_y']['depth'] + 1
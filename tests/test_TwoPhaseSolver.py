@@ -0,0 +1,35 @@
+import pytest
+import TwoPhaseSolver
+from CubieState import CubieState, SOLVED
+from Scrambler import scrambles
+from SolverBackends import twophase_backend
+
+# Description: Tests of the in-process two-phase solver: its solutions must solve random states and respect max_length.
+
+
+@pytest.fixture(scope="module")
+def tables():
+    return TwoPhaseSolver.load_tables()
+
+
+@pytest.mark.parametrize("state", list(scrambles(5, seed=3)))
+def test_solves_random_states(tables, state):
+    solution = TwoPhaseSolver.solve(state, tables=tables, timeout=30)
+    assert CubieState.from_kociemba(state).apply_moves(solution).is_solved()
+    assert len(solution.split()) <= 24
+
+
+def test_backend_solves_short_scramble():
+    state = CubieState.from_moves("R U F' D2 L B").to_kociemba()
+    solution = twophase_backend(state)
+    assert CubieState.from_kociemba(state).apply_moves(solution).is_solved()
+
+
+def test_solved_state_needs_no_moves(tables):
+    assert TwoPhaseSolver.solve(SOLVED.to_kociemba(), tables=tables) == ""
+
+
+def test_rejects_invalid_state(tables):
+    state = SOLVED.to_kociemba()
+    with pytest.raises(ValueError):
+        TwoPhaseSolver.solve(state[:-1] + "U", tables=tables)